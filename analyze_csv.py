@@ -1,27 +1,22 @@
 #!/usr/bin/env python3
+"""
+Profile the MovieLens CSV files in data/ml-20m (see recommender/profiling.py)
+
+    python analyze_csv.py [--output report.json]
+
+Same as `python manage.py profile_dataset --csv data/ml-20m`.
+"""
 import os
-import pandas as pd
-import glob
+import sys
+
+# Setup Django environment
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'movie_recsys.settings')
+
+import django
+django.setup()
 
-def analyze_csv_files():
-    csv_files = glob.glob("data/ml-20m/*.csv")
-    
-    for csv_file in csv_files:
-        print(f"\n{'='*60}")
-        print(f"File: {csv_file}")
-        print(f"{'='*60}")
-        
-        try:
-            # Read first 10 rows
-            df = pd.read_csv(csv_file, nrows=10)
-            print(f"Shape: {df.shape}")
-            print(f"Columns: {list(df.columns)}")
-            print("\nFirst 10 rows:")
-            print(df)
-            print(f"\nData types:")
-            print(df.dtypes)
-        except Exception as e:
-            print(f"Error reading {csv_file}: {e}")
+from django.core.management import call_command
 
 if __name__ == "__main__":
-    analyze_csv_files()
+    call_command('profile_dataset', '--csv', 'data/ml-20m', *sys.argv[1:])
@@ -1,10 +1,9 @@
 #!/usr/bin/env python3
+import argparse
 import os
 import sys
-import csv
-import pandas as pd
-from django.db import transaction, connection
-from datetime import datetime
+from contextlib import nullcontext
+from django.db import connection
 
 # Setup Django environment
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -13,140 +12,100 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'movie_recsys.settings')
 import django
 django.setup()
 
-from recommender.models import Movie, Rating, Watchlist
+from recommender.bulk_load import sqlite_bulk_load
+from recommender.snapshot import discard_snapshot, export_snapshot
+from recommender.models import ImportCheckpoint, Movie, Rating, TagApplication, Watchlist
+from recommender.importing import (
+    apply_movie_links, import_genome, import_ratings_csv, import_tags_csv, link_movie_genres,
+    read_links_csv, read_movies_csv, record_import, unchanged_since_import,
+)
 from django.contrib.auth.models import User
+from django.core.management import call_command
 
-def import_movies():
+LINK_CONFLICTS_FILE = "link_conflicts.csv"
+RATINGS_CHECKPOINT = "ratings"
+TAGS_CHECKPOINT = "tags"
+GENOME_CHECKPOINT = "genome"
+
+def import_movies(incremental=False):
     """Import movies from movies.csv"""
     print("Importing movies from movies.csv...")
     movies_file = "data/ml-20m/movies.csv"
     
-    movies_to_create = []
-    with open(movies_file, 'r', encoding='utf-8') as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            # Extract year from title (format: "Title (Year)")
-            title = row['title']
-            release_year = None
-            if '(' in title and ')' in title:
-                try:
-                    year_str = title.split('(')[-1].split(')')[0]
-                    if year_str.isdigit():
-                        release_year = int(year_str)
-                except:
-                    pass
-            
-            # Use the first genre as the main genre
-            genres = row['genres'].split('|')
-            main_genre = genres[0] if genres else 'Unknown'
-            
-            movie = Movie(
-                title=title,
-                genre=main_genre,
-                director='Unknown',  # CSV doesn't have director info
-                release_year=release_year or 0,
-                overview='No overview available',
-                poster_url=None,
-                tmdb_id=int(row['movieId'])  # Using movieId as tmdb_id for now
-            )
-            movies_to_create.append(movie)
+    # Titles, years and genres are parsed vectorized in worker processes
+    movies_to_create, genres_by_movielens_id = read_movies_csv(movies_file)
+    
+    # Incremental runs update movies imported before (by MovieLens id) and add new ones
+    if incremental:
+        options = {'update_conflicts': True, 'unique_fields': ['movielens_id'], 'update_fields': ['title', 'genre', 'release_year']}
+    else:
+        options = {'ignore_conflicts': True}
     
     # Bulk create in batches to avoid memory issues
     batch_size = 1000
     for i in range(0, len(movies_to_create), batch_size):
         batch = movies_to_create[i:i + batch_size]
-        Movie.objects.bulk_create(batch, ignore_conflicts=True)
+        Movie.objects.bulk_create(batch, **options)
         print(f"Created {min(i + batch_size, len(movies_to_create))} movies...")
     
+    link_count = link_movie_genres(genres_by_movielens_id, batch_size=batch_size, field='movielens_id')
+    print(f"Linked {link_count} movie genres")
+    
     print(f"Successfully imported {len(movies_to_create)} movies")
 
-def import_ratings():
+def import_ratings(incremental=False, bulk=None):
     """Import ratings from ratings.csv"""
     print("Importing ratings from ratings.csv...")
     ratings_file = "data/ml-20m/ratings.csv"
     
-    # Get all movies for mapping
-    movies_dict = {movie.tmdb_id: movie for movie in Movie.objects.all()}
-    
-    ratings_to_create = []
-    with open(ratings_file, 'r', encoding='utf-8') as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            movie_id = int(row['movieId'])
-            user_id = int(row['userId'])
-            
-            # Get or create user
-            user, created = User.objects.get_or_create(
-                username=f'user_{user_id}',
-                defaults={'email': f'user_{user_id}@example.com', 'password': 'defaultpass123'}
-            )
-            
-            # Get movie
-            movie = movies_dict.get(movie_id)
-            if movie:
-                rating = Rating(
-                    user=user,
-                    movie=movie,
-                    rating=float(row['rating']),
-                    timestamp=datetime.fromtimestamp(int(row['timestamp']))
-                )
-                ratings_to_create.append(rating)
-    
-    # Bulk create in batches
-    batch_size = 1000
-    for i in range(0, len(ratings_to_create), batch_size):
-        batch = ratings_to_create[i:i + batch_size]
-        Rating.objects.bulk_create(batch, ignore_conflicts=True)
-        print(f"Created {min(i + batch_size, len(ratings_to_create))} ratings...")
+    # Streamed in fixed-size batches, each in its own transaction. Incremental
+    # runs resume from the 'ratings' checkpoint and only upsert new rows
+    count = import_ratings_csv(ratings_file, checkpoint=RATINGS_CHECKPOINT if incremental else None, bulk=bulk)
     
-    print(f"Successfully imported {len(ratings_to_create)} ratings")
+    print(f"Successfully imported {count} ratings")
 
 def import_links():
     """Import links data and update movies with proper tmdb_id"""
     print("Importing links data...")
     links_file = "data/ml-20m/links.csv"
     
-    links_data = {}
-    with open(links_file, 'r', encoding='utf-8') as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            movie_id = int(row['movieId'])
-            tmdb_id = int(row['tmdbId']) if row['tmdbId'] else None
-            links_data[movie_id] = tmdb_id
-    
-    # Update movies with proper tmdb_id from links, handling unique constraints
-    updated_count = 0
-    for movie in Movie.objects.all():
-        if movie.tmdb_id in links_data and links_data[movie.tmdb_id]:
-            new_tmdb_id = links_data[movie.tmdb_id]
-            
-            # Check if this tmdb_id is already used by another movie
-            existing_movie = Movie.objects.filter(tmdb_id=new_tmdb_id).exclude(pk=movie.pk).first()
-            if existing_movie:
-                print(f"Warning: TMDb ID {new_tmdb_id} already used by movie '{existing_movie.title}'. Skipping update for '{movie.title}'.")
-                continue
-            
-            # Update the movie
-            movie.tmdb_id = new_tmdb_id
-            movie.save()
-            updated_count += 1
+    links_data = read_links_csv(links_file)
+    
+    # Conflicts are resolved in memory and the updates applied with bulk_update
+    updated_count, conflict_count = apply_movie_links(links_data, conflicts_path=LINK_CONFLICTS_FILE)
+    if conflict_count:
+        print(f"Warning: {conflict_count} TMDb ID conflicts skipped, see {LINK_CONFLICTS_FILE}")
     
     print(f"Updated {updated_count} movies with proper TMDb IDs")
 
-def import_tags():
-    """Import tags from tags.csv (optional - can be used for recommendations)"""
+def import_tags(incremental=False, bulk=None):
+    """Import tags from tags.csv and the tag genome (genome-tags.csv + genome-scores.csv)"""
     print("Importing tags from tags.csv...")
     tags_file = "data/ml-20m/tags.csv"
-    
-    # This is just for demonstration - tags aren't in the current model
-    # You might want to create a Tag model later
-    tag_count = 0
-    with open(tags_file, 'r', encoding='utf-8') as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            tag_count += 1
-    
-    print(f"Found {tag_count} tags (not imported into database - no Tag model)")
+    genome_tags_file = "data/ml-20m/genome-tags.csv"
+    genome_scores_file = "data/ml-20m/genome-scores.csv"
+    
+    # Incremental runs skip files (and a catalog) already imported as they are:
+    # re-reading ~11M genome scores would dwarf a daily ratings refresh
+    if not os.path.exists(tags_file):
+        print(f"{tags_file} not found, skipping user tags")
+    elif incremental and unchanged_since_import(TAGS_CHECKPOINT, [tags_file]):
+        print(f"{tags_file} unchanged since the last import, skipping user tags")
+    else:
+        tag_count = import_tags_csv(tags_file, bulk=bulk)
+        record_import(TAGS_CHECKPOINT, [tags_file], rows=tag_count)
+        print(f"Imported {tag_count} tag applications")
+    
+    # ~11M relevance scores go into the array-backed genome store, not ORM rows
+    genome_files = [genome_tags_file, genome_scores_file]
+    if not all(os.path.exists(path) for path in genome_files):
+        print("Tag genome files not found, skipping genome")
+    elif incremental and unchanged_since_import(GENOME_CHECKPOINT, genome_files):
+        print("Tag genome unchanged since the last import, skipping genome")
+    else:
+        movie_count, genome_tag_count = import_genome(genome_tags_file, genome_scores_file)
+        record_import(GENOME_CHECKPOINT, genome_files, rows=movie_count)
+        print(f"Stored tag genome: {movie_count} movies x {genome_tag_count} tags")
 
 def create_test_user():
     """Create a test user for demonstration"""
@@ -170,6 +129,7 @@ def clear_existing_data():
     Watchlist.objects.all().delete()
     Rating.objects.all().delete()
     Movie.objects.all().delete()
+    ImportCheckpoint.objects.all().delete()
     
     # Delete users created by previous imports (non-staff, non-superuser)
     User.objects.filter(username__startswith='user_', is_staff=False, is_superuser=False).delete()
@@ -198,35 +158,69 @@ def clear_existing_data():
         else:
             print(f"Warning: Auto-increment reset not implemented for database vendor: {db_vendor}")
     
+    # The training snapshot was exported from the rows just deleted
+    discard_snapshot()
+    
     print("Existing data cleared successfully")
 
-@transaction.atomic
-def main():
+def main(incremental=False, bulk_load=False):
     """Main function to import all CSV data"""
-    print("Starting CSV data import...")
+    print("Starting CSV data import" + (" (incremental)..." if incremental else "..."))
     
-    print("Step 0: Clearing existing data...")
-    clear_existing_data()
+    if incremental:
+        print("Step 0: Keeping existing data, resuming from the last checkpoint")
+    else:
+        print("Step 0: Clearing existing data...")
+        clear_existing_data()
     
     print("Step 1: Importing movies...")
-    import_movies()
+    import_movies(incremental)
     
     print("Step 2: Importing links and updating TMDb IDs...")
     import_links()
     
-    print("Step 3: Importing ratings...")
-    import_ratings()
-    
-    print("Step 4: Analyzing tags data...")
-    import_tags()
+    # Bulk-load mode: SQLite pragmas relaxed and rating/tag indexes rebuilt after the load
+    with sqlite_bulk_load([Rating, TagApplication]) if bulk_load else nullcontext() as bulk:
+        print("Step 3: Importing ratings...")
+        import_ratings(incremental, bulk)
+        
+        print("Step 4: Importing tags and tag genome...")
+        import_tags(incremental, bulk)
     
     print("Step 5: Creating test user...")
     create_test_user()
     
+    # Without statistics SQLite sorts a whole genre for each search page instead of walking movie_title_idx
+    print("Step 6: Refreshing query planner statistics...")
+    if connection.vendor in ('sqlite', 'postgresql'):
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+    
+    # The recommender trains from this snapshot instead of querying the tables
+    print("Step 7: Exporting training snapshot...")
+    counts = export_snapshot()
+    print(f"Snapshot: {counts['movies']} movies, {counts['ratings']} ratings, {counts['watchlist']} watchlist entries")
+    
+    # Movie detail pages read their similar movies from this table
+    print("Step 8: Building similar movies table...")
+    call_command('build_movie_similarities')
+    
     print("\nCSV data import completed successfully!")
     print(f"Total movies in database: {Movie.objects.count()}")
     print(f"Total ratings in database: {Rating.objects.count()}")
     print(f"Total users in database: {User.objects.count()}")
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description="Import the MovieLens CSV files")
+    parser.add_argument(
+        '--incremental', action='store_true',
+        help="Don't clear the database; resume an interrupted import or apply only new/changed rows"
+    )
+    parser.add_argument(
+        '--bulk-load', action='store_true',
+        help="SQLite only: relaxed durability and indexes rebuilt after loading (full imports only)"
+    )
+    args = parser.parse_args()
+    if args.bulk_load and args.incremental:
+        parser.error("--bulk-load rebuilds the rating indexes and is meant for full imports, not --incremental")
+    main(incremental=args.incremental, bulk_load=args.bulk_load)
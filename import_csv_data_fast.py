@@ -1,10 +1,9 @@
 #!/usr/bin/env python3
+import argparse
 import os
 import sys
-import csv
-import pandas as pd
-from django.db import transaction, connection
-from datetime import datetime
+from contextlib import nullcontext
+from django.db import connection
 
 # Setup Django environment
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -13,7 +12,10 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'movie_recsys.settings')
 import django
 django.setup()
 
+from recommender.bulk_load import sqlite_bulk_load
 from recommender.models import Movie, Rating, Watchlist
+from recommender.snapshot import discard_snapshot
+from recommender.importing import import_ratings_csv, link_movie_genres, read_movies_csv
 from django.contrib.auth.models import User
 
 # Configuration for fast testing
@@ -56,6 +58,9 @@ def clear_existing_data():
         else:
             print(f"Warning: Auto-increment reset not implemented for database vendor: {db_vendor}")
     
+    # The training snapshot was exported from the rows just deleted
+    discard_snapshot()
+    
     print("Existing data cleared successfully")
 
 def import_movies():
@@ -63,41 +68,8 @@ def import_movies():
     print(f"Importing first {SAMPLE_SIZE} movies from movies.csv...")
     movies_file = "data/ml-20m/movies.csv"
     
-    movies_to_create = []
-    count = 0
-    
-    with open(movies_file, 'r', encoding='utf-8') as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            if count >= SAMPLE_SIZE:
-                break
-                
-            # Extract year from title (format: "Title (Year)")
-            title = row['title']
-            release_year = None
-            if '(' in title and ')' in title:
-                try:
-                    year_str = title.split('(')[-1].split(')')[0]
-                    if year_str.isdigit():
-                        release_year = int(year_str)
-                except:
-                    pass
-            
-            # Use the first genre as the main genre
-            genres = row['genres'].split('|')
-            main_genre = genres[0] if genres else 'Unknown'
-            
-            movie = Movie(
-                title=title,
-                genre=main_genre,
-                director='Unknown',
-                release_year=release_year or 0,
-                overview='No overview available',
-                poster_url=None,
-                tmdb_id=int(row['movieId'])
-            )
-            movies_to_create.append(movie)
-            count += 1
+    # Titles, years and genres are parsed vectorized in worker processes
+    movies_to_create, genres_by_movielens_id = read_movies_csv(movies_file, limit=SAMPLE_SIZE)
     
     # Bulk create in batches
     for i in range(0, len(movies_to_create), BATCH_SIZE):
@@ -105,53 +77,20 @@ def import_movies():
         Movie.objects.bulk_create(batch, ignore_conflicts=True)
         print(f"Created {min(i + BATCH_SIZE, len(movies_to_create))} movies...")
     
+    link_count = link_movie_genres(genres_by_movielens_id, batch_size=BATCH_SIZE, field='movielens_id')
+    print(f"Linked {link_count} movie genres")
+    
     print(f"Successfully imported {len(movies_to_create)} movies")
 
-def import_ratings():
+def import_ratings(bulk=None):
     """Import ratings from ratings.csv - limited sample for testing"""
     print(f"Importing first {SAMPLE_SIZE} ratings from ratings.csv...")
     ratings_file = "data/ml-20m/ratings.csv"
     
-    # Get all movies for mapping
-    movies_dict = {movie.tmdb_id: movie for movie in Movie.objects.all()}
-    
-    ratings_to_create = []
-    count = 0
+    # In bulk-load mode the batch size comes from SQLite's variable limit instead
+    count = import_ratings_csv(ratings_file, batch_size=BATCH_SIZE, limit=SAMPLE_SIZE, bulk=bulk)
     
-    with open(ratings_file, 'r', encoding='utf-8') as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            if count >= SAMPLE_SIZE:
-                break
-                
-            movie_id = int(row['movieId'])
-            user_id = int(row['userId'])
-            
-            # Get or create user
-            user, created = User.objects.get_or_create(
-                username=f'user_{user_id}',
-                defaults={'email': f'user_{user_id}@example.com', 'password': 'defaultpass123'}
-            )
-            
-            # Get movie
-            movie = movies_dict.get(movie_id)
-            if movie:
-                rating = Rating(
-                    user=user,
-                    movie=movie,
-                    rating=float(row['rating']),
-                    timestamp=datetime.fromtimestamp(int(row['timestamp']))
-                )
-                ratings_to_create.append(rating)
-                count += 1
-    
-    # Bulk create in batches
-    for i in range(0, len(ratings_to_create), BATCH_SIZE):
-        batch = ratings_to_create[i:i + BATCH_SIZE]
-        Rating.objects.bulk_create(batch, ignore_conflicts=True)
-        print(f"Created {min(i + BATCH_SIZE, len(ratings_to_create))} ratings...")
-    
-    print(f"Successfully imported {len(ratings_to_create)} ratings")
+    print(f"Successfully imported {count} ratings")
 
 def create_test_user():
     """Create a test user for demonstration"""
@@ -167,8 +106,7 @@ def create_test_user():
         test_user.save()
         print("Created demo user: demo_user / demopass123")
 
-@transaction.atomic
-def main():
+def main(bulk_load=False):
     """Main function to import limited CSV data for testing"""
     print("Starting FAST CSV data import (limited sample)...")
     
@@ -179,7 +117,8 @@ def main():
     import_movies()
     
     print("Step 2: Importing ratings...")
-    import_ratings()
+    with sqlite_bulk_load([Rating]) if bulk_load else nullcontext() as bulk:
+        import_ratings(bulk)
     
     print("Step 3: Creating test user...")
     create_test_user()
@@ -190,4 +129,9 @@ def main():
     print(f"Total users in database: {User.objects.count()}")
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description="Import a small sample of the MovieLens CSV files")
+    parser.add_argument(
+        '--bulk-load', action='store_true',
+        help="SQLite only: relaxed durability and rating indexes rebuilt after loading"
+    )
+    main(bulk_load=parser.parse_args().bulk_load)
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -42,6 +43,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'recommender.middleware.PrecompressedStaticMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -119,6 +121,33 @@ USE_TZ = True
 STATIC_URL = 'static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
 
+# collectstatic bundles these (in order), content-hashes every file and writes
+# .gz/.br variants; templates load them with {% bundle %}
+STATIC_BUNDLES = {
+    'js/app.js': [
+        'js/carousel.js',
+        'js/watchlist.js',
+        'js/rating-buffer.js',
+        'js/autocomplete.js',
+    ],
+    'css/app.css': [
+        'css/netflix-style.css',
+    ],
+}
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'recommender.staticfiles.BundledManifestStorage',
+    },
+}
+
+# Serve collected (precompressed) static files from Django when there is no
+# CDN or web server in front of the app
+SERVE_PRECOMPRESSED_STATIC = os.environ.get('SERVE_PRECOMPRESSED_STATIC', str(not DEBUG)) == 'True'
+
 # Authentication settings
 LOGIN_REDIRECT_URL = '/recommendations/'
 LOGOUT_REDIRECT_URL = '/'
@@ -130,17 +159,48 @@ LOGIN_URL = '/login/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Cache configuration for performance optimization
+# One SQLite (WAL) file shared by every worker process on the host
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
+        'BACKEND': 'recommender.cache_backends.SQLiteCache',
+        'LOCATION': os.environ.get('DJANGO_CACHE_LOCATION', BASE_DIR / 'django_cache.sqlite3'),
         'TIMEOUT': 3600,  # 1 hour
         'OPTIONS': {
-            'MAX_ENTRIES': 1000
+            'MAX_ENTRIES': 10000,
+            'MAX_SIZE': 64 * 1024 * 1024,  # bytes of cached values
         }
     }
 }
 
+# Runs the tests on an in-memory cache instead of the development cache file
+TEST_RUNNER = 'movie_recsys.test_runner.TestRunner'
+
+# Seconds the popular / top rated listings may lag behind new ratings (recommender.versions.touch_version)
+AGGREGATES_VERSION_INTERVAL = 60
+
+# Array-backed tag genome store (recommender.genome), written by the CSV import
+GENOME_DIR = BASE_DIR / 'genome'
+
+# Pickled content (TF-IDF) and SVD models of HybridRecommender
+RECOMMENDER_CACHE_DIR = BASE_DIR / 'recommender' / 'cache'
+
+# Columnar training snapshot (manage.py export_snapshot), read by HybridRecommender
+SNAPSHOT_DIR = BASE_DIR / 'snapshot'
+
+# TMDb enrichment (manage.py enrich_tmdb)
+TMDB_API_KEY = os.environ.get('TMDB_API_KEY', '')
+TMDB_API_URL = os.environ.get('TMDB_API_URL', 'https://api.themoviedb.org/3')
+TMDB_RATE = float(os.environ.get('TMDB_RATE', '40'))  # requests per second
+TMDB_CACHE_DIR = BASE_DIR / 'tmdb_cache'
+
+# Local poster cache (resized WebP/JPEG copies of Movie.poster_url)
+POSTER_CACHE_DIR = BASE_DIR / 'poster_cache'
+POSTER_SOURCE = 'recommender.posters.HTTPPosterSource'
+POSTER_RETRY_AFTER = 3600  # seconds before cache_posters tries a failed poster again
+
+# Threads for blocking recommender work called from the async views
+RECOMMENDER_EXECUTOR_WORKERS = int(os.environ.get('RECOMMENDER_EXECUTOR_WORKERS', 4))
+
 # Static files configuration for production
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
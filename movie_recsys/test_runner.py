@@ -0,0 +1,37 @@
+"""
+Test runner for manage.py test (settings.TEST_RUNNER)
+
+The tests call cache.clear(), so they run against a per-process in-memory
+cache instead of the shared development cache file (CACHES['default']).
+tests/test_cache_backend.py covers SQLiteCache on throwaway files.
+
+HybridRecommender pickles the models it builds; on test data those would
+replace the real ones, so RECOMMENDER_CACHE_DIR points at a throwaway
+directory for the run.
+"""
+import shutil
+import tempfile
+
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+TEST_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tests',
+        'TIMEOUT': 3600,
+    }
+}
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._model_dir = tempfile.mkdtemp(prefix='recommender-models-')
+        self._overrides = override_settings(CACHES=TEST_CACHES, RECOMMENDER_CACHE_DIR=self._model_dir)
+        self._overrides.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._overrides.disable()
+        shutil.rmtree(self._model_dir, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
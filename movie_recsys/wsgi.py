@@ -14,3 +14,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'movie_recsys.settings')
 
 application = get_wsgi_application()
+
+# Build the in-memory autocomplete index before the first request arrives
+from recommender.typeahead import warm_typeahead_index  # noqa: E402
+warm_typeahead_index()
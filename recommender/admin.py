@@ -1,15 +1,21 @@
 from django.contrib import admin
-from .models import Movie, Rating
+from .models import Genre, Movie, Rating
 
 
 @admin.register(Movie)
 class MovieAdmin(admin.ModelAdmin):
     list_display = ('title', 'genre', 'director', 'release_year', 'tmdb_id')
-    list_filter = ('genre', 'release_year')
+    list_filter = ('genres', 'release_year')
     search_fields = ('title', 'director')
     ordering = ('title',)
 
 
+@admin.register(Genre)
+class GenreAdmin(admin.ModelAdmin):
+    list_display = ('name',)
+    search_fields = ('name',)
+
+
 @admin.register(Rating)
 class RatingAdmin(admin.ModelAdmin):
     list_display = ('user', 'movie', 'rating', 'timestamp')
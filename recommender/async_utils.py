@@ -0,0 +1,73 @@
+"""
+Helpers for the async views
+
+The views run on the event loop and use the async ORM for their own queries.
+Anything CPU-bound (the recommender engine) goes to one small, bounded thread
+pool so a burst of recommendation requests can't starve the event loop or
+open a thread per request.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.views import redirect_to_login
+from django.db import close_old_connections
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Process-wide pool with settings.RECOMMENDER_EXECUTOR_WORKERS threads"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'RECOMMENDER_EXECUTOR_WORKERS', 4),
+                    thread_name_prefix='recommender'
+                )
+    return _executor
+
+
+def _with_fresh_connections(func):
+    # Pool threads outlive requests, so treat each call like a request boundary
+    @wraps(func)
+    def inner(*args, **kwargs):
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+    return inner
+
+
+async def run_in_executor(func, *args, **kwargs):
+    """Run a blocking, CPU-heavy call in the bounded pool and await its result"""
+    return await sync_to_async(
+        _with_fresh_connections(func), thread_sensitive=False, executor=get_executor()
+    )(*args, **kwargs)
+
+
+def _load_user(request):
+    user = request.user
+    user.is_authenticated  # Resolve the lazy user while still in sync code
+    return user
+
+
+async def aget_user(request):
+    """request.user, loaded without blocking the event loop"""
+    return await sync_to_async(_load_user)(request)
+
+
+def async_login_required(view):
+    """login_required for async views (Django 4.2's decorator is sync only)"""
+    @wraps(view)
+    async def inner(request, *args, **kwargs):
+        user = await aget_user(request)
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await view(request, *args, **kwargs)
+    return inner
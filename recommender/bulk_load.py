@@ -0,0 +1,177 @@
+"""
+SQLite bulk-load mode for the CSV importers
+
+    with sqlite_bulk_load([Rating, TagApplication]) as bulk:
+        import_ratings_csv(path, bulk=bulk)
+
+Inside the block:
+- the connection runs with throughput pragmas (BULK_PRAGMAS): WAL journal,
+  no fsync, a large page cache and in-memory temp storage
+- the secondary and unique indexes of the given tables are dropped, so new
+  rows only append to the table b-tree instead of updating every index
+- bulk.insert() writes rows with raw multi-row INSERTs sized from SQLite's
+  variable limit (Django's bulk_create stays under 999 variables per query)
+
+On exit, even after an error, the indexes are recreated from their saved
+definitions. Where a unique index finds duplicate rows, the last inserted
+row is kept, as the upsert would have done. ANALYZE then refreshes the
+planner statistics and the previous pragma values are restored.
+synchronous=OFF means a crash during the load can corrupt the database, so
+only use this mode for imports that can be re-run from scratch.
+
+On other databases the block is a no-op: bulk.active is False and the
+importers keep their ORM path.
+"""
+import sqlite3
+import time
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, connections, transaction
+
+BULK_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'OFF',
+    'cache_size': -256 * 1024,  # KiB, i.e. 256 MB
+    'temp_store': 'MEMORY',
+}
+MAX_ROWS_PER_INSERT = 50000
+
+
+class BulkLoad:
+    def __init__(self, models, using=DEFAULT_DB_ALIAS, out=print):
+        self.models = list(models)
+        self.connection = connections[using]
+        self.out = out
+        self.active = self.connection.vendor == 'sqlite'
+        self.saved_pragmas = {}
+        self.dropped_indexes = []  # (table, CREATE INDEX sql, indexed columns)
+        self.callbacks = []
+
+    def _pragma(self, cursor, name, value=None):
+        if value is not None:
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.execute(f"PRAGMA {name}")
+        row = cursor.fetchone()
+        return row[0] if row else None
+
+    def variable_limit(self):
+        """Maximum number of ? parameters in one statement"""
+        self.connection.ensure_connection()
+        try:
+            return self.connection.connection.getlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER)
+        except AttributeError:
+            # Python < 3.11 can't ask; 999 is the lowest limit SQLite ever shipped with
+            return 999
+
+    def rows_per_insert(self, columns):
+        """Rows of `columns` values that fit in one INSERT statement"""
+        return max(1, min(self.variable_limit() // columns, MAX_ROWS_PER_INSERT))
+
+    def start(self):
+        with self.connection.cursor() as cursor:
+            # journal_mode and synchronous can't change inside a transaction
+            if not self.connection.in_atomic_block:
+                for name, value in BULK_PRAGMAS.items():
+                    self.saved_pragmas[name] = self._pragma(cursor, name)
+                    self._pragma(cursor, name, value)
+            for model in self.models:
+                table = model._meta.db_table
+                cursor.execute(
+                    "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = %s AND sql IS NOT NULL",
+                    [table],
+                )
+                for name, sql in cursor.fetchall():
+                    cursor.execute(f'PRAGMA index_info("{name}")')
+                    columns = [row[2] for row in cursor.fetchall()]
+                    cursor.execute(f'DROP INDEX "{name}"')
+                    self.dropped_indexes.append((table, sql, columns))
+        self.out(f"bulk load: dropped {len(self.dropped_indexes)} indexes on "
+                 f"{', '.join(model._meta.db_table for model in self.models)}")
+
+    def on_finish(self, func):
+        """Run `func` once the indexes are back, e.g. work that needs duplicates gone"""
+        self.callbacks.append(func)
+
+    def insert(self, model, fields, rows):
+        """
+        Append rows to a table with multi-row INSERTs
+
+        Args:
+            model: Model of the table
+            fields: Field attnames, e.g. ['user_id', 'movie_id', 'rating', 'timestamp']
+            rows: Tuples of Python values in `fields` order; they go through
+                the fields' get_db_prep_save like bulk_create's would
+        """
+        model_fields = [model._meta.get_field(name) for name in fields]
+        columns = ', '.join(f'"{field.column}"' for field in model_fields)
+        per_statement = self.rows_per_insert(len(fields))
+        connection = self.connection
+        with connection.cursor() as cursor:
+            for start in range(0, len(rows), per_statement):
+                chunk = rows[start:start + per_statement]
+                params = [
+                    field.get_db_prep_save(value, connection)
+                    for row in chunk
+                    for field, value in zip(model_fields, row)
+                ]
+                values = ', '.join(['(' + ', '.join(['%s'] * len(fields)) + ')'] * len(chunk))
+                cursor.execute(f'INSERT INTO "{model._meta.db_table}" ({columns}) VALUES {values}', params)
+
+    def _create_index(self, cursor, table, sql, columns):
+        try:
+            with transaction.atomic(using=self.connection.alias):
+                cursor.execute(sql)
+            return
+        except IntegrityError:
+            pass
+        key = ', '.join(f'"{column}"' for column in columns)
+        cursor.execute(
+            f'DELETE FROM "{table}" WHERE rowid NOT IN (SELECT MAX(rowid) FROM "{table}" GROUP BY {key})'
+        )
+        self.out(f"bulk load: removed {cursor.rowcount} duplicate rows from {table} ({key})")
+        cursor.execute(sql)
+
+    def finish(self, succeeded=True):
+        started = time.monotonic()
+        with self.connection.cursor() as cursor:
+            try:
+                while self.dropped_indexes:
+                    self._create_index(cursor, *self.dropped_indexes[0])
+                    self.dropped_indexes.pop(0)
+                rebuilt = time.monotonic()
+                for model in self.models:
+                    cursor.execute(f'ANALYZE "{model._meta.db_table}"')
+                analyzed = time.monotonic()
+            finally:
+                for name, value in self.saved_pragmas.items():
+                    self._pragma(cursor, name, value)
+        self.out(f"bulk load: indexes rebuilt in {rebuilt - started:.1f}s, ANALYZE in {analyzed - rebuilt:.1f}s")
+        if succeeded:
+            for func in self.callbacks:
+                func()
+
+
+class _Inactive:
+    active = False
+
+
+@contextmanager
+def sqlite_bulk_load(models, using=DEFAULT_DB_ALIAS, out=print):
+    """
+    Bulk-load mode for the tables of `models` (see module docstring)
+
+    Yields:
+        BulkLoad to pass to the importers (bulk.active is False when the
+        database isn't SQLite)
+    """
+    if connections[using].vendor != 'sqlite':
+        yield _Inactive()
+        return
+    bulk = BulkLoad(models, using=using, out=out)
+    bulk.start()
+    try:
+        yield bulk
+    except BaseException:
+        bulk.finish(succeeded=False)
+        raise
+    bulk.finish()
@@ -0,0 +1,293 @@
+"""
+Cross-process cache backend on a WAL-mode SQLite file
+
+LocMemCache gives every gunicorn worker its own cache. This backend keeps all
+entries in one SQLite file per host, so workers share hits without running
+Redis or memcached. WAL lets readers proceed while one writer commits; writes
+that must be atomic (add, incr, eviction) run inside BEGIN IMMEDIATE.
+
+Entries are evicted least-recently-used first once MAX_ENTRIES or MAX_SIZE
+(total bytes of pickled values) is exceeded; expired entries go first.
+
+    CACHES = {
+        'default': {
+            'BACKEND': 'recommender.cache_backends.SQLiteCache',
+            'LOCATION': BASE_DIR / 'django_cache.sqlite3',
+            'OPTIONS': {'MAX_ENTRIES': 10000, 'MAX_SIZE': 64 * 1024 * 1024},
+        }
+    }
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS cache_entry ("
+    " key TEXT PRIMARY KEY,"
+    " value BLOB NOT NULL,"
+    " expires REAL,"
+    " accessed REAL NOT NULL,"
+    " size INTEGER NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS cache_entry_accessed ON cache_entry (accessed)",
+    "CREATE INDEX IF NOT EXISTS cache_entry_expires ON cache_entry (expires)",
+    # Single row of running totals, so bounds are checked without COUNT(*)
+    "CREATE TABLE IF NOT EXISTS cache_stats ("
+    " id INTEGER PRIMARY KEY CHECK (id = 1),"
+    " entries INTEGER NOT NULL,"
+    " size INTEGER NOT NULL)",
+    "INSERT OR IGNORE INTO cache_stats (id, entries, size) VALUES (1, 0, 0)",
+)
+
+
+class SQLiteCache(BaseCache):
+    """
+    Django cache backend shared by every process that opens the same file
+
+    OPTIONS (besides Django's MAX_ENTRIES / CULL_FREQUENCY):
+        MAX_SIZE: Upper bound on the total bytes of stored values (default 64 MB)
+        ACCESS_RESOLUTION: Seconds between LRU timestamp refreshes of one key
+            on reads, so hot keys don't turn every get() into a write (default 1)
+        BUSY_TIMEOUT: Seconds to wait for the write lock (default 5)
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.path = str(location)
+        self.max_size = int(options.get('MAX_SIZE', 64 * 1024 * 1024))
+        self.access_resolution = float(options.get('ACCESS_RESOLUTION', 1))
+        self.busy_timeout = float(options.get('BUSY_TIMEOUT', 5))
+        self._local = threading.local()
+
+    # Connections ------------------------------------------------------------
+
+    def _connection(self):
+        """One connection per thread, reopened after fork"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with self._transaction(conn):
+            for statement in SCHEMA:
+                conn.execute(statement)
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    @staticmethod
+    @contextmanager
+    def _transaction(conn):
+        """Write transaction holding the database lock from the start"""
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _write(self):
+        return self._transaction(self._connection())
+
+    # Helpers ----------------------------------------------------------------
+
+    @staticmethod
+    def _is_live(expires, now):
+        return expires is None or expires > now
+
+    def _store(self, conn, key, value, timeout, now):
+        """Insert or replace one entry and keep cache_stats in step"""
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        expires = self.get_backend_timeout(timeout)
+        old = conn.execute("SELECT size FROM cache_entry WHERE key = ?", (key,)).fetchone()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache_entry (key, value, expires, accessed, size) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (key, data, expires, now, len(data))
+        )
+        if old is None:
+            conn.execute("UPDATE cache_stats SET entries = entries + 1, size = size + ?", (len(data),))
+        else:
+            conn.execute("UPDATE cache_stats SET size = size + ?", (len(data) - old[0],))
+
+    def _remove(self, conn, keys):
+        """Delete `keys`; returns the number of rows removed"""
+        removed = 0
+        for key in keys:
+            row = conn.execute("DELETE FROM cache_entry WHERE key = ? RETURNING size", (key,)).fetchone()
+            if row is not None:
+                conn.execute("UPDATE cache_stats SET entries = entries - 1, size = size - ?", (row[0],))
+                removed += 1
+        return removed
+
+    def _cull(self, conn, now):
+        """Drop expired entries, then least recently used ones, until within bounds"""
+        entries, size = conn.execute("SELECT entries, size FROM cache_stats").fetchone()
+        if entries <= self._max_entries and size <= self.max_size:
+            return
+
+        expired = [row[0] for row in conn.execute(
+            "SELECT key FROM cache_entry WHERE expires IS NOT NULL AND expires <= ?", (now,)
+        )]
+        self._remove(conn, expired)
+
+        entries, size = conn.execute("SELECT entries, size FROM cache_stats").fetchone()
+        if entries <= self._max_entries and size <= self.max_size:
+            return
+
+        if self._cull_frequency == 0:
+            # Django's convention: CULL_FREQUENCY 0 empties the whole cache
+            conn.execute("DELETE FROM cache_entry")
+            conn.execute("UPDATE cache_stats SET entries = 0, size = 0")
+            return
+
+        # Like Django's backends, cull a fraction of the entries at once
+        # (CULL_FREQUENCY) so a full cache doesn't evict on every write
+        target_entries, target_size = entries, size
+        if entries > self._max_entries:
+            target_entries = min(self._max_entries, entries - entries // self._cull_frequency)
+        if size > self.max_size:
+            target_size = min(self.max_size, size - size // self._cull_frequency)
+        victims = []
+        for key, entry_size in conn.execute(
+            "SELECT key, size FROM cache_entry ORDER BY accessed, key"
+        ):
+            if entries <= target_entries and size <= target_size:
+                break
+            victims.append(key)
+            entries -= 1
+            size -= entry_size
+        self._remove(conn, victims)
+
+    # Cache API --------------------------------------------------------------
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._get_many([key]).get(key, default)
+
+    def get_many(self, keys, version=None):
+        key_map = {self.make_and_validate_key(key, version=version): key for key in keys}
+        found = self._get_many(list(key_map))
+        return {key_map[key]: value for key, value in found.items()}
+
+    def _get_many(self, keys):
+        if not keys:
+            return {}
+        conn = self._connection()
+        now = time.time()
+        placeholders = ', '.join('?' * len(keys))
+        rows = conn.execute(
+            f"SELECT key, value, expires, accessed FROM cache_entry WHERE key IN ({placeholders})",
+            keys
+        ).fetchall()
+
+        found = {}
+        stale = []
+        for key, data, expires, accessed in rows:
+            if not self._is_live(expires, now):
+                continue
+            found[key] = pickle.loads(data)
+            if now - accessed >= self.access_resolution:
+                stale.append(key)
+
+        if stale:
+            # Plain UPDATE in autocommit: a lost race only makes LRU slightly less exact
+            conn.executemany(
+                "UPDATE cache_entry SET accessed = ? WHERE key = ?", [(now, key) for key in stale]
+            )
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        with self._write() as conn:
+            self._store(conn, key, value, timeout, now)
+            self._cull(conn, now)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        now = time.time()
+        with self._write() as conn:
+            for key, value in data.items():
+                key = self.make_and_validate_key(key, version=version)
+                self._store(conn, key, value, timeout, now)
+            self._cull(conn, now)
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        with self._write() as conn:
+            row = conn.execute("SELECT expires FROM cache_entry WHERE key = ?", (key,)).fetchone()
+            if row is not None and self._is_live(row[0], now):
+                return False
+            self._store(conn, key, value, timeout, now)
+            self._cull(conn, now)
+        return True
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        with self._write() as conn:
+            cursor = conn.execute(
+                "UPDATE cache_entry SET expires = ?, accessed = ? "
+                "WHERE key = ? AND (expires IS NULL OR expires > ?)",
+                (self.get_backend_timeout(timeout), now, key, now)
+            )
+            return cursor.rowcount > 0
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        with self._write() as conn:
+            row = conn.execute(
+                "SELECT value, expires, size FROM cache_entry WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or not self._is_live(row[1], now):
+                raise ValueError("Key '%s' not found" % key)
+            new_value = pickle.loads(row[0]) + delta
+            data = pickle.dumps(new_value, pickle.HIGHEST_PROTOCOL)
+            old_size = row[2]
+            # Keep the existing expiry, unlike set()
+            conn.execute(
+                "UPDATE cache_entry SET value = ?, accessed = ?, size = ? WHERE key = ?",
+                (data, now, len(data), key)
+            )
+            conn.execute("UPDATE cache_stats SET size = size + ?", (len(data) - old_size,))
+        return new_value
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._connection().execute(
+            "SELECT expires FROM cache_entry WHERE key = ?", (key,)
+        ).fetchone()
+        return row is not None and self._is_live(row[0], time.time())
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self._write() as conn:
+            return self._remove(conn, [key]) > 0
+
+    def delete_many(self, keys, version=None):
+        keys = [self.make_and_validate_key(key, version=version) for key in keys]
+        with self._write() as conn:
+            self._remove(conn, keys)
+
+    def clear(self):
+        with self._write() as conn:
+            conn.execute("DELETE FROM cache_entry")
+            conn.execute("UPDATE cache_stats SET entries = 0, size = 0")
+
+    def close(self, **kwargs):
+        # Connections are per thread and reused across requests
+        pass
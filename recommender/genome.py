@@ -0,0 +1,153 @@
+"""
+Tag genome relevance store
+
+genome-scores.csv gives a relevance in [0, 1] for every (movie, genome tag)
+pair, about 11M rows for ML-20M. Instead of ORM rows they are kept as one
+dense float16 matrix (movies x tags, ~25 MB) in .npy files that every process
+memory-maps, plus the top tags of each movie and the top movies of each tag
+precomputed at build time, so the queries below are array slices:
+
+    store = get_genome_store()
+    store.top_tags(movie_id, n=10)    # [(tag_id, relevance), ...]
+    store.top_movies(tag_id, n=10)    # [(movie_id, relevance), ...]
+
+Ids are Movie / Tag pks. A build writes a new version directory under
+settings.GENOME_DIR and then switches the CURRENT file to it, so readers
+never see half-written files; processes pick the new version up on their
+next get_genome_store().
+"""
+import os
+import threading
+
+import numpy as np
+from django.conf import settings
+
+from .versioned_store import current_stamp, current_version, new_version, publish_version
+
+# Entries precomputed per movie / per tag; larger queries fall back to a sort
+TOP_TAGS = 50
+TOP_MOVIES = 500
+
+
+def genome_dir():
+    return str(getattr(settings, 'GENOME_DIR', os.path.join(settings.BASE_DIR, 'genome')))
+
+
+def _top_indexes(matrix, k, axis):
+    """Indexes of the k largest values along `axis`, largest first"""
+    k = min(k, matrix.shape[axis])
+    if k == 0:
+        shape = (matrix.shape[1 - axis], 0)
+        return np.empty(shape, dtype=np.int32)
+    values = matrix if axis == 1 else matrix.T
+    top = np.argpartition(-values, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(values, top, axis=1), axis=1, kind='stable')
+    return np.take_along_axis(top, order, axis=1).astype(np.int32)
+
+
+class GenomeStore:
+    def __init__(self, directory):
+        def load(name):
+            return np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r')
+
+        self.directory = directory
+        self.movies = load('movies')          # Movie pks of the rows, ascending
+        self.tags = load('tags')              # Tag pks of the columns
+        self.relevance = load('relevance')    # float16 [movies x tags]
+        self.movie_top = load('movie_top')    # [movies x TOP_TAGS] column indexes
+        self.tag_top = load('tag_top')        # [tags x TOP_MOVIES] row indexes
+        self._tag_columns = {tag_id: column for column, tag_id in enumerate(self.tags.tolist())}
+
+    def _row(self, movie_id):
+        row = int(np.searchsorted(self.movies, movie_id))
+        if row < len(self.movies) and self.movies[row] == movie_id:
+            return row
+        return None
+
+    def has_movie(self, movie_id):
+        return self._row(movie_id) is not None
+
+    def relevance_of(self, movie_id, tag_id):
+        """Relevance of one tag to one movie, or None if either isn't in the genome"""
+        row, column = self._row(movie_id), self._tag_columns.get(tag_id)
+        if row is None or column is None:
+            return None
+        return float(self.relevance[row, column])
+
+    def top_tags(self, movie_id, n=10):
+        """The `n` most relevant genome tags of a movie as (tag_id, relevance)"""
+        row = self._row(movie_id)
+        if row is None:
+            return []
+        if n <= self.movie_top.shape[1]:
+            columns = self.movie_top[row, :n]
+        else:
+            columns = np.argsort(-self.relevance[row], kind='stable')[:n]
+        return list(zip(self.tags[columns].tolist(), self.relevance[row, columns].astype(float).tolist()))
+
+    def top_movies(self, tag_id, n=10):
+        """The `n` movies a genome tag is most relevant to, as (movie_id, relevance)"""
+        column = self._tag_columns.get(tag_id)
+        if column is None:
+            return []
+        if n <= self.tag_top.shape[1]:
+            rows = self.tag_top[column, :n]
+        else:
+            rows = np.argsort(-self.relevance[:, column], kind='stable')[:n]
+        return list(zip(self.movies[rows].tolist(), self.relevance[rows, column].astype(float).tolist()))
+
+
+def write_genome_store(movie_ids, tag_ids, relevance, directory=None):
+    """
+    Write a new store version and make it current
+
+    Args:
+        movie_ids: Movie pks of the matrix rows
+        tag_ids: Tag pks of the matrix columns
+        relevance: [len(movie_ids) x len(tag_ids)] relevance scores
+        directory: Store location (default settings.GENOME_DIR)
+
+    Returns:
+        Path of the new version directory
+    """
+    directory = directory or genome_dir()
+    movie_ids = np.asarray(movie_ids, dtype=np.int64)
+    order = np.argsort(movie_ids, kind='stable')
+    relevance = np.asarray(relevance, dtype=np.float16)[order]
+
+    version = new_version(directory)
+    arrays = {
+        'movies': movie_ids[order],
+        'tags': np.asarray(tag_ids, dtype=np.int64),
+        'relevance': relevance,
+        'movie_top': _top_indexes(relevance, TOP_TAGS, axis=1),
+        'tag_top': _top_indexes(relevance, TOP_MOVIES, axis=0),
+    }
+    for name, array in arrays.items():
+        np.save(os.path.join(version, f'{name}.npy'), array)
+    publish_version(directory, version)
+    return version
+
+
+_store = None
+_store_stamp = None
+_store_lock = threading.Lock()
+
+
+def get_genome_store():
+    """Process-wide store of the current version, or None if none was built"""
+    global _store, _store_stamp
+    stamp = current_stamp(genome_dir())
+    if stamp is None:
+        return None
+    if stamp != _store_stamp:
+        with _store_lock:
+            if stamp != _store_stamp:
+                _store = GenomeStore(current_version(genome_dir()))
+                _store_stamp = stamp
+    return _store
+
+
+def reset_genome_store():
+    global _store, _store_stamp
+    _store = _store_stamp = None
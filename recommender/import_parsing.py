@@ -0,0 +1,196 @@
+"""
+Chunked, multi-process parsing of the MovieLens CSV files
+
+A file is cut into byte ranges that end on line breaks. Worker processes each
+read one range with pandas' C parser and transform it with vectorized
+pandas/NumPy operations (year extraction, genre splitting, epoch -> datetime).
+The caller, the single DB writer, receives the parsed chunks in file order.
+At most `window` chunks are in flight, so memory stays bounded by
+window x chunk size whatever the file size.
+
+MovieLens files never have line breaks inside quoted fields, which is what
+makes splitting on byte offsets safe. This module doesn't use the ORM, so the
+parse functions also work under the spawn/forkserver start methods.
+"""
+import csv
+import io
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+CHUNK_BYTES = 8 * 1024 * 1024
+# "Toy Story (1995)" -> 1995; titles without a trailing (year) get 0
+YEAR_RE = r'\((\d{4})\)[)\s]*$'
+
+
+def default_workers():
+    """Parser processes to use, leaving one core to the DB writer"""
+    return max(1, min(4, (os.cpu_count() or 1) - 1))
+
+
+def chunk_ranges(path, chunk_bytes=CHUNK_BYTES, start=None):
+    """
+    Split `path` into byte ranges ending on line breaks
+
+    Args:
+        start: Offset to begin at (a line start, e.g. a previous chunk end);
+            default: just after the header
+
+    Returns:
+        (column names from the header line, list of (start, end) offsets)
+    """
+    with open(path, 'rb') as f:
+        header = f.readline()
+        size = os.fstat(f.fileno()).st_size
+        ranges = []
+        start = max(start or 0, f.tell())
+        while start < size:
+            f.seek(min(start + chunk_bytes, size))
+            f.readline()
+            end = min(f.tell(), size)
+            ranges.append((start, end))
+            start = end
+    columns = next(csv.reader([header.decode('utf-8-sig').strip()]))
+    return columns, ranges
+
+
+def _parse_range(path, start, end, columns, dtype, parse):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    frame = pd.read_csv(io.BytesIO(data), header=None, names=columns, dtype=dtype, keep_default_na=False)
+    return parse(frame)
+
+
+def iter_parsed_chunks(path, parse, dtype=None, workers=None, window=None, chunk_bytes=CHUNK_BYTES,
+                       start=None):
+    """
+    Parse `path` chunk by chunk, in parallel, yielding results in file order
+
+    Args:
+        parse: Module-level function DataFrame -> result, run in the workers
+        dtype: dtype mapping passed to pandas.read_csv
+        workers: Parser processes (default: default_workers()); 1 parses inline
+        window: Chunks submitted ahead of the consumer (default: 2 x workers)
+        start: Byte offset to resume from (see chunk_ranges)
+
+    Yields:
+        (byte offset where the chunk ends, parse(chunk))
+    """
+    columns, ranges = chunk_ranges(path, chunk_bytes, start)
+    workers = default_workers() if workers is None else workers
+    if workers <= 1:
+        for start, end in ranges:
+            yield end, _parse_range(path, start, end, columns, dtype, parse)
+        return
+
+    window = window or 2 * workers
+    pending = deque()
+    with ProcessPoolExecutor(workers) as pool:
+        try:
+            for start, end in ranges:
+                pending.append((end, pool.submit(_parse_range, path, start, end, columns, dtype, parse)))
+                if len(pending) >= window:
+                    end, future = pending.popleft()
+                    yield end, future.result()
+            while pending:
+                end, future = pending.popleft()
+                yield end, future.result()
+        finally:
+            # The consumer may stop early (e.g. a row limit)
+            for _, future in pending:
+                future.cancel()
+
+
+# Parse functions --------------------------------------------------------------
+
+MOVIES_DTYPE = {'movieId': np.int64, 'title': str, 'genres': str}
+RATINGS_DTYPE = {'userId': np.int64, 'movieId': np.int64, 'rating': np.float64, 'timestamp': np.int64}
+LINKS_DTYPE = {'movieId': np.int64, 'imdbId': str, 'tmdbId': str}
+TAGS_DTYPE = {'userId': np.int64, 'movieId': np.int64, 'tag': str, 'timestamp': np.int64}
+
+
+def _epoch_to_datetimes(seconds):
+    """Unix seconds -> array of UTC-aware datetime objects"""
+    return pd.to_datetime(np.asarray(seconds), unit='s', utc=True).to_pydatetime()
+
+
+def parse_movies(frame):
+    """
+    movies.csv chunk -> list of (movieId, title, release_year, genre, genre names)
+
+    `genre` is the raw pipe string as stored on Movie.genre ('Unknown' when
+    empty, cut to 100 characters).
+    """
+    titles = frame['title']
+    years = pd.to_numeric(titles.str.extract(YEAR_RE, expand=False), errors='coerce').fillna(0)
+    genres = frame['genres']
+    return list(zip(
+        frame['movieId'].tolist(),
+        titles.tolist(),
+        years.astype(np.int64).tolist(),
+        genres.where(genres != '', 'Unknown').str.slice(0, 100).tolist(),
+        genres.str.split('|').tolist(),
+    ))
+
+
+def parse_ratings(frame, since=None):
+    """
+    ratings.csv chunk -> list of (userId, movieId, rating, timestamp datetime)
+
+    Args:
+        since: Only keep ratings with a timestamp after this (unix seconds);
+            bind it with functools.partial to use it in the workers
+    """
+    if since:
+        frame = frame[frame['timestamp'] > since]
+    return list(zip(
+        frame['userId'].tolist(),
+        frame['movieId'].tolist(),
+        frame['rating'].tolist(),
+        _epoch_to_datetimes(frame['timestamp']),
+    ))
+
+
+def parse_rating_arrays(frame):
+    """ratings.csv chunk -> (userId, movieId, rating, unix timestamp) NumPy arrays, for profiling"""
+    return (
+        frame['userId'].to_numpy(),
+        frame['movieId'].to_numpy(),
+        frame['rating'].to_numpy(),
+        frame['timestamp'].to_numpy(),
+    )
+
+
+def parse_links(frame):
+    """links.csv chunk -> dict movieId -> tmdbId (rows without a tmdbId are dropped)"""
+    tmdb_ids = pd.to_numeric(frame['tmdbId'], errors='coerce')
+    known = tmdb_ids.notna()
+    return dict(zip(frame['movieId'][known].tolist(), tmdb_ids[known].astype(np.int64).tolist()))
+
+
+def parse_tags(frame):
+    """tags.csv chunk -> list of (userId, movieId, tag, timestamp datetime), blank tags dropped"""
+    tags = frame['tag'].str.strip()
+    keep = tags != ''
+    return list(zip(
+        frame['userId'][keep].tolist(),
+        frame['movieId'][keep].tolist(),
+        tags[keep].tolist(),
+        _epoch_to_datetimes(frame['timestamp'][keep]),
+    ))
+
+
+GENOME_SCORES_DTYPE = {'movieId': np.int64, 'tagId': np.int64, 'relevance': np.float32}
+
+
+def parse_genome_scores(frame):
+    """genome-scores.csv chunk -> (movieId array, tagId array, relevance array)"""
+    return (
+        frame['movieId'].to_numpy(),
+        frame['tagId'].to_numpy(),
+        frame['relevance'].to_numpy(),
+    )
@@ -0,0 +1,625 @@
+"""
+Shared bulk helpers for the CSV import scripts (import_csv_data.py and
+import_csv_data_fast.py)
+
+CSV files are parsed in chunks by worker processes (import_parsing) and this
+process is the single DB writer. Ratings are imported as a streaming
+pipeline, so memory stays flat whatever the size of ratings.csv:
+
+    iter_parsed_chunks -> _known_movie_ratings -> batched -> write_rating_batch
+
+Each batch is written in its own transaction and ImportProgress reports
+rows/s and the share of the file read so far.
+"""
+import csv
+import hashlib
+import os
+import time
+from functools import partial
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, F, Max
+
+import numpy as np
+import pandas as pd
+
+from .genome import write_genome_store
+from .import_parsing import (
+    CHUNK_BYTES, GENOME_SCORES_DTYPE, LINKS_DTYPE, MOVIES_DTYPE, RATINGS_DTYPE, TAGS_DTYPE,
+    iter_parsed_chunks, parse_genome_scores, parse_links, parse_movies, parse_ratings, parse_tags,
+)
+from .models import Genre, ImportCheckpoint, Movie, Rating, Tag, TagApplication, split_genres
+from .signals import ratings_changed
+from .versions import CATALOG, bump_version
+
+
+def link_movie_genres(genres_by_movie, batch_size=1000, field='tmdb_id'):
+    """
+    Create missing Genre rows and movie-genre links in bulk
+
+    Args:
+        genres_by_movie: dict mapping a Movie key (see `field`) to a
+            pipe-delimited genre string or an already split list of names
+        batch_size: Number of link rows per INSERT
+        field: Movie field the keys refer to ('tmdb_id' or 'movielens_id')
+
+    Returns:
+        Number of movie-genre links created
+    """
+    names_by_key = {
+        key: split_genres(genres)
+        for key, genres in genres_by_movie.items()
+    }
+    all_names = sorted({name for names in names_by_key.values() for name in names})
+
+    Genre.objects.bulk_create([Genre(name=name) for name in all_names], ignore_conflicts=True)
+    genre_ids = dict(Genre.objects.filter(name__in=all_names).values_list('name', 'id'))
+    movie_ids = dict(
+        Movie.objects.filter(**{f'{field}__in': names_by_key.keys()}).values_list(field, 'id')
+    )
+
+    MovieGenre = Movie.genres.through
+    links = [
+        MovieGenre(movie_id=movie_ids[key], genre_id=genre_ids[name])
+        for key, names in names_by_key.items()
+        if key in movie_ids
+        for name in names
+    ]
+    MovieGenre.objects.bulk_create(links, batch_size=batch_size, ignore_conflicts=True)
+    Genre.invalidate_cached_names()
+    bump_version(CATALOG)
+
+    return len(links)
+
+
+def import_username(movielens_user_id):
+    return f'user_{movielens_user_id}'
+
+
+def resolve_import_users(movielens_user_ids, batch_size=5000):
+    """
+    Map MovieLens userIds to auth User pks, creating missing users in bulk
+
+    Imported users get an unusable password, so they can't log in until a
+    password is set for them.
+
+    Args:
+        movielens_user_ids: Iterable of MovieLens userIds (duplicates allowed)
+        batch_size: Users per INSERT / lookup query
+
+    Returns:
+        dict mapping each MovieLens userId to its User pk
+    """
+    usernames = {import_username(user_id): user_id for user_id in set(movielens_user_ids)}
+    names = sorted(usernames)
+
+    def lookup(batch):
+        return User.objects.filter(username__in=batch).values_list('username', 'id')
+
+    user_pks = {}
+    for i in range(0, len(names), batch_size):
+        user_pks.update(lookup(names[i:i + batch_size]))
+
+    missing = [name for name in names if name not in user_pks]
+    for i in range(0, len(missing), batch_size):
+        batch = missing[i:i + batch_size]
+        User.objects.bulk_create([
+            User(username=name, email=f'{name}@example.com', password=make_password(None))
+            for name in batch
+        ], ignore_conflicts=True)
+        # ignore_conflicts leaves pks unset, so read them back
+        user_pks.update(lookup(batch))
+
+    return {usernames[name]: pk for name, pk in user_pks.items()}
+
+
+RATING_BATCH_SIZE = 5000
+
+
+class ImportProgress:
+    """Periodic rows/s and percentage report for a long-running import"""
+
+    def __init__(self, label, total_size=None, interval=2.0, out=print):
+        self.label = label
+        self.total_size = total_size
+        self.interval = interval
+        self.out = out
+        self.rows = 0
+        self.position = 0
+        self.started = self.last_report = time.monotonic()
+
+    def update(self, rows, position=None):
+        self.rows += rows
+        if position is not None:
+            self.position = position
+        now = time.monotonic()
+        if now - self.last_report >= self.interval:
+            self.last_report = now
+            self.report(now)
+
+    def report(self, now=None):
+        elapsed = max((now or time.monotonic()) - self.started, 1e-9)
+        message = f"{self.label}: {self.rows:,} rows"
+        if self.total_size:
+            message += f" ({min(self.position / self.total_size, 1):.1%} of file)"
+        self.out(f"{message}, {self.rows / elapsed:,.0f} rows/s")
+
+    def finish(self):
+        self.report()
+
+
+def batched(iterable, size):
+    """Yield lists of up to `size` items"""
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _known_movie_ratings(rows, movie_pks):
+    """Map the movieIds of parsed ratings to Movie pks, dropping unknown movies"""
+    ratings = []
+    for user_id, movie_id, rating, timestamp in rows:
+        movie_pk = movie_pks.get(movie_id)
+        if movie_pk:
+            ratings.append((user_id, movie_pk, rating, timestamp))
+    return ratings
+
+
+def write_rating_batch(batch, user_pks, bulk=None):
+    """
+    Upsert one batch of parsed ratings in its own transaction
+
+    Existing (user, movie) ratings take the new value and timestamp, so
+    re-applying a batch after a crash is harmless.
+
+    Args:
+        batch: List of (userId, movie pk, rating, timestamp) tuples
+        user_pks: MovieLens userId -> User pk, extended in place with the
+            users this batch introduces
+        bulk: Active bulk_load.BulkLoad; rows are then appended without the
+            (dropped) unique index and duplicates resolved when it's rebuilt
+    """
+    with transaction.atomic():
+        new_users = {user_id for user_id, _, _, _ in batch if user_id not in user_pks}
+        if new_users:
+            user_pks.update(resolve_import_users(new_users))
+        if bulk is not None and bulk.active:
+            bulk.insert(Rating, RATING_FIELDS, [
+                (user_pks[user_id], movie_pk, rating, timestamp)
+                for user_id, movie_pk, rating, timestamp in batch
+            ])
+            return
+        Rating.objects.bulk_create(
+            [
+                Rating(user_id=user_pks[user_id], movie_id=movie_pk, rating=rating, timestamp=timestamp)
+                for user_id, movie_pk, rating, timestamp in batch
+            ],
+            update_conflicts=True,
+            unique_fields=['user', 'movie'],
+            update_fields=['rating', 'timestamp'],
+        )
+
+
+RATING_FIELDS = ['user_id', 'movie_id', 'rating', 'timestamp']
+FINGERPRINT_BYTES = 64 * 1024
+
+
+def file_fingerprint(path, offset):
+    """sha1 of the first bytes of `path` and of the bytes just before `offset`"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        digest.update(f.read(min(FINGERPRINT_BYTES, offset)))
+        f.seek(max(0, offset - FINGERPRINT_BYTES))
+        digest.update(f.read(offset - f.tell()))
+    return digest.hexdigest()
+
+
+def sources_fingerprint(paths):
+    """
+    Identity of a whole-file import: the files (size and file_fingerprint)
+    and the MovieLens ids in the catalog, since rows of movies that weren't
+    in the catalog are skipped
+    """
+    digest = hashlib.sha1()
+    for path in paths:
+        size = os.path.getsize(path)
+        digest.update(f'{path}:{size}:{file_fingerprint(path, size)};'.encode())
+    catalog = Movie.objects.filter(movielens_id__isnull=False).aggregate(count=Count('id'), last=Max('movielens_id'))
+    digest.update(f"catalog:{catalog['count']}:{catalog['last']}".encode())
+    return digest.hexdigest()
+
+
+def unchanged_since_import(checkpoint, paths):
+    """Whether the last completed import under ImportCheckpoint `checkpoint` read these same `paths`"""
+    state = ImportCheckpoint.objects.filter(name=checkpoint, completed=True).first()
+    return state is not None and state.fingerprint == sources_fingerprint(paths)
+
+
+def record_import(checkpoint, paths, rows=0):
+    """Mark `paths` as imported under ImportCheckpoint `checkpoint` (see unchanged_since_import)"""
+    ImportCheckpoint.objects.update_or_create(name=checkpoint, defaults={
+        'fingerprint': sources_fingerprint(paths), 'rows': rows, 'completed': True,
+    })
+
+
+def _start_run(state, path):
+    """
+    Decide where an import of `path` starts, updating `state` for the new run
+
+    - interrupted run on the same file: resume at the checkpointed offset
+    - completed run, file unchanged or appended to: read only the new bytes
+    - anything else (new or replaced file): read it all, skipping ratings
+      not newer than the last run's high water mark
+    """
+    size = os.path.getsize(path)
+    same_file = (
+        bool(state.fingerprint)
+        and state.offset <= size
+        and file_fingerprint(path, state.offset) == state.fingerprint
+    )
+    if same_file and not state.completed:
+        return
+    if same_file:
+        state.since = 0
+    else:
+        state.offset = 0
+        state.since = state.high_water
+    state.rows = 0
+    state.completed = False
+    state.fingerprint = file_fingerprint(path, state.offset)
+    state.save()
+
+
+def import_ratings_csv(path, batch_size=RATING_BATCH_SIZE, limit=None, workers=None, checkpoint=None,
+                       chunk_bytes=CHUNK_BYTES, bulk=None, out=print):
+    """
+    Stream ratings.csv into the Rating table
+
+    Parsing runs in worker processes (see import_parsing); this process only
+    maps ids and upserts. Only the movie and user id maps and a bounded
+    window of parsed chunks are held in memory.
+
+    With `checkpoint`, progress is kept in the ImportCheckpoint of that name
+    after every chunk, so an interrupted import resumes where it stopped and
+    a later run only applies appended or newer ratings (see _start_run).
+    Those runs also send ratings_changed for every user they touch.
+
+    bulk_create bypasses the Rating signals, so the aggregates of the movies
+    that got ratings are rebuilt once at the end (in bulk-load mode, at the
+    end of the sqlite_bulk_load() block).
+
+    Args:
+        path: ratings.csv in MovieLens format (userId,movieId,rating,timestamp)
+        batch_size: Rows per INSERT / transaction (in bulk-load mode sized
+            from SQLite's variable limit instead)
+        limit: Stop after this many ratings of known movies (None = whole
+            file); not combinable with `checkpoint`
+        workers: Parser processes (None = import_parsing.default_workers())
+        checkpoint: ImportCheckpoint name, e.g. 'ratings'
+        chunk_bytes: Size of the parsed chunks, which are also the
+            checkpoint granularity
+        bulk: bulk_load.BulkLoad of a sqlite_bulk_load() block covering Rating
+        out: Callable receiving progress lines
+
+    Returns:
+        Number of ratings written in this run
+    """
+    if checkpoint and limit is not None:
+        raise ValueError("A checkpointed import can't stop at a row limit")
+
+    if bulk is not None and bulk.active:
+        batch_size = bulk.rows_per_insert(len(RATING_FIELDS))
+
+    state = None
+    parse = parse_ratings
+    if checkpoint:
+        state, _ = ImportCheckpoint.objects.get_or_create(name=checkpoint)
+        _start_run(state, path)
+        parse = partial(parse_ratings, since=state.since)
+        out(f"ratings: starting at byte {state.offset:,}" + (f", after {state.since}" if state.since else ""))
+
+    # Movie pk by CSV movieId, without loading Movie instances
+    movie_pks = dict(Movie.objects.filter(movielens_id__isnull=False).values_list('movielens_id', 'id'))
+    user_pks = {}
+    touched_movies = set()
+
+    progress = ImportProgress('ratings', total_size=os.path.getsize(path), out=out)
+    chunks = iter_parsed_chunks(
+        path, parse, dtype=RATINGS_DTYPE, workers=workers, chunk_bytes=chunk_bytes,
+        start=state.offset if state else None
+    )
+    for end, rows in chunks:
+        ratings = _known_movie_ratings(rows, movie_pks)
+        if limit is not None:
+            ratings = ratings[:limit - progress.rows]
+        progress.position = end
+        for batch in batched(ratings, batch_size):
+            write_rating_batch(batch, user_pks, bulk)
+            touched_movies.update(movie_pk for _, movie_pk, _, _ in batch)
+            if state:
+                for user_id in {user_id for user_id, _, _, _ in batch}:
+                    ratings_changed.send(sender=Rating, user_id=user_pks[user_id])
+            progress.update(len(batch))
+        if state:
+            state.offset = end
+            state.fingerprint = file_fingerprint(path, end)
+            state.rows += len(ratings)
+            if rows:
+                state.high_water = max(state.high_water, int(max(row[3] for row in rows).timestamp()))
+            state.save()
+        if limit is not None and progress.rows >= limit:
+            break
+    chunks.close()
+    progress.finish()
+
+    if state:
+        state.completed = True
+        state.save()
+        movies = Movie.objects.filter(pk__in=touched_movies) if touched_movies else None
+    else:
+        movies = Movie.objects.all()
+    if movies is not None:
+        if bulk is not None and bulk.active:
+            # Repeated (user, movie) rows are only dropped when the indexes are rebuilt
+            bulk.on_finish(movies.refresh_rating_aggregates)
+        else:
+            movies.refresh_rating_aggregates()
+    return progress.rows
+
+
+def read_movies_csv(path, limit=None, workers=None):
+    """
+    Parse movies.csv into unsaved Movie instances
+
+    Returns:
+        (list of Movie, dict mapping MovieLens movieId to its genre names) -
+        pass the second value to link_movie_genres(..., field='movielens_id')
+    """
+    movies = []
+    genres_by_movielens_id = {}
+    chunks = iter_parsed_chunks(path, parse_movies, dtype=MOVIES_DTYPE, workers=workers)
+    rows = (row for _, chunk in chunks for row in chunk)
+    for movie_id, title, release_year, genre, genre_names in islice(rows, limit):
+        movies.append(Movie(
+            title=title,
+            genre=genre,
+            director='Unknown',  # CSV doesn't have director info
+            release_year=release_year,
+            overview='No overview available',
+            poster_url=None,
+            # Negative placeholder until apply_movie_links sets the TMDb id; it
+            # can't collide with a real one, so movies without a link keep it
+            tmdb_id=-movie_id,
+            movielens_id=movie_id
+        ))
+        genres_by_movielens_id[movie_id] = genre_names
+    chunks.close()
+    return movies, genres_by_movielens_id
+
+
+def read_links_csv(path, workers=None):
+    """links.csv as a dict mapping MovieLens movieId to TMDb id"""
+    links = {}
+    for _, chunk in iter_parsed_chunks(path, parse_links, dtype=LINKS_DTYPE, workers=workers):
+        links.update(chunk)
+    return links
+
+
+# bulk_update's CASE WHEN is scanned linearly per row on SQLite, so its cost
+# grows with the square of the batch size
+LINK_BATCH_SIZE = 250
+
+
+def _resolve_link_conflicts(current, targets):
+    """
+    Decide which movies can take their new tmdb_id without breaking uniqueness
+
+    Args:
+        current: dict Movie pk -> current tmdb_id, for every movie
+        targets: dict Movie pk -> wanted tmdb_id, for movies with a link
+
+    Returns:
+        (dict pk -> tmdb_id of the moves to apply, list of (pk, wanted, holder pk))
+    """
+    moving = {pk: tmdb_id for pk, tmdb_id in targets.items() if current[pk] != tmdb_id}
+    conflicts = []
+    while True:
+        # Movies that don't move keep their id, so it is not free for anyone else
+        holders = {tmdb_id: pk for pk, tmdb_id in current.items() if pk not in moving}
+        blocked = []
+        for pk in sorted(moving):
+            wanted = moving[pk]
+            holder = holders.get(wanted)
+            if holder is not None:
+                blocked.append((pk, wanted, holder))
+            else:
+                holders[wanted] = pk
+        if not blocked:
+            return moving, conflicts
+        # A blocked movie keeps its old id, which may block others: go again
+        for pk, wanted, holder in blocked:
+            del moving[pk]
+        conflicts.extend(blocked)
+
+
+def apply_movie_links(links, batch_size=LINK_BATCH_SIZE, conflicts_path=None):
+    """
+    Set Movie.tmdb_id from links.csv with bulk updates
+
+    Conflicts (two movies wanting the same TMDb id, or an id still held by a
+    movie that keeps it) are found in memory against the whole mapping; the
+    losing movie keeps its current tmdb_id. Because ids can swap or chain
+    (A takes B's id while B moves on), the update runs in two phases inside
+    one transaction: moving movies first get a temporary id below every
+    existing one, then their final one, so the unique constraint never sees
+    a duplicate.
+
+    Args:
+        links: dict MovieLens movieId -> TMDb id (see read_links_csv)
+        batch_size: Rows per bulk_update query
+        conflicts_path: Write a CSV summary of the conflicts here (if any)
+
+    Returns:
+        (number of movies updated, number of conflicts)
+    """
+    rows = list(Movie.objects.values_list('id', 'movielens_id', 'tmdb_id', 'title'))
+    current = {pk: tmdb_id for pk, _, tmdb_id, _ in rows}
+    targets = {
+        pk: links[movielens_id]
+        for pk, movielens_id, _, _ in rows
+        if movielens_id is not None and movielens_id in links
+    }
+    moves, conflicts = _resolve_link_conflicts(current, targets)
+
+    if moves:
+        with transaction.atomic():
+            # Placeholders are negative too, so go below the lowest id in use
+            floor = min(0, min(current.values()))
+            pks = list(moves)
+            for i in range(0, len(pks), batch_size):
+                Movie.objects.filter(pk__in=pks[i:i + batch_size]).update(tmdb_id=floor - F('pk'))
+            final = [Movie(pk=pk, tmdb_id=tmdb_id) for pk, tmdb_id in moves.items()]
+            Movie.objects.bulk_update(final, ['tmdb_id'], batch_size=batch_size)
+        bump_version(CATALOG)
+
+    if conflicts and conflicts_path:
+        info = {pk: (movielens_id, title) for pk, movielens_id, _, title in rows}
+        with open(conflicts_path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['movieId', 'title', 'kept_tmdb_id', 'wanted_tmdb_id', 'held_by_movieId', 'held_by_title'])
+            for pk, wanted, holder in conflicts:
+                movielens_id, title = info[pk]
+                writer.writerow([movielens_id, title, current[pk], wanted, *info[holder]])
+
+    return len(moves), len(conflicts)
+
+
+def _tag_pks(names, tag_pks):
+    """Extend `tag_pks` (name -> Tag pk) with `names`, creating missing tags in bulk"""
+    missing = sorted({name for name in names if name not in tag_pks})
+    if missing:
+        Tag.objects.bulk_create([Tag(name=name) for name in missing], ignore_conflicts=True)
+        tag_pks.update(Tag.objects.filter(name__in=missing).values_list('name', 'id'))
+    return tag_pks
+
+
+def import_tags_csv(path, batch_size=RATING_BATCH_SIZE, workers=None, bulk=None, out=print):
+    """
+    Import tags.csv into Tag / TagApplication
+
+    Tag names are cut to Tag.name's 255 characters. Applications of movies
+    that aren't in the catalog are skipped; repeated ones are ignored.
+    With `bulk` (a sqlite_bulk_load() block covering TagApplication) rows are
+    appended with raw INSERTs and repeats dropped when the indexes are rebuilt.
+
+    Returns:
+        Number of tag applications written
+    """
+    max_length = Tag._meta.get_field('name').max_length
+    movie_pks = dict(Movie.objects.filter(movielens_id__isnull=False).values_list('movielens_id', 'id'))
+    user_pks = {}
+    tag_pks = {}
+    if bulk is not None and bulk.active:
+        batch_size = bulk.rows_per_insert(4)
+
+    progress = ImportProgress('tags', total_size=os.path.getsize(path), out=out)
+    for end, rows in iter_parsed_chunks(path, parse_tags, dtype=TAGS_DTYPE, workers=workers):
+        progress.position = end
+        rows = [
+            (user_id, movie_pks[movie_id], tag[:max_length], timestamp)
+            for user_id, movie_id, tag, timestamp in rows
+            if movie_id in movie_pks
+        ]
+        for batch in batched(rows, batch_size):
+            with transaction.atomic():
+                new_users = {user_id for user_id, _, _, _ in batch if user_id not in user_pks}
+                if new_users:
+                    user_pks.update(resolve_import_users(new_users))
+                _tag_pks((tag for _, _, tag, _ in batch), tag_pks)
+                if bulk is not None and bulk.active:
+                    bulk.insert(TagApplication, ['user_id', 'movie_id', 'tag_id', 'timestamp'], [
+                        (user_pks[user_id], movie_pk, tag_pks[tag], timestamp)
+                        for user_id, movie_pk, tag, timestamp in batch
+                    ])
+                else:
+                    TagApplication.objects.bulk_create([
+                        TagApplication(
+                            user_id=user_pks[user_id], movie_id=movie_pk, tag_id=tag_pks[tag], timestamp=timestamp
+                        )
+                        for user_id, movie_pk, tag, timestamp in batch
+                    ], ignore_conflicts=True)
+            progress.update(len(batch))
+    progress.finish()
+    return progress.rows
+
+
+def import_genome_tags(path):
+    """
+    Create/flag the Tag rows of genome-tags.csv (tagId,tag)
+
+    Returns:
+        dict genome tagId -> Tag pk
+    """
+    frame = pd.read_csv(path, dtype={'tagId': np.int64, 'tag': str}, keep_default_na=False)
+    Tag.objects.bulk_create(
+        [Tag(name=name, genome_id=tag_id) for tag_id, name in zip(frame['tagId'].tolist(), frame['tag'].tolist())],
+        update_conflicts=True,
+        unique_fields=['name'],
+        update_fields=['genome_id'],
+    )
+    return dict(Tag.objects.filter(genome_id__isnull=False).values_list('genome_id', 'id'))
+
+
+def _lookup_table(mapping):
+    """Array `table` with table[key] = mapping[key] and -1 for other keys (non-negative int keys)"""
+    table = np.full(max(mapping, default=-1) + 1, -1, dtype=np.int64)
+    if mapping:
+        table[np.fromiter(mapping.keys(), dtype=np.int64)] = np.fromiter(mapping.values(), dtype=np.int64)
+    return table
+
+
+def _lookup(table, keys):
+    """table[keys] with -1 for keys outside the table"""
+    inside = (keys >= 0) & (keys < len(table))
+    result = np.full(len(keys), -1, dtype=np.int64)
+    result[inside] = table[keys[inside]]
+    return result
+
+
+def import_genome(tags_path, scores_path, workers=None, out=print):
+    """
+    Load the tag genome into the array-backed store (see recommender.genome)
+
+    genome-scores.csv is streamed in parsed chunks straight into a float16
+    matrix; only movies in the catalog are kept.
+
+    Returns:
+        (number of movies, number of genome tags) in the store
+    """
+    genome_tag_pks = import_genome_tags(tags_path)
+    genome_ids = sorted(genome_tag_pks)
+    tag_columns = _lookup_table({genome_id: column for column, genome_id in enumerate(genome_ids)})
+
+    catalog = sorted(Movie.objects.filter(movielens_id__isnull=False).values_list('id', 'movielens_id'))
+    movie_rows = _lookup_table({movielens_id: row for row, (_, movielens_id) in enumerate(catalog)})
+    relevance = np.zeros((len(catalog), len(genome_ids)), dtype=np.float16)
+    scored = np.zeros(len(catalog), dtype=bool)
+
+    progress = ImportProgress('genome scores', total_size=os.path.getsize(scores_path), out=out)
+    chunks = iter_parsed_chunks(scores_path, parse_genome_scores, dtype=GENOME_SCORES_DTYPE, workers=workers)
+    for end, (movie_ids, tag_ids, scores) in chunks:
+        rows, columns = _lookup(movie_rows, movie_ids), _lookup(tag_columns, tag_ids)
+        known = (rows >= 0) & (columns >= 0)
+        relevance[rows[known], columns[known]] = scores[known]
+        scored[rows[known]] = True
+        progress.position = end
+        progress.update(len(movie_ids))
+    progress.finish()
+
+    movie_pks = np.array([pk for pk, _ in catalog], dtype=np.int64)
+    write_genome_store(movie_pks[scored], [genome_tag_pks[genome_id] for genome_id in genome_ids], relevance[scored])
+    bump_version(CATALOG)
+    return int(scored.sum()), len(genome_ids)
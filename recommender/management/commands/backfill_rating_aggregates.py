@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recommender.models import Movie
+
+
+class Command(BaseCommand):
+    help = "Recompute Movie.rating_count / rating_sum / avg_rating from the ratings table"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help="Movies updated per transaction (keeps write locks short)"
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        movie_ids = list(Movie.objects.order_by('id').values_list('id', flat=True))
+
+        updated = 0
+        for i in range(0, len(movie_ids), batch_size):
+            batch = movie_ids[i:i + batch_size]
+            with transaction.atomic():
+                updated += Movie.objects.filter(id__gte=batch[0], id__lte=batch[-1]).refresh_rating_aggregates()
+            self.stdout.write(f"Updated {updated}/{len(movie_ids)} movies...")
+
+        self.stdout.write(self.style.SUCCESS(f"Rating aggregates refreshed for {updated} movies"))
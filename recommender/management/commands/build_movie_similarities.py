@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from recommender.recommender_engine import SIMILAR_MOVIES_PER_MOVIE, HybridRecommender
+
+
+class Command(BaseCommand):
+    help = "Rebuild the MovieSimilarity table from the content-based model"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-k', type=int, default=SIMILAR_MOVIES_PER_MOVIE,
+            help="Neighbours stored per movie"
+        )
+
+    def handle(self, *args, **options):
+        recommender = HybridRecommender()
+        written = recommender.store_movie_similarities(k=options['k'])
+        self.stdout.write(self.style.SUCCESS(f"Stored {written} movie similarities"))
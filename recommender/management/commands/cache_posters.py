@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+
+from recommender import posters
+from recommender.models import Movie
+
+
+class Command(BaseCommand):
+    help = "Fetch and resize posters that are not in the local poster cache yet"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=None, help="Stop after this many movies")
+
+    def handle(self, *args, **options):
+        if not posters.posters_enabled():
+            raise CommandError("Pillow is not installed")
+
+        movies = Movie.objects.filter(poster_digest='').exclude(poster_url__isnull=True).exclude(poster_url='').order_by('-rating_count', 'id')
+        if options['limit']:
+            movies = movies[:options['limit']]
+
+        # A failed fetch is not retried for POSTER_RETRY_AFTER seconds, so dead
+        # URLs don't slow down every scheduled run
+        retry_after = getattr(settings, 'POSTER_RETRY_AFTER', 3600)
+        source = posters.get_poster_source()
+        cached = failed = skipped = 0
+        for movie in movies.only('id', 'poster_url', 'poster_digest').iterator():
+            failed_key = f"poster_failed_{movie.id}"
+            if cache.get(failed_key):
+                skipped += 1
+                continue
+            try:
+                posters.cache_movie_poster(movie, source=source)
+                cached += 1
+            except posters.PosterError as e:
+                failed += 1
+                cache.set(failed_key, True, retry_after)
+                self.stderr.write(f"Movie {movie.id}: {e}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Cached {cached} posters ({failed} failed, {skipped} skipped after a recent failure)"
+        ))
@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from recommender.models import Movie
+from recommender.tmdb import TMDbClient, movie_fields
+from recommender.versions import CATALOG, bump_version
+
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = "Fetch overviews and posters from TMDb (concurrent, rate limited, cached on disk)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--missing-only', action='store_true', help="Only movies without an overview or poster")
+        parser.add_argument('--limit', type=int, default=None, help="Stop after this many movies")
+        parser.add_argument('--workers', type=int, default=8, help="Concurrent requests")
+        parser.add_argument('--rate', type=float, default=None, help="Requests per second (default settings.TMDB_RATE)")
+
+    def handle(self, *args, **options):
+        # Placeholder ids (<= 0) are movies links.csv has no TMDb id for
+        movies = Movie.objects.filter(tmdb_id__gt=0).order_by('-rating_count', 'id')
+        if options['missing_only']:
+            movies = movies.filter(Q(poster_url__isnull=True) | Q(poster_url='') | Q(overview=''))
+        if options['limit']:
+            movies = movies[:options['limit']]
+        by_tmdb_id = {movie.tmdb_id: movie for movie in movies.only('id', 'tmdb_id', 'overview', 'poster_url', 'poster_digest')}
+
+        client = TMDbClient(rate=options['rate'])
+        changed, not_found, errors = [], 0, []
+        for tmdb_id, details, error in client.movies(list(by_tmdb_id), workers=options['workers']):
+            if error is not None:
+                errors.append(error)
+                continue
+            if details is None:
+                not_found += 1
+                continue
+            movie = by_tmdb_id[tmdb_id]
+            fields = movie_fields(details)
+            if all(getattr(movie, name) == value for name, value in fields.items()):
+                continue
+            if fields.get('poster_url', movie.poster_url) != movie.poster_url:
+                # The local poster copies belong to the old URL
+                movie.poster_digest = ''
+            for name, value in fields.items():
+                setattr(movie, name, value)
+            changed.append(movie)
+
+        with transaction.atomic():
+            Movie.objects.bulk_update(changed, ['overview', 'poster_url', 'poster_digest'], batch_size=BATCH_SIZE)
+        if changed:
+            bump_version(CATALOG)
+
+        for error in errors[:10]:
+            self.stderr.write(str(error))
+        self.stdout.write(self.style.SUCCESS(
+            f"Updated {len(changed)} of {len(by_tmdb_id)} movies "
+            f"({client.requests_made} requests, {not_found} not on TMDb, {len(errors)} failed)"
+        ))
@@ -0,0 +1,17 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from recommender.snapshot import export_snapshot, snapshot_dir
+
+
+class Command(BaseCommand):
+    help = "Export movies, ratings and watchlist to the columnar snapshot the recommender trains on"
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        counts = export_snapshot()
+        summary = ', '.join(f"{count} {name}" for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(
+            f"Exported {summary} to {snapshot_dir()} in {time.monotonic() - started:.1f}s"
+        ))
@@ -0,0 +1,37 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from recommender.profiling import profile_csv, profile_database, suggest_settings
+
+
+class Command(BaseCommand):
+    help = "Profile the rating data in one streaming pass and suggest engine settings (JSON report)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--csv', metavar='DIR', default=None,
+            help="MovieLens directory with ratings.csv (and movies.csv, links.csv); default: the database"
+        )
+        parser.add_argument('--workers', type=int, default=None, help="CSV parser processes")
+        parser.add_argument('--output', default=None, help="Write the report to this file instead of stdout")
+
+    def handle(self, *args, **options):
+        if options['csv']:
+            try:
+                report = profile_csv(options['csv'], workers=options['workers'])
+            except FileNotFoundError as e:
+                raise CommandError(str(e))
+        else:
+            report = profile_database()
+        report['suggested_settings'] = suggest_settings(report)
+
+        text = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.write(text + '\n')
+            self.stdout.write(self.style.SUCCESS(
+                f"Profiled {report['ratings']} ratings of {report['users']} users, report written to {options['output']}"
+            ))
+        else:
+            self.stdout.write(text)
@@ -0,0 +1,84 @@
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import unquote
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+# ManifestStaticFilesStorage names look like app.3f2a9c1b7e4d.js
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{12}\.[^/.]+$')
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def accepted_encodings(header):
+    """Codings the client accepts (those not explicitly disabled with q=0)"""
+    accepted = set()
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        params = params.replace(' ', '')
+        if coding and params not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            accepted.add(coding.lower())
+    return accepted
+
+
+class PrecompressedStaticMiddleware(MiddlewareMixin):
+    """
+    Serve collected static files from STATIC_ROOT, picking the .br or .gz
+    variant written by BundledManifestStorage when the client accepts it
+
+    Meant for deployments without a CDN or web server in front; enabled with
+    settings.SERVE_PRECOMPRESSED_STATIC. Hashed file names are cached for a
+    year since their content can never change.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'SERVE_PRECOMPRESSED_STATIC', False) or not settings.STATIC_ROOT:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+        self.prefix = '/' + settings.STATIC_URL.strip('/') + '/'
+        self.root = os.path.realpath(settings.STATIC_ROOT)
+
+    def _resolve(self, relative):
+        relative = posixpath.normpath(unquote(relative)).lstrip('/')
+        path = os.path.realpath(os.path.join(self.root, relative))
+        if not path.startswith(self.root + os.sep) or not os.path.isfile(path):
+            return None
+        return path
+
+    def process_request(self, request):
+        if request.method not in ('GET', 'HEAD') or not request.path.startswith(self.prefix):
+            return None
+        path = self._resolve(request.path[len(self.prefix):])
+        if path is None:
+            return None
+
+        served, encoding = path, None
+        accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        for coding, suffix in ENCODINGS:
+            if coding in accepted and os.path.isfile(path + suffix):
+                served, encoding = path + suffix, coding
+                break
+
+        stat = os.stat(served)
+        if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'), stat.st_mtime):
+            response = HttpResponseNotModified()
+        else:
+            content_type, _ = mimetypes.guess_type(path)
+            response = FileResponse(open(served, 'rb'), content_type=content_type or 'application/octet-stream')
+            if encoding:
+                response.headers['Content-Encoding'] = encoding
+
+        response.headers['Last-Modified'] = http_date(stat.st_mtime)
+        if HASHED_NAME_RE.search(path):
+            response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+        else:
+            response.headers['Cache-Control'] = 'public, max-age=300'
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
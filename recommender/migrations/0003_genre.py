@@ -0,0 +1,52 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:26
+
+from django.db import migrations, models
+
+
+def backfill_genres(apps, schema_editor):
+    """Split existing pipe-delimited genre strings into Genre rows and links"""
+    Movie = apps.get_model('recommender', 'Movie')
+    Genre = apps.get_model('recommender', 'Genre')
+    MovieGenre = Movie.genres.through
+
+    movie_genres = {}
+    for movie_id, genre_str in Movie.objects.values_list('id', 'genre').iterator():
+        names = [g.strip() for g in (genre_str or '').split('|')]
+        movie_genres[movie_id] = [n for n in names if n and n != '(no genres listed)']
+
+    all_names = sorted({name for names in movie_genres.values() for name in names})
+    Genre.objects.bulk_create([Genre(name=name) for name in all_names], ignore_conflicts=True)
+    genre_ids = dict(Genre.objects.values_list('name', 'id'))
+
+    links = [
+        MovieGenre(movie_id=movie_id, genre_id=genre_ids[name])
+        for movie_id, names in movie_genres.items()
+        for name in names
+    ]
+    MovieGenre.objects.bulk_create(links, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommender', '0002_watchlist'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Genre',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='movie',
+            name='genres',
+            field=models.ManyToManyField(blank=True, related_name='movies', to='recommender.genre'),
+        ),
+        migrations.RunPython(backfill_genres, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommender', '0005_moviesimilarity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='movie',
+            name='poster_digest',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+    ]
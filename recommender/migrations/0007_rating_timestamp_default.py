@@ -0,0 +1,19 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:54
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommender', '0006_movie_poster_digest'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='rating',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommender', '0007_rating_timestamp_default'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='movie',
+            name='movielens_id',
+            field=models.IntegerField(blank=True, null=True, unique=True),
+        ),
+    ]
@@ -1,19 +1,100 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Avg, Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.utils import timezone
+
+from .versions import AGGREGATES, bump_version
+
+
+class Genre(models.Model):
+    """A single genre, linked to movies through an indexed many-to-many table"""
+    name = models.CharField(max_length=50, unique=True)
+    
+    GENRE_NAMES_CACHE_KEY = 'genre_names'
+    
+    def __str__(self):
+        return self.name
+    
+    class Meta:
+        ordering = ['name']
+    
+    @classmethod
+    def cached_names(cls):
+        """Sorted list of genre names, served from cache instead of scanning movies"""
+        return cache.get_or_set(
+            cls.GENRE_NAMES_CACHE_KEY,
+            lambda: list(cls.objects.values_list('name', flat=True)),
+            3600
+        )
+    
+    @classmethod
+    def invalidate_cached_names(cls):
+        cache.delete(cls.GENRE_NAMES_CACHE_KEY)
+
+
+NO_GENRES_LISTED = '(no genres listed)'
+
+
+def split_genres(genre_str):
+    """Split a pipe-delimited MovieLens genre string (or an already split list) into clean genre names"""
+    if not genre_str:
+        return []
+    if isinstance(genre_str, str):
+        genre_str = genre_str.split('|')
+    names = [g.strip() for g in genre_str]
+    return [name for name in names if name and name != NO_GENRES_LISTED]
+
+
+class MovieQuerySet(models.QuerySet):
+    def refresh_rating_aggregates(self):
+        """
+        Recompute rating_count/rating_sum/avg_rating for these movies in one
+        UPDATE (used after bulk loads that bypass the Rating signals)
+        """
+        ratings = Rating.objects.filter(movie=OuterRef('pk')).order_by().values('movie')
+        updated = self.update(
+            rating_count=Coalesce(Subquery(ratings.annotate(c=Count('id')).values('c')), 0),
+            rating_sum=Coalesce(Subquery(ratings.annotate(s=Sum('rating')).values('s')), 0.0),
+            avg_rating=Subquery(ratings.annotate(a=Avg('rating')).values('a')),
+        )
+        bump_version(AGGREGATES)
+        return updated
 
 
 class Movie(models.Model):
     title = models.CharField(max_length=255)
     genre = models.CharField(max_length=100)
+    genres = models.ManyToManyField(Genre, related_name='movies', blank=True)
     director = models.CharField(max_length=255)
     release_year = models.IntegerField()
     overview = models.TextField()
     poster_url = models.URLField(max_length=500, blank=True, null=True)
+    # sha256 of the poster fetched from poster_url, naming its local resized copies
+    poster_digest = models.CharField(max_length=64, blank=True, default='')
     tmdb_id = models.IntegerField(unique=True)
+    # MovieLens movieId, kept after links.csv replaces tmdb_id so ratings/tags still map
+    movielens_id = models.IntegerField(unique=True, null=True, blank=True)
+    
+    # Denormalized rating aggregates, maintained by the Rating signals
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.FloatField(default=0)
+    avg_rating = models.FloatField(null=True, blank=True)
+    
+    objects = MovieQuerySet.as_manager()
     
     def __str__(self):
         return self.title
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['-rating_count', '-id'], name='movie_popular_idx'),
+            models.Index(fields=['-avg_rating', '-id'], name='movie_top_rated_idx'),
+            # Search page listing, paged by (title, id)
+            models.Index(fields=['title', 'id'], name='movie_title_idx'),
+        ]
+    
     def get_first_genre(self):
         """Get the first genre from the genre string"""
         if self.genre and '|' in self.genre:
@@ -22,10 +103,8 @@ class Movie(models.Model):
     
     def get_rating_display(self):
         """Get formatted rating display"""
-        from django.db.models import Avg
-        avg_rating = self.rating_set.aggregate(Avg('rating'))['rating__avg']
-        if avg_rating:
-            return f"{avg_rating:.1f}/5.0"
+        if self.avg_rating:
+            return f"{self.avg_rating:.1f}/5.0"
         return "Chưa có đánh giá"
     
     def get_genres_list(self):
@@ -35,19 +114,46 @@ class Movie(models.Model):
         elif self.genre:
             return [self.genre]
         return ["Không rõ"]
+    
+    def sync_genres(self):
+        """Link this movie to Genre rows matching its genre string"""
+        names = split_genres(self.genre)
+        existing = set(Genre.objects.filter(name__in=names).values_list('name', flat=True))
+        missing = [name for name in names if name not in existing]
+        if missing:
+            Genre.objects.bulk_create([Genre(name=name) for name in missing], ignore_conflicts=True)
+            Genre.invalidate_cached_names()
+        self.genres.set(Genre.objects.filter(name__in=names))
 
 
 class Rating(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     movie = models.ForeignKey(Movie, on_delete=models.CASCADE)
     rating = models.FloatField()  # Will be validated to 1.0-5.0 in forms/admin
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # A default rather than auto_now_add, which would overwrite imported CSV timestamps
+    timestamp = models.DateTimeField(default=timezone.now)
     
     def __str__(self):
         return f"{self.user.username} - {self.movie.title}: {self.rating}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored value so updates can adjust Movie aggregates by the difference
+        instance._stored_rating = instance.__dict__.get('rating')
+        return instance
+    
+    def save(self, *args, **kwargs):
+        # The post_save aggregate update runs inside the same transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+    
     class Meta:
         unique_together = ('user', 'movie')  # Prevent duplicate ratings
+        indexes = [
+            # Profile rating history, newest first, paged by (-timestamp, -id)
+            models.Index(fields=['user', '-timestamp', '-id'], name='rating_user_recent_idx'),
+        ]
 
 
 class Watchlist(models.Model):
@@ -62,3 +168,66 @@ class Watchlist(models.Model):
     class Meta:
         unique_together = ('user', 'movie')  # Prevent duplicate entries
         ordering = ['-added_at']
+        indexes = [
+            # Profile watchlist, newest first, paged by (-added_at, -id)
+            models.Index(fields=['user', '-added_at', '-id'], name='watchlist_user_recent_idx'),
+        ]
+
+
+class MovieSimilarity(models.Model):
+    """Precomputed content-based neighbours of a movie, written by the engine build"""
+    movie = models.ForeignKey(Movie, on_delete=models.CASCADE, related_name='similarities')
+    neighbor = models.ForeignKey(Movie, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+    
+    def __str__(self):
+        return f"{self.movie.title} ~ {self.neighbor.title} (#{self.rank})"
+    
+    class Meta:
+        unique_together = ('movie', 'rank')  # Also serves "neighbours of X in rank order"
+        ordering = ['movie', 'rank']
+
+
+class Tag(models.Model):
+    """A MovieLens tag; tags of the tag genome also carry their genome tagId"""
+    name = models.CharField(max_length=255, unique=True)
+    genome_id = models.PositiveIntegerField(unique=True, null=True, blank=True)
+    
+    def __str__(self):
+        return self.name
+
+
+class TagApplication(models.Model):
+    """A user tagging a movie (tags.csv)"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    movie = models.ForeignKey(Movie, on_delete=models.CASCADE, related_name='tag_applications')
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name='applications')
+    timestamp = models.DateTimeField(default=timezone.now)
+    
+    def __str__(self):
+        return f"{self.user.username} tagged {self.movie.title}: {self.tag.name}"
+    
+    class Meta:
+        unique_together = ('user', 'movie', 'tag')
+
+
+class ImportCheckpoint(models.Model):
+    """Progress of a resumable CSV import (see importing.import_ratings_csv)"""
+    name = models.CharField(max_length=100, unique=True)
+    # End of the last fully committed chunk; a resumed run starts here
+    offset = models.BigIntegerField(default=0)
+    # sha1 of the file's first and last bytes before `offset`, to tell an
+    # appended (or unchanged) file from a replaced one
+    fingerprint = models.CharField(max_length=40, blank=True, default='')
+    # Newest rating timestamp imported so far (unix seconds)
+    high_water = models.BigIntegerField(default=0)
+    # Rows at or before this timestamp are skipped in the current run
+    since = models.BigIntegerField(default=0)
+    rows = models.BigIntegerField(default=0)
+    completed = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        state = "completed" if self.completed else f"at byte {self.offset}"
+        return f"{self.name}: {self.rows} rows, {state}"
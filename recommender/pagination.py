@@ -0,0 +1,166 @@
+"""
+Keyset (cursor) pagination
+
+Instead of COUNT(*) plus OFFSET, each page is fetched with a WHERE clause on
+the sort key of the last row already shown, so page N costs the same as
+page 1. Cursors are opaque url-safe strings the client passes back as-is.
+"""
+import base64
+import datetime
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+
+class _CursorEncoder(DjangoJSONEncoder):
+    # DjangoJSONEncoder cuts datetimes to milliseconds; a cursor needs the exact sort key,
+    # or rows later within the same millisecond are skipped
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode_cursor(data):
+    raw = json.dumps(data, cls=_CursorEncoder, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a cursor string; returns None for missing or malformed cursors"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+class KeysetPage:
+    def __init__(self, items, next_cursor=None, previous_cursor=None):
+        self.object_list = items
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class KeysetPaginator:
+    """
+    Paginate a queryset on a stable sort key
+
+    Args:
+        queryset: Unordered queryset; sort-key fields must not be NULL
+        ordering: Field names as for order_by(), ending with a unique field
+            (e.g. ('-rating_count', '-id'))
+        page_size: Number of rows per page
+    """
+
+    def __init__(self, queryset, ordering, page_size=20):
+        self.queryset = queryset
+        self.ordering = tuple(ordering)
+        self.page_size = page_size
+        self.fields = [(f.lstrip('-'), f.startswith('-')) for f in self.ordering]
+
+    def _key(self, obj):
+        return [getattr(obj, name) for name, _ in self.fields]
+
+    def _seek(self, values, backwards):
+        """Rows strictly after (or before) `values` in the sort order"""
+        condition = Q()
+        for i, (name, descending) in enumerate(self.fields):
+            lookup = 'lt' if descending != backwards else 'gt'
+            term = Q(**{f'{name}__{lookup}': values[i]})
+            for j, (prev_name, _) in enumerate(self.fields[:i]):
+                term &= Q(**{prev_name: values[j]})
+            condition |= term
+        return condition
+
+    def _query(self, cursor):
+        """Queryset for the page after/before `cursor`, plus the seek state"""
+        data = decode_cursor(cursor) if isinstance(cursor, str) else cursor
+        values = data.get('k') if data else None
+        backwards = bool(data and data.get('d') == 'p')
+        if values is not None and len(values) != len(self.fields):
+            values, backwards = None, False
+
+        queryset = self.queryset
+        if values is not None:
+            queryset = queryset.filter(self._seek(values, backwards))
+        if backwards:
+            ordering = [f[1:] if f.startswith('-') else f'-{f}' for f in self.ordering]
+        else:
+            ordering = self.ordering
+        return queryset.order_by(*ordering)[:self.page_size + 1], values, backwards
+
+    def _make_page(self, rows, values, backwards):
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if backwards:
+            rows.reverse()
+        if not rows:
+            return KeysetPage([])
+
+        # Moving forward there is a previous page whenever a cursor was used;
+        # moving back, there is always a next page (the one we came from)
+        has_next = has_more if not backwards else True
+        has_previous = has_more if backwards else values is not None
+        return KeysetPage(
+            rows,
+            next_cursor=encode_cursor({'k': self._key(rows[-1])}) if has_next else None,
+            previous_cursor=encode_cursor({'k': self._key(rows[0]), 'd': 'p'}) if has_previous else None,
+        )
+
+    def page(self, cursor=None):
+        queryset, values, backwards = self._query(cursor)
+        return self._make_page(list(queryset), values, backwards)
+
+    async def apage(self, cursor=None):
+        """page() for async views, using the async ORM"""
+        queryset, values, backwards = self._query(cursor)
+        return self._make_page([row async for row in queryset], values, backwards)
+
+
+def paginate_ranked_ids(ranked_ids, page_size=20, cursor=None):
+    """
+    Paginate a precomputed ranked list of ids (search hits, recommendations)
+
+    The cursor is the position in the list, so slicing is O(page_size)
+    regardless of depth. Returns a KeysetPage of ids.
+    """
+    data = decode_cursor(cursor) if isinstance(cursor, str) else cursor
+    start = data.get('o', 0) if data else 0
+    if not isinstance(start, int) or start < 0:
+        start = 0
+    end = start + page_size
+    return KeysetPage(
+        list(ranked_ids[start:end]),
+        next_cursor=encode_cursor({'o': end}) if end < len(ranked_ids) else None,
+        previous_cursor=encode_cursor({'o': max(start - page_size, 0)}) if start > 0 else None,
+    )
+
+
+def cached_count(queryset, key, timeout=600):
+    """
+    Row count for display only, cached so COUNT(*) runs once per `timeout`
+    rather than on every page
+    """
+    cache_key = 'count_' + hashlib.md5(key.encode()).hexdigest()
+    return cache.get_or_set(cache_key, queryset.count, timeout)
@@ -0,0 +1,170 @@
+"""
+Local poster cache
+
+Each poster is fetched once from its source (TMDb by default), resized to the
+card sizes below and stored as WebP and JPEG under a content-addressed name:
+
+    POSTER_CACHE_DIR/<sha256[:2]>/<sha256>/<size>.webp|.jpg
+
+The digest is saved on Movie.poster_digest, so templates link straight to
+/posters/<digest>/<size>/, which is served with a one-year immutable
+Cache-Control. Movies without a digest link to /posters/movie/<id>/<size>/,
+which redirects to the remote poster_url until manage.py cache_posters has
+fetched the poster, and to the cached file after that. Requests never fetch.
+
+The source is pluggable (settings.POSTER_SOURCE, a dotted path to a class with
+a fetch(url) -> bytes method) so tests can point it at a local stub server.
+"""
+import hashlib
+import io
+import os
+import re
+import tempfile
+
+import requests
+from django.conf import settings
+from django.urls import reverse
+from django.utils.module_loading import import_string
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # optional dependency: without it templates keep the remote URL
+    Image = ImageOps = None
+
+# name -> (width, height); TMDb posters are 2:3
+POSTER_SIZES = {
+    'thumb': (92, 138),
+    'card': (185, 278),
+    'detail': (342, 513),
+}
+
+FORMATS = {
+    'webp': ('WEBP', 'image/webp', {'quality': 80, 'method': 6}),
+    'jpg': ('JPEG', 'image/jpeg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+DIGEST_RE = re.compile(r'^[0-9a-f]{64}$')
+MAX_POSTER_BYTES = 10 * 1024 * 1024
+
+
+class PosterError(Exception):
+    pass
+
+
+class HTTPPosterSource:
+    """Fetch poster images over HTTP(S)"""
+
+    def __init__(self, timeout=10, max_bytes=MAX_POSTER_BYTES):
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.session = requests.Session()
+
+    def fetch(self, url):
+        try:
+            with self.session.get(url, timeout=self.timeout, stream=True) as response:
+                response.raise_for_status()
+                data = b''
+                for chunk in response.iter_content(64 * 1024):
+                    data += chunk
+                    if len(data) > self.max_bytes:
+                        raise PosterError(f"Poster larger than {self.max_bytes} bytes: {url}")
+                return data
+        except requests.RequestException as e:
+            raise PosterError(f"Could not fetch {url}: {e}") from e
+
+
+def posters_enabled():
+    return Image is not None
+
+
+def poster_src(movie, size='card'):
+    """
+    Local URL of `movie`'s poster at `size` (see POSTER_SIZES)
+
+    Cached posters link straight to their immutable file; others go through
+    the movie_poster redirect, which switches to the cached file once
+    cache_posters has run. Falls back to poster_url without Pillow.
+    Used by the {% poster_src %} tag and the JSON endpoints.
+    """
+    if not movie.poster_url:
+        return ''
+    if not posters_enabled():
+        return movie.poster_url
+    if movie.poster_digest:
+        return reverse('recommender:poster_file', args=[movie.poster_digest, size])
+    return reverse('recommender:movie_poster', args=[movie.id, size])
+
+
+def get_poster_source():
+    return import_string(getattr(settings, 'POSTER_SOURCE', 'recommender.posters.HTTPPosterSource'))()
+
+
+def cache_dir():
+    return str(getattr(settings, 'POSTER_CACHE_DIR', os.path.join(settings.BASE_DIR, 'poster_cache')))
+
+
+def variant_path(digest, size, ext):
+    return os.path.join(cache_dir(), digest[:2], digest, f'{size}.{ext}')
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def store_poster(data):
+    """
+    Resize `data` to every POSTER_SIZES entry in every format and store it
+
+    Returns:
+        The sha256 hex digest naming the stored variants
+    """
+    if not posters_enabled():
+        raise PosterError("Pillow is not installed")
+    digest = hashlib.sha256(data).hexdigest()
+    if all(
+        os.path.exists(variant_path(digest, size, ext))
+        for size in POSTER_SIZES for ext in FORMATS
+    ):
+        return digest
+
+    try:
+        image = Image.open(io.BytesIO(data))
+        image.load()
+    except Image.DecompressionBombError as e:
+        raise PosterError(f"Image too large: {e}") from e
+    except (OSError, ValueError) as e:
+        raise PosterError(f"Not a readable image: {e}") from e
+    image = ImageOps.exif_transpose(image).convert('RGB')
+
+    for size, dimensions in POSTER_SIZES.items():
+        resized = ImageOps.fit(image, dimensions, Image.LANCZOS)
+        for ext, (pil_format, _, options) in FORMATS.items():
+            buffer = io.BytesIO()
+            resized.save(buffer, pil_format, **options)
+            _write_atomic(variant_path(digest, size, ext), buffer.getvalue())
+    return digest
+
+
+def cache_movie_poster(movie, source=None):
+    """
+    Fetch and store `movie`'s poster unless it is already cached
+
+    Returns:
+        The poster digest ('' when the movie has no poster_url)
+    """
+    if movie.poster_digest or not movie.poster_url:
+        return movie.poster_digest
+    source = source or get_poster_source()
+    digest = store_poster(source.fetch(movie.poster_url))
+    type(movie).objects.filter(pk=movie.pk).update(poster_digest=digest)
+    movie.poster_digest = digest
+    return digest
+
+
+def pick_format(accept_header):
+    """WebP for clients that advertise it, JPEG otherwise"""
+    return 'webp' if 'image/webp' in (accept_header or '') else 'jpg'
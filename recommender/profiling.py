@@ -0,0 +1,237 @@
+"""
+Streaming profile of the rating data (manage.py profile_dataset, analyze_csv.py)
+
+One pass reads the ratings in chunks, either from ratings.csv (parsed by
+worker processes, see import_parsing) or from recommender_rating through a
+chunked cursor. Only per-user and per-movie counters, the rating histogram
+and the rows of the current user are kept, so memory depends on the number
+of users and movies and not on the number of ratings. The
+report covers what sizes the models:
+
+- users, movies, ratings and sparsity
+- the distribution of ratings per user and per movie
+- the timestamp range and the rating histogram
+- duplicate (user, movie) pairs; these are counted exactly when the
+  ratings are ordered by user, as ratings.csv and the DB cursor are
+- movies without a TMDb link
+
+suggest_settings() turns a report into engine settings, e.g. whether the
+dense movie x movie similarity matrix fits in memory.
+"""
+import os
+from collections import Counter
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .import_parsing import LINKS_DTYPE, RATINGS_DTYPE, iter_parsed_chunks, parse_links, parse_rating_arrays
+from .models import Movie, Rating
+
+CHUNK_ROWS = 200000
+SAMPLE_IDS = 20
+PERCENTILES = (25, 50, 75, 90, 99)
+# Share of physical memory the dense content similarity matrix may take
+SIMILARITY_MEMORY_SHARE = 0.25
+# HybridRecommender._build_collaborative_model needs at least this many ratings
+MIN_COLLABORATIVE_RATINGS = 100
+
+
+def _add_counts(totals, ids):
+    counts = np.bincount(ids)
+    if len(counts) > len(totals):
+        totals = np.concatenate([totals, np.zeros(len(counts) - len(totals), dtype=np.int64)])
+    totals[:len(counts)] += counts
+    return totals
+
+
+def _distribution(counts):
+    counts = counts[counts > 0]
+    if not len(counts):
+        return None
+    values = np.percentile(counts, PERCENTILES)
+    return {
+        'min': int(counts.min()),
+        'mean': round(float(counts.mean()), 2),
+        **{f'p{p}': float(value) for p, value in zip(PERCENTILES, values)},
+        'max': int(counts.max()),
+    }
+
+
+def _iso(seconds):
+    return datetime.fromtimestamp(int(seconds), tz=timezone.utc).isoformat() if seconds is not None else None
+
+
+class RatingProfile:
+    """Accumulates the rating statistics chunk by chunk"""
+
+    def __init__(self):
+        self.rows = 0
+        self.user_counts = np.zeros(0, dtype=np.int64)
+        self.movie_counts = np.zeros(0, dtype=np.int64)
+        self.histogram = Counter()
+        self.first_timestamp = None
+        self.last_timestamp = None
+        self.duplicates = 0
+        # (user, movie) keys of the user the previous chunk ended with
+        self._last_user = None
+        self._open_keys = np.zeros(0, dtype=np.int64)
+
+    def add(self, users, movies, ratings, timestamps):
+        """
+        Args:
+            users, movies: Integer id arrays
+            ratings: Rating values
+            timestamps: Unix seconds
+        """
+        if not len(users):
+            return
+        self.rows += len(users)
+        self.user_counts = _add_counts(self.user_counts, users)
+        self.movie_counts = _add_counts(self.movie_counts, movies)
+        values, counts = np.unique(ratings, return_counts=True)
+        self.histogram.update(dict(zip(values.tolist(), counts.tolist())))
+        low, high = int(timestamps.min()), int(timestamps.max())
+        self.first_timestamp = low if self.first_timestamp is None else min(self.first_timestamp, low)
+        self.last_timestamp = high if self.last_timestamp is None else max(self.last_timestamp, high)
+        self._count_duplicates(users, movies)
+
+    def _count_duplicates(self, users, movies):
+        if self.duplicates is None:
+            return
+        if np.any(np.diff(users) < 0) or (self._last_user is not None and users[0] < self._last_user):
+            # Not ordered by user: exact counting would need every pair in memory
+            self.duplicates = None
+            return
+        keys = (users.astype(np.int64) << 32) | movies.astype(np.int64)
+        if users[0] == self._last_user:
+            keys = np.concatenate([self._open_keys, keys])
+        unique = np.unique(keys)
+        self.duplicates += len(keys) - len(unique)
+        self._last_user = int(users[-1])
+        self._open_keys = unique[(unique >> 32) == self._last_user]
+
+    def report(self):
+        users = int(np.count_nonzero(self.user_counts))
+        movies = int(np.count_nonzero(self.movie_counts))
+        return {
+            'ratings': self.rows,
+            'users': users,
+            'rated_movies': movies,
+            'max_user_id': len(self.user_counts) - 1 if len(self.user_counts) else None,
+            'max_movie_id': len(self.movie_counts) - 1 if len(self.movie_counts) else None,
+            'sparsity': round(1 - self.rows / (users * movies), 6) if users and movies else None,
+            'ratings_per_user': _distribution(self.user_counts),
+            'ratings_per_movie': _distribution(self.movie_counts),
+            'first_rating': _iso(self.first_timestamp),
+            'last_rating': _iso(self.last_timestamp),
+            'rating_histogram': {str(value): count for value, count in sorted(self.histogram.items())},
+            'duplicate_pairs': self.duplicates,
+        }
+
+    def rated(self, ids):
+        """The ids in `ids` that have ratings"""
+        ids = np.asarray(ids, dtype=np.int64)
+        inside = ids < len(self.movie_counts)
+        return ids[inside][self.movie_counts[ids[inside]] > 0]
+
+
+def _link_report(catalog_ids, linked_ids, profile):
+    catalog_ids = np.unique(np.asarray(catalog_ids, dtype=np.int64))
+    unlinked = np.setdiff1d(catalog_ids, np.asarray(list(linked_ids), dtype=np.int64))
+    rated_unlinked = profile.rated(unlinked)
+    return {
+        'movies': len(catalog_ids),
+        'movies_without_tmdb_id': len(unlinked),
+        'rated_movies_without_tmdb_id': len(rated_unlinked),
+        'sample_movies_without_tmdb_id': unlinked[:SAMPLE_IDS].tolist(),
+    }
+
+
+def profile_csv(data_dir, workers=None):
+    """Profile ratings.csv, movies.csv and links.csv of a MovieLens directory"""
+    profile = RatingProfile()
+    ratings_path = os.path.join(data_dir, 'ratings.csv')
+    for _, arrays in iter_parsed_chunks(ratings_path, parse_rating_arrays, dtype=RATINGS_DTYPE, workers=workers):
+        profile.add(*arrays)
+    report = {'source': os.path.abspath(data_dir), **profile.report()}
+
+    movies_path = os.path.join(data_dir, 'movies.csv')
+    links_path = os.path.join(data_dir, 'links.csv')
+    if os.path.exists(movies_path):
+        catalog_ids = pd.read_csv(movies_path, usecols=['movieId'], dtype={'movieId': np.int64})['movieId'].to_numpy()
+        linked = set()
+        if os.path.exists(links_path):
+            for _, links in iter_parsed_chunks(links_path, parse_links, dtype=LINKS_DTYPE, workers=1):
+                linked.update(links)
+        report['catalog'] = _link_report(catalog_ids, linked, profile)
+        rated = np.flatnonzero(profile.movie_counts)
+        report['catalog']['rated_movies_not_in_catalog'] = int(len(np.setdiff1d(rated, catalog_ids)))
+    return report
+
+
+def profile_database(using=DEFAULT_DB_ALIAS, chunk_rows=CHUNK_ROWS):
+    """Profile the Rating and Movie tables"""
+    connection = connections[using]
+    profile = RatingProfile()
+    table = Rating._meta.db_table
+    # chunked_cursor() is a server-side cursor on PostgreSQL; the unique (user, movie) index serves the order
+    with connection.chunked_cursor() as cursor:
+        cursor.execute(f'SELECT user_id, movie_id, rating, timestamp FROM "{table}" ORDER BY user_id, movie_id')
+        while rows := cursor.fetchmany(chunk_rows):
+            users, movies, ratings, timestamps = zip(*rows)
+            # SQLite returns ISO strings, other backends datetimes
+            seconds = pd.to_datetime(pd.Series(timestamps), utc=True, format='ISO8601').dt.tz_localize(None)
+            profile.add(
+                np.asarray(users, dtype=np.int64), np.asarray(movies, dtype=np.int64),
+                np.asarray(ratings, dtype=np.float64), seconds.to_numpy('datetime64[s]').astype(np.int64),
+            )
+    report = {'source': str(connection.settings_dict['NAME']), **profile.report()}
+
+    movies = Movie.objects.using(using)
+    report['catalog'] = _link_report(
+        movies.values_list('id', flat=True), movies.filter(tmdb_id__gt=0).values_list('id', flat=True), profile
+    )
+    return report
+
+
+def physical_memory():
+    """Installed memory in bytes, or None where it can't be read"""
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def suggest_settings(report, memory=None):
+    """
+    Engine settings for a profile report
+
+    Args:
+        report: profile_csv() / profile_database() result
+        memory: Memory budget in bytes (default: installed memory)
+
+    Returns:
+        dict of suggestions
+    """
+    memory = memory or physical_memory()
+    movies = report.get('catalog', {}).get('movies') or report['rated_movies']
+    # HybridRecommender keeps cosine_similarity(tfidf) as a dense float64 matrix
+    similarity_bytes = movies * movies * 8
+    budget = int(memory * SIMILARITY_MEMORY_SHARE) if memory else None
+    fits = budget is None or similarity_bytes <= budget
+    histogram = [float(value) for value in report['rating_histogram']]
+    return {
+        'memory_bytes': memory,
+        'content_similarity_bytes': similarity_bytes,
+        'dense_content_similarity_fits': fits,
+        # Rows per block for store_movie_similarities() so one block stays within the budget
+        'similarity_block_size': (
+            max(1, min(movies, budget // max(1, movies * 8))) if budget else 1000
+        ),
+        'collaborative_filtering': report['ratings'] >= MIN_COLLABORATIVE_RATINGS,
+        'rating_scale': [min(histogram), max(histogram)] if histogram else None,
+        'id_dtype': 'int32' if max(report['max_user_id'] or 0, report['max_movie_id'] or 0) < 2 ** 31 else 'int64',
+        'clean_duplicates_before_training': bool(report['duplicate_pairs']),
+    }
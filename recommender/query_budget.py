@@ -0,0 +1,146 @@
+"""
+Per-view SQL query budgets and query plan checks
+
+    @query_budget(6)
+    @login_required
+    def movie_detail(request, movie_id): ...
+
+query_budget() only declares the budget as view.query_budget; it costs
+nothing at request time. tests/test_query_budgets.py requests the budgeted
+views against a seeded dataset under a QueryRecorder. A view fails the
+suite when it runs more queries than it declares (an N+1 loop shows up as
+soon as a page holds more than one row), and the recorded queries are
+EXPLAINed, so a hot query that stops using an index fails too.
+
+QueryRecorder also works ad hoc, e.g. in manage.py shell:
+
+    with QueryRecorder() as recorder:
+        Client().get('/')
+    print(recorder.report(explain=True))
+"""
+import re
+import time
+from collections import namedtuple
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+RecordedQuery = namedtuple('RecordedQuery', ['sql', 'params', 'duration'])
+
+# Django aliases tables in subqueries: FROM "recommender_rating" U0
+_TABLE_ALIAS_RE = re.compile(r'"(\w+)" ([A-Z]\d+)\b')
+_SQLITE_SCAN_RE = re.compile(r'^SCAN (\w+)( USING COVERING INDEX)?')
+_ORDER_BY_RE = re.compile(r'ORDER BY (?!.*\bFROM\b)(.*)$', re.S)
+# PostgreSQL EXPLAIN nodes: "->  Seq Scan on recommender_rating  (cost=...)", "Sort  (cost=...)"
+_PG_SEQ_SCAN_RE = re.compile(r'Seq Scan on (\w+)')
+_PG_SORT_RE = re.compile(r'(?:^|->  )Sort  \(')
+
+
+def query_budget(max_queries):
+    """Declare the most queries a view may run for one request"""
+    def decorator(view):
+        view.query_budget = max_queries
+        return view
+    return decorator
+
+
+class QueryRecorder:
+    """Records the SQL, parameters and duration of every query run on a connection"""
+
+    def __init__(self, using=DEFAULT_DB_ALIAS):
+        self.using = using
+        self.queries = []
+        self._wrapper = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(RecordedQuery(sql, params, time.perf_counter() - started))
+
+    def __enter__(self):
+        self._wrapper = connections[self.using].execute_wrapper(self)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._wrapper.__exit__(*exc_info)
+
+    @property
+    def total_time(self):
+        return sum(query.duration for query in self.queries)
+
+    def explain(self, query):
+        return explain(query.sql, query.params, using=self.using)
+
+    def report(self, explain=False):
+        """One line per query (optionally with its plan), for failure messages"""
+        lines = [f"{len(self.queries)} queries, {self.total_time * 1000:.1f} ms"]
+        for number, query in enumerate(self.queries, start=1):
+            lines.append(f"{number}. [{query.duration * 1000:.2f} ms] {query.sql}")
+            if explain and query.sql.lstrip().upper().startswith('SELECT'):
+                lines.extend(f"      {line}" for line in self.explain(query))
+        return '\n'.join(lines)
+
+
+def explain(sql, params=None, using=DEFAULT_DB_ALIAS):
+    """
+    The database's plan for a query as a list of lines
+
+    SQLite gives EXPLAIN QUERY PLAN details ("SEARCH recommender_rating
+    USING INDEX ..."), PostgreSQL its EXPLAIN text; other backends [].
+    """
+    connection = connections[using]
+    if connection.vendor == 'sqlite':
+        prefix = 'EXPLAIN QUERY PLAN '
+    elif connection.vendor == 'postgresql':
+        prefix = 'EXPLAIN '
+    else:
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(prefix + sql, params)
+        rows = cursor.fetchall()
+    return [row[-1] for row in rows]
+
+
+def plan_problems(sql, plan, tables):
+    """
+    Full scans and unindexed sorts of `tables` found in a query plan
+
+    A scan is fine when the rows come out in index order and a LIMIT stops
+    it early (the first page of a keyset list), or when it only walks a
+    covering index (the cached counts). A sort is a problem when it orders
+    by columns of `tables`: sorting a page of genre names is cheap, sorting
+    a user's whole rating history is not.
+
+    Args:
+        sql: The explained query
+        plan: explain() result
+        tables: Names of the tables that must be read through an index
+
+    Returns:
+        List of problem descriptions, empty when the plan is fine
+    """
+    aliases = {alias: table for table, alias in _TABLE_ALIAS_RE.findall(sql)}
+    order_by = _ORDER_BY_RE.search(sql)
+    qualifiers = [f'"{table}".' for table in tables] + [f'{alias}.' for alias, table in aliases.items() if table in tables]
+    sorts_hot_table = bool(order_by) and any(qualifier in order_by.group(1) for qualifier in qualifiers)
+    sorted_in_memory = any('USE TEMP B-TREE FOR ORDER BY' in line or _PG_SORT_RE.search(line) for line in plan)
+    stops_early = ' LIMIT ' in sql and not sorted_in_memory
+
+    problems = []
+    for line in plan:
+        line = line.strip()
+        match = _SQLITE_SCAN_RE.match(line)
+        if match:
+            table = aliases.get(match.group(1), match.group(1))
+            if table in tables and not match.group(2) and not stops_early:
+                problems.append(f"full scan of {table}")
+            continue
+        match = _PG_SEQ_SCAN_RE.search(line)
+        if match:
+            if match.group(1) in tables and not stops_early:
+                problems.append(f"full scan of {match.group(1)}")
+        elif sorts_hot_table and ('USE TEMP B-TREE FOR ORDER BY' in line or _PG_SORT_RE.search(line)):
+            problems.append("ORDER BY not served by an index")
+    return problems
@@ -0,0 +1,44 @@
+"""
+Per-user ranked recommendation lists for infinite scroll
+
+The first "recommended" page runs the engine once for a deep list and stores
+it as packed int64 ids under the user's cache key; later pages slice that
+list instead of re-running the engine. Rating or watchlist changes drop it.
+"""
+from array import array
+
+from django.core.cache import cache
+
+from .models import Movie
+from .recommender_engine import HybridRecommender
+
+RECOMMENDED_DEPTH = 200
+RECOMMENDED_TTL = 15 * 60  # seconds
+
+
+def _cache_key(user_id):
+    return f"recommended_ranking_{user_id}"
+
+
+def get_recommended_ids(user_id):
+    """Ranked movie ids for `user_id`, computed at most once per TTL"""
+    packed = cache.get(_cache_key(user_id))
+    if packed is not None:
+        return array('q', packed).tolist()
+
+    try:
+        recommender = HybridRecommender()
+        movie_ids = [int(movie_id) for movie_id in recommender.get_recommendations(
+            user_id=user_id,
+            n=RECOMMENDED_DEPTH
+        )]
+    except Exception as e:
+        # Fallback: most popular movies; not cached so the engine is retried next time
+        return list(Movie.objects.order_by('-rating_count', '-id').values_list('id', flat=True)[:RECOMMENDED_DEPTH])
+
+    cache.set(_cache_key(user_id), array('q', movie_ids).tobytes(), RECOMMENDED_TTL)
+    return movie_ids
+
+
+def invalidate_recommended_ids(user_id):
+    cache.delete(_cache_key(user_id))
@@ -0,0 +1,89 @@
+"""
+Bulk rating upserts for the batch rating endpoint
+
+A batch of (movie_id, rating) pairs is validated with RatingForm, written
+with one INSERT ... ON CONFLICT statement, and the movie aggregates are moved
+by the per-movie differences in one UPDATE. Receivers get a single
+ratings_changed signal for the whole batch instead of one post_save per row.
+"""
+from django.db import transaction
+
+from .forms import RatingForm
+from .models import Movie, Rating
+from .signals import apply_rating_deltas, ratings_changed
+
+MAX_BATCH_SIZE = 200
+
+
+def clean_ratings(items):
+    """
+    Validate raw {'movie_id', 'rating'} items
+
+    Later entries for the same movie replace earlier ones, so a client can
+    flush its buffer as-is.
+
+    Returns:
+        (ratings, errors): dict movie_id -> rating value, and dict of
+        str(movie_id or position) -> list of error messages
+    """
+    ratings = {}
+    errors = {}
+    for position, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors[str(position)] = ['Expected an object with movie_id and rating']
+            continue
+        movie_id = item.get('movie_id')
+        if isinstance(movie_id, bool) or not isinstance(movie_id, int):
+            errors[str(position)] = ['Invalid movie_id']
+            continue
+        form = RatingForm({'rating': item.get('rating')})
+        if not form.is_valid():
+            errors[str(movie_id)] = form.errors['rating']
+            continue
+        ratings[movie_id] = form.cleaned_data['rating']
+
+    existing = set(Movie.objects.filter(id__in=ratings.keys()).values_list('id', flat=True))
+    for movie_id in list(ratings):
+        if movie_id not in existing:
+            errors[str(movie_id)] = ['Movie not found']
+            del ratings[movie_id]
+    return ratings, errors
+
+
+def save_ratings(user, ratings):
+    """
+    Create or update `user`'s ratings in bulk
+
+    Args:
+        user: The rating user
+        ratings: dict mapping movie_id -> rating value (already validated)
+
+    Returns:
+        Number of ratings written
+    """
+    if not ratings:
+        return 0
+
+    with transaction.atomic():
+        previous = dict(
+            Rating.objects.select_for_update().filter(
+                user=user, movie_id__in=ratings.keys()
+            ).values_list('movie_id', 'rating')
+        )
+        Rating.objects.bulk_create(
+            [Rating(user=user, movie_id=movie_id, rating=value) for movie_id, value in ratings.items()],
+            update_conflicts=True,
+            unique_fields=['user', 'movie'],
+            update_fields=['rating'],
+        )
+
+        deltas = {}
+        for movie_id, value in ratings.items():
+            if movie_id not in previous:
+                deltas[movie_id] = (1, value)
+            elif value != previous[movie_id]:
+                deltas[movie_id] = (0, value - previous[movie_id])
+        apply_rating_deltas(deltas)
+
+    ratings_changed.send(sender=Rating, user_id=user.id, movie_ids=list(ratings))
+    return len(ratings)
@@ -4,14 +4,23 @@ from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 from surprise import SVD, Dataset, Reader
 from surprise.model_selection import train_test_split
-from django.db import connection
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
 import pickle
 import os
 from pathlib import Path
-from .models import Movie, Rating, Watchlist
+from .models import Movie, MovieSimilarity, Rating, Watchlist
+from .snapshot import load_snapshot
+from .versions import CATALOG, bump_version
 from django.contrib.auth.models import User
 
 
+SIMILAR_MOVIES_PER_MOVIE = 10
+# Cache key of movie_detail's "MovieSimilarity is empty" check
+SIMILARITY_EMPTY_KEY = 'movie_similarity_empty'
+
+
 class HybridRecommender:
     def __init__(self):
         self.movies_df = None
@@ -20,7 +29,7 @@ class HybridRecommender:
         self.tfidf_matrix = None
         self.content_similarity = None
         self.svd_model = None
-        self.cache_dir = Path('recommender/cache')
+        self.cache_dir = Path(getattr(settings, 'RECOMMENDER_CACHE_DIR', 'recommender/cache'))
         self.cache_dir.mkdir(exist_ok=True)
         
         # Tải dữ liệu và xây dựng mô hình
@@ -29,7 +38,17 @@ class HybridRecommender:
         self._build_collaborative_model()
     
     def _load_data(self):
-        """Tải dữ liệu từ cơ sở dữ liệu sử dụng pandas"""
+        """Tải dữ liệu từ snapshot dạng cột (manage.py export_snapshot) nếu có, nếu không thì từ cơ sở dữ liệu"""
+        snapshot = load_snapshot()
+        if snapshot is not None:
+            print(f"Đang tải dữ liệu từ snapshot ({snapshot.age / 3600:.1f} giờ trước)...")
+            self.movies_df = snapshot.movies
+            # Đánh giá và danh sách theo dõi mới hơn snapshot được đọc trực tiếp từ cơ sở dữ liệu
+            self.ratings_df = snapshot.with_new_rows('ratings')
+            self.watchlist_df = snapshot.with_new_rows('watchlist')
+            print(f"Đã tải {len(self.movies_df)} phim, {len(self.ratings_df)} đánh giá, và {len(self.watchlist_df)} mục trong danh sách theo dõi")
+            return
+        
         print("Đang tải dữ liệu từ cơ sở dữ liệu...")
         
         # Tải phim
@@ -63,10 +82,13 @@ class HybridRecommender:
             print("Loading cached content model...")
             with open(cache_file, 'rb') as f:
                 cache_data = pickle.load(f)
+            # A model cached before movies were added or removed no longer lines up with movies_df
+            if cache_data['similarity'].shape[0] == len(self.movies_df):
                 self.tfidf_vectorizer = cache_data['vectorizer']
                 self.tfidf_matrix = cache_data['matrix']
                 self.content_similarity = cache_data['similarity']
-            return
+                return
+            print("Cached content model does not match the movie table, rebuilding...")
         
         print("Building content-based model...")
         
@@ -97,6 +119,69 @@ class HybridRecommender:
         
         print("Content-based model built and cached")
     
+    def store_movie_similarities(self, k=SIMILAR_MOVIES_PER_MOVIE, block_size=1000, batch_size=5000):
+        """
+        Materialize the top-k content neighbours of every movie into MovieSimilarity
+        
+        Rows of the similarity matrix are processed in blocks with argpartition,
+        so this never sorts a full row. The whole table is replaced, so this
+        runs as a deploy/import step (manage.py build_movie_similarities,
+        called by import_csv_data.py), never from a request.
+        
+        Returns:
+            Number of MovieSimilarity rows written
+        """
+        n_movies = len(self.movies_df)
+        if self.content_similarity is None or self.content_similarity.shape[0] != n_movies:
+            print("Content model does not match the movie table, skipping similarity table")
+            return 0
+        
+        k = min(k, n_movies - 1)
+        if k <= 0:
+            return 0
+        
+        movie_ids = self.movies_df['id'].to_numpy()
+        print(f"Storing top {k} similar movies for {n_movies} movies...")
+        
+        with transaction.atomic():
+            MovieSimilarity.objects.all().delete()
+            
+            batch = []
+            written = 0
+            for start in range(0, n_movies, block_size):
+                block = np.array(self.content_similarity[start:start + block_size], dtype=np.float64)
+                rows = np.arange(block.shape[0])
+                block[rows, rows + start] = -np.inf  # A movie is not its own neighbour
+                
+                top = np.argpartition(-block, k - 1, axis=1)[:, :k]
+                top_scores = block[rows[:, None], top]
+                order = np.argsort(-top_scores, axis=1)
+                top = np.take_along_axis(top, order, axis=1)
+                top_scores = np.take_along_axis(top_scores, order, axis=1)
+                
+                for i in rows:
+                    movie_id = int(movie_ids[start + i])
+                    for rank in range(k):
+                        batch.append(MovieSimilarity(
+                            movie_id=movie_id,
+                            neighbor_id=int(movie_ids[top[i, rank]]),
+                            score=float(top_scores[i, rank]),
+                            rank=rank + 1
+                        ))
+                
+                if len(batch) >= batch_size:
+                    MovieSimilarity.objects.bulk_create(batch, batch_size=batch_size)
+                    written += len(batch)
+                    batch = []
+            
+            MovieSimilarity.objects.bulk_create(batch, batch_size=batch_size)
+            written += len(batch)
+        
+        bump_version(CATALOG)
+        cache.delete(SIMILARITY_EMPTY_KEY)
+        print(f"Stored {written} movie similarities")
+        return written
+    
     def _build_collaborative_model(self):
         """Build collaborative filtering model using SVD"""
         cache_file = self.cache_dir / 'svd_model.pkl'
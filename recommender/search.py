@@ -0,0 +1,177 @@
+"""
+Full-text search backends for movie lookups
+
+SQLite uses an external-content FTS5 table kept in sync with recommender_movie
+by triggers; PostgreSQL uses a weighted tsvector expression with a GIN index.
+Both return movie ids ranked by relevance, with every query term matched as a
+prefix so partially typed words still hit.
+"""
+import re
+
+from django.db import connections
+from django.db.models import Q
+
+from .models import Movie
+
+SEARCH_RESULT_LIMIT = 500
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize_query(query):
+    """Split a raw user query into lowercase word tokens"""
+    return TOKEN_RE.findall((query or '').lower())
+
+
+class LikeSearchBackend:
+    """Fallback for databases without a full-text index (unranked LIKE scan)"""
+
+    def __init__(self, using='default'):
+        self.using = using
+
+    def install(self):
+        pass
+
+    def rebuild(self):
+        pass
+
+    def search(self, query, limit=SEARCH_RESULT_LIMIT):
+        tokens = tokenize_query(query)
+        if not tokens:
+            return []
+        movies = Movie.objects.using(self.using)
+        for token in tokens:
+            movies = movies.filter(
+                Q(title__icontains=token) | Q(director__icontains=token) |
+                Q(overview__icontains=token) | Q(genre__icontains=token)
+            )
+        return list(movies.order_by('title', 'id').values_list('id', flat=True)[:limit])
+
+
+class SQLiteFTSBackend(LikeSearchBackend):
+    """FTS5 index over title, director, overview and genre, ranked with bm25"""
+
+    table = 'recommender_movie_fts'
+    columns = ('title', 'director', 'overview', 'genre')
+    # bm25 column weights, in the same order as `columns`
+    weights = (10.0, 4.0, 1.0, 2.0)
+
+    def _triggers(self):
+        cols = ', '.join(self.columns)
+        new_values = ', '.join(f'new.{c}' for c in self.columns)
+        old_values = ', '.join(f'old.{c}' for c in self.columns)
+        insert = f"INSERT INTO {self.table}(rowid, {cols}) VALUES (new.id, {new_values});"
+        delete = (
+            f"INSERT INTO {self.table}({self.table}, rowid, {cols}) "
+            f"VALUES ('delete', old.id, {old_values});"
+        )
+        return {
+            f'{self.table}_ai': f"AFTER INSERT ON recommender_movie BEGIN {insert} END",
+            f'{self.table}_ad': f"AFTER DELETE ON recommender_movie BEGIN {delete} END",
+            f'{self.table}_au': (
+                f"AFTER UPDATE OF {cols} ON recommender_movie BEGIN {delete} {insert} END"
+            ),
+        }
+
+    def install(self):
+        """
+        Create the FTS table and triggers if they are missing
+
+        Django rebuilds SQLite tables for many schema changes, which drops the
+        triggers along with the old table, so this runs after every migrate and
+        re-indexes whenever a trigger had to be recreated.
+        """
+        connection = connections[self.using]
+        triggers = self._triggers()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger') AND name LIKE %s",
+                [f'{self.table}%']
+            )
+            existing = {row[0] for row in cursor.fetchall()}
+
+            if self.table not in existing:
+                cursor.execute(
+                    f"CREATE VIRTUAL TABLE {self.table} USING fts5("
+                    f"{', '.join(self.columns)}, "
+                    f"content='recommender_movie', content_rowid='id', "
+                    f"tokenize='unicode61 remove_diacritics 2', prefix='2 3 4')"
+                )
+
+            missing = [name for name in triggers if name not in existing]
+            for name in missing:
+                cursor.execute(f"CREATE TRIGGER {name} {triggers[name]}")
+
+        if missing:
+            self.rebuild()
+
+    def rebuild(self):
+        """Re-index every movie (needed after bulk loads that bypassed triggers)"""
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(f"INSERT INTO {self.table}({self.table}) VALUES ('rebuild')")
+
+    def search(self, query, limit=SEARCH_RESULT_LIMIT):
+        tokens = tokenize_query(query)
+        if not tokens:
+            return []
+        match = ' '.join(f'"{token}"*' for token in tokens)
+        weights = ', '.join(str(w) for w in self.weights)
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s "
+                f"ORDER BY bm25({self.table}, {weights}), rowid LIMIT %s",
+                [match, limit]
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+class PostgresSearchBackend(LikeSearchBackend):
+    """Weighted tsvector over title, director, overview and genre with a GIN index"""
+
+    index_name = 'recommender_movie_search_gin'
+    document = (
+        "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('simple', coalesce(director, '')), 'B') || "
+        "setweight(to_tsvector('simple', coalesce(genre, '')), 'C') || "
+        "setweight(to_tsvector('simple', coalesce(overview, '')), 'D')"
+    )
+
+    def install(self):
+        # An expression index is maintained by PostgreSQL itself, no triggers needed
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {self.index_name} "
+                f"ON recommender_movie USING GIN (({self.document}))"
+            )
+
+    def search(self, query, limit=SEARCH_RESULT_LIMIT):
+        tokens = tokenize_query(query)
+        if not tokens:
+            return []
+        tsquery = ' & '.join(f'{token}:*' for token in tokens)
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(
+                f"SELECT id FROM recommender_movie "
+                f"WHERE ({self.document}) @@ to_tsquery('simple', %s) "
+                f"ORDER BY ts_rank(({self.document}), to_tsquery('simple', %s)) DESC, id "
+                f"LIMIT %s",
+                [tsquery, tsquery, limit]
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+BACKENDS = {
+    'sqlite': SQLiteFTSBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+
+def get_search_backend(using='default'):
+    """Return the full-text backend matching the database vendor"""
+    vendor = connections[using].vendor
+    return BACKENDS.get(vendor, LikeSearchBackend)(using)
+
+
+def search_movie_ids(query, limit=SEARCH_RESULT_LIMIT):
+    """Movie ids matching `query`, best match first"""
+    return get_search_backend().search(query, limit)
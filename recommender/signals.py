@@ -0,0 +1,133 @@
+from django.db.models import Case, F, FloatField, IntegerField, Value, When
+from django.db.models.functions import NullIf
+from django.db.models.signals import m2m_changed, post_delete, post_migrate, post_save
+from django.dispatch import Signal, receiver
+
+from . import typeahead
+from .models import Movie, Rating, Watchlist
+from .ranked_lists import invalidate_recommended_ids
+from .search import get_search_backend
+from .versions import AGGREGATES, CATALOG, bump_version, movie_scope, touch_version, user_scope
+
+# Sent once per batch of ratings saved in bulk (which bypasses post_save),
+# with keyword arguments user_id and movie_ids
+ratings_changed = Signal()
+
+
+@receiver(post_save, sender=Movie)
+def sync_movie_genres(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Keep the normalized Genre links in step with Movie.genre"""
+    if raw:
+        return
+    if update_fields is not None and 'genre' not in update_fields:
+        return
+    instance.sync_genres()
+
+
+@receiver(post_save, sender=Movie)
+def update_typeahead_index(sender, instance, raw=False, **kwargs):
+    if not raw:
+        typeahead.movie_changed(instance)
+
+
+@receiver(post_delete, sender=Movie)
+def remove_from_typeahead_index(sender, instance, **kwargs):
+    typeahead.movie_removed(instance.id)
+
+
+@receiver(post_save, sender=Movie)
+@receiver(post_delete, sender=Movie)
+@receiver(m2m_changed, sender=Movie.genres.through)
+def bump_catalog_version(sender, raw=False, **kwargs):
+    if not raw:
+        bump_version(CATALOG)
+
+
+@receiver(post_migrate)
+def install_search_index(sender, using='default', **kwargs):
+    """(Re)create the full-text index once this app's tables exist"""
+    if sender.name != 'recommender':
+        return
+    get_search_backend(using).install()
+
+
+def apply_rating_delta(movie_id, count_delta, sum_delta):
+    """Adjust a movie's rating aggregates in a single UPDATE"""
+    new_count = F('rating_count') + count_delta
+    new_sum = F('rating_sum') + sum_delta
+    Movie.objects.filter(pk=movie_id).update(
+        rating_count=new_count,
+        rating_sum=new_sum,
+        avg_rating=new_sum / NullIf(new_count, 0),
+    )
+    typeahead.movie_rerated(movie_id, count_delta)
+    bump_version(movie_scope(movie_id))
+    touch_version(AGGREGATES)
+
+
+def apply_rating_deltas(deltas):
+    """
+    Adjust the aggregates of several movies in a single UPDATE
+
+    Args:
+        deltas: dict mapping movie_id -> (count_delta, sum_delta)
+    """
+    if not deltas:
+        return
+    count_delta = Case(
+        *[When(pk=movie_id, then=Value(count)) for movie_id, (count, _) in deltas.items()],
+        default=Value(0), output_field=IntegerField()
+    )
+    sum_delta = Case(
+        *[When(pk=movie_id, then=Value(float(total))) for movie_id, (_, total) in deltas.items()],
+        default=Value(0.0), output_field=FloatField()
+    )
+    new_count = F('rating_count') + count_delta
+    new_sum = F('rating_sum') + sum_delta
+    Movie.objects.filter(pk__in=deltas.keys()).update(
+        rating_count=new_count,
+        rating_sum=new_sum,
+        avg_rating=new_sum / NullIf(new_count, 0),
+    )
+    for movie_id, (count, _) in deltas.items():
+        typeahead.movie_rerated(movie_id, count)
+    bump_version(*[movie_scope(movie_id) for movie_id in deltas])
+    touch_version(AGGREGATES)
+
+
+@receiver(post_save, sender=Rating)
+def add_rating_to_aggregates(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    stored = getattr(instance, '_stored_rating', None)
+    if created:
+        apply_rating_delta(instance.movie_id, 1, instance.rating)
+    elif stored is None:
+        # Updated through an instance that wasn't loaded from the database
+        Movie.objects.filter(pk=instance.movie_id).refresh_rating_aggregates()
+    elif instance.rating != stored:
+        apply_rating_delta(instance.movie_id, 0, instance.rating - stored)
+    instance._stored_rating = instance.rating
+
+
+@receiver(post_delete, sender=Rating)
+def remove_rating_from_aggregates(sender, instance, **kwargs):
+    stored = getattr(instance, '_stored_rating', None)
+    apply_rating_delta(instance.movie_id, -1, -(instance.rating if stored is None else stored))
+
+
+@receiver(post_save, sender=Rating)
+@receiver(post_delete, sender=Rating)
+@receiver(post_save, sender=Watchlist)
+@receiver(post_delete, sender=Watchlist)
+def drop_recommended_ranking(sender, instance, raw=False, **kwargs):
+    """The user's cached recommendation list and page versions are out of date"""
+    if not raw:
+        invalidate_recommended_ids(instance.user_id)
+        bump_version(user_scope(instance.user_id))
+
+
+@receiver(ratings_changed)
+def drop_recommended_ranking_for_batch(sender, user_id, **kwargs):
+    invalidate_recommended_ids(user_id)
+    bump_version(user_scope(user_id))
@@ -0,0 +1,315 @@
+"""
+Columnar snapshot of the tables the recommender trains on
+
+HybridRecommender used to read movies, ratings and watchlist with
+pd.read_sql_query on the live connection, pulling every row through the
+DB driver on each build. export_snapshot() instead copies them once, at
+one point in time, into column files under settings.SNAPSHOT_DIR:
+
+    <version>/ratings/user_id.npy      numeric and datetime columns
+    <version>/movies/title.offsets.npy text columns: UTF-8 bytes plus
+    <version>/movies/title.utf8        row offsets into them
+    <version>/meta.json                source database, row counts, time
+
+load_snapshot() memory-maps the current version (see versioned_store), so
+training and evaluation load 20M ratings in about a second without
+touching the database. A snapshot only applies to the database it was
+exported from, and only while that database still holds the exported
+rows: meta.json records each table's last exported id, and load_snapshot()
+rejects the snapshot when the live row at (or nearest below) that id is not
+the one exported, which is what a wipe and reseed (a full CSV import,
+populate_db, admin deletes) leaves behind.
+
+Ratings and watchlist entries added after the export are read from the
+database on each load (Snapshot.with_new_rows: rows with an id above the
+last exported one), so new users and ratings reach recommendations right
+away. Edits and deletions of exported rows show up with the next export.
+"""
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from .models import Movie, Rating, Watchlist
+from .versioned_store import CURRENT_FILE, current_version, new_version, publish_version
+
+TEXT = 'text'
+DATETIME = 'datetime64[s]'
+CHUNK_ROWS = 100000
+
+# Snapshot table -> (model, [(field name, column kind)]); kinds are NumPy dtypes or TEXT
+TABLES = {
+    'movies': (Movie, [('id', 'int64'), ('title', TEXT), ('genre', TEXT), ('overview', TEXT), ('tmdb_id', 'int64')]),
+    'ratings': (Rating, [('id', 'int64'), ('user_id', 'int32'), ('movie_id', 'int32'), ('rating', 'float32'),
+                         ('timestamp', DATETIME)]),
+    'watchlist': (Watchlist, [('id', 'int64'), ('user_id', 'int32'), ('movie_id', 'int32'), ('added_at', DATETIME)]),
+}
+
+# Columns that identify a row: a live row with an exported id but other values here was reseeded
+IDENTITY = {
+    'movies': ('title',),
+    'ratings': ('user_id', 'movie_id'),
+    'watchlist': ('user_id', 'movie_id'),
+}
+
+
+def snapshot_dir():
+    return str(getattr(settings, 'SNAPSHOT_DIR', os.path.join(settings.BASE_DIR, 'snapshot')))
+
+
+def _database_name(using):
+    return str(connections[using].settings_dict['NAME'])
+
+
+class _ArrayColumn:
+    def __init__(self, path, kind, count):
+        self.kind = kind
+        self.array = np.lib.format.open_memmap(f'{path}.npy', mode='w+', dtype=kind, shape=(count,))
+        self.position = 0
+
+    def convert(self, values):
+        return np.asarray(values, dtype=self.kind)
+
+    def write(self, values):
+        self.array[self.position:self.position + len(values)] = self.convert(values)
+        self.position += len(values)
+
+    def close(self):
+        self.array.flush()
+        del self.array
+
+
+def _datetimes(values, kind=DATETIME):
+    # SQLite returns ISO strings, other backends datetimes; both are UTC
+    return pd.to_datetime(pd.Series(values, dtype=object), utc=True, format='ISO8601').dt.tz_localize(None).to_numpy(kind)
+
+
+class _DatetimeColumn(_ArrayColumn):
+    def convert(self, values):
+        return _datetimes(values, self.kind)
+
+
+class _TextColumn:
+    def __init__(self, path, kind, count):
+        self.offsets = np.lib.format.open_memmap(f'{path}.offsets.npy', mode='w+', dtype=np.int64, shape=(count + 1,))
+        self.offsets[0] = 0
+        self.data = open(f'{path}.utf8', 'wb')
+        self.position = 0
+
+    def write(self, values):
+        encoded = [(value or '').encode('utf-8') for value in values]
+        lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+        start = self.offsets[self.position]
+        self.offsets[self.position + 1:self.position + 1 + len(encoded)] = start + np.cumsum(lengths)
+        self.data.write(b''.join(encoded))
+        self.position += len(encoded)
+
+    def close(self):
+        self.offsets.flush()
+        del self.offsets
+        self.data.close()
+
+
+def _export_table(cursor, model, columns, directory, chunk_rows):
+    table = model._meta.db_table
+    os.makedirs(directory)
+    cursor.execute(f'SELECT COUNT(*) FROM "{table}"')
+    count = cursor.fetchone()[0]
+
+    writers = []
+    for name, kind in columns:
+        column_class = _TextColumn if kind == TEXT else _DatetimeColumn if kind == DATETIME else _ArrayColumn
+        writers.append(column_class(os.path.join(directory, name), kind, count))
+
+    select = ', '.join(f'"{model._meta.get_field(name).column}"' for name, _ in columns)
+    pk = model._meta.pk.column
+    cursor.execute(f'SELECT {select} FROM "{table}" ORDER BY "{pk}"')
+    written = 0
+    while rows := cursor.fetchmany(chunk_rows):
+        for writer, values in zip(writers, zip(*rows)):
+            writer.write(values)
+        written += len(rows)
+    for writer in writers:
+        writer.close()
+    if written != count:
+        raise RuntimeError(f"{table}: read {written} rows, expected {count}")
+    return count
+
+
+def export_snapshot(directory=None, using=DEFAULT_DB_ALIAS, chunk_rows=CHUNK_ROWS):
+    """
+    Write movies, ratings and watchlist to a new snapshot version and make it current
+
+    All tables are read in one transaction, so they're consistent with each
+    other (on PostgreSQL it runs at REPEATABLE READ; on SQLite the read
+    transaction holds one view of the database until it ends).
+
+    Args:
+        directory: Snapshot location (default settings.SNAPSHOT_DIR)
+        using: Database alias to export
+        chunk_rows: Rows fetched from the cursor at a time
+
+    Returns:
+        dict of snapshot table -> row count
+    """
+    directory = directory or snapshot_dir()
+    connection = connections[using]
+    version = new_version(directory)
+    counts = {}
+    try:
+        with transaction.atomic(using=using), connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY")
+            for name, (model, columns) in TABLES.items():
+                counts[name] = _export_table(cursor, model, columns, os.path.join(version, name), chunk_rows)
+    except BaseException:
+        shutil.rmtree(version, ignore_errors=True)
+        raise
+
+    # Tables are exported in primary key order, so the last id is the highest (0: empty table)
+    last_ids = {}
+    for name in TABLES:
+        ids = np.load(os.path.join(version, name, 'id.npy'), mmap_mode='r')
+        last_ids[name] = int(ids[-1]) if len(ids) else 0
+    with open(os.path.join(version, 'meta.json'), 'w') as f:
+        json.dump({
+            'database': _database_name(using), 'created_at': time.time(), 'rows': counts, 'last_ids': last_ids,
+        }, f)
+    publish_version(directory, version)
+    return counts
+
+
+def discard_snapshot(directory=None):
+    """Remove every snapshot version, e.g. after the tables it was exported from were cleared"""
+    directory = directory or snapshot_dir()
+    if not os.path.isdir(directory):
+        return
+    # CURRENT first, so readers stop picking up a version while it's being removed
+    for entry in sorted(os.listdir(directory), key=lambda entry: entry != CURRENT_FILE):
+        path = os.path.join(directory, entry)
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            os.remove(path)
+
+
+class Snapshot:
+    def __init__(self, version):
+        self.version = version
+        with open(os.path.join(version, 'meta.json')) as f:
+            self.meta = json.load(f)
+
+    @property
+    def age(self):
+        """Seconds since the snapshot was exported"""
+        return time.time() - self.meta['created_at']
+
+    def _text(self, path):
+        offsets = np.load(f'{path}.offsets.npy')
+        with open(f'{path}.utf8', 'rb') as f:
+            data = f.read()
+        return [data[start:end].decode('utf-8') for start, end in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+
+    def table(self, name):
+        """One snapshot table as a DataFrame (numeric columns memory-mapped where pandas allows)"""
+        _, columns = TABLES[name]
+        directory = os.path.join(self.version, name)
+        data = {}
+        for column, kind in columns:
+            path = os.path.join(directory, column)
+            data[column] = self._text(path) if kind == TEXT else np.load(f'{path}.npy', mmap_mode='r')
+        return pd.DataFrame(data, columns=[column for column, _ in columns])
+
+    def _value(self, name, column, position):
+        """One exported value, without loading the whole column"""
+        kind = dict(TABLES[name][1])[column]
+        path = os.path.join(self.version, name, column)
+        if kind != TEXT:
+            return np.load(f'{path}.npy', mmap_mode='r')[position].item()
+        offsets = np.load(f'{path}.offsets.npy', mmap_mode='r')
+        start, end = int(offsets[position]), int(offsets[position + 1])
+        with open(f'{path}.utf8', 'rb') as f:
+            f.seek(start)
+            return f.read(end - start).decode('utf-8')
+
+    def matches(self, using=DEFAULT_DB_ALIAS):
+        """
+        Whether database `using` still holds the exported rows
+
+        For each table, the live row with the highest id up to the last
+        exported one must be an exported row with the same IDENTITY values.
+        Rows deleted since the export are fine; a cleared or reseeded table
+        (ids restarted, other rows under the same ids) is not.
+        """
+        last_ids = self.meta.get('last_ids')
+        if last_ids is None:
+            return False
+        for name, last_id in last_ids.items():
+            if not last_id:
+                continue
+            model, _ = TABLES[name]
+            columns = IDENTITY[name]
+            live = model.objects.using(using).filter(pk__lte=last_id).order_by('-pk').values_list('pk', *columns).first()
+            if live is None:
+                return False
+            ids = np.load(os.path.join(self.version, name, 'id.npy'), mmap_mode='r')
+            position = int(np.searchsorted(ids, live[0]))
+            if position == len(ids) or ids[position] != live[0]:
+                return False
+            if tuple(self._value(name, column, position) for column in columns) != tuple(live[1:]):
+                return False
+        return True
+
+    def new_rows(self, name, using=DEFAULT_DB_ALIAS):
+        """Rows of table `name` added to the database since the export, in the snapshot's column types"""
+        model, columns = TABLES[name]
+        rows = list(
+            model.objects.using(using).filter(pk__gt=self.meta['last_ids'][name]).order_by('pk')
+            .values_list(*(column for column, _ in columns))
+        )
+        values = list(zip(*rows)) or [()] * len(columns)
+        data = {}
+        for (column, kind), column_values in zip(columns, values):
+            if kind == TEXT:
+                data[column] = [value or '' for value in column_values]
+            elif kind == DATETIME:
+                data[column] = _datetimes(column_values, kind)
+            else:
+                data[column] = np.asarray(column_values, dtype=kind)
+        return pd.DataFrame(data, columns=[column for column, _ in columns])
+
+    def with_new_rows(self, name, using=DEFAULT_DB_ALIAS):
+        """The snapshot table followed by the rows added since the export"""
+        table = self.table(name)
+        added = self.new_rows(name, using)
+        if added.empty:
+            return table
+        return pd.concat([table, added], ignore_index=True)
+
+    @property
+    def movies(self):
+        return self.table('movies')
+
+    @property
+    def ratings(self):
+        return self.table('ratings')
+
+    @property
+    def watchlist(self):
+        return self.table('watchlist')
+
+
+def load_snapshot(directory=None, using=DEFAULT_DB_ALIAS):
+    """The current snapshot of database `using`, or None if there is none or the tables changed under it"""
+    version = current_version(directory or snapshot_dir())
+    if version is None:
+        return None
+    snapshot = Snapshot(version)
+    if snapshot.meta['database'] != _database_name(using) or not snapshot.matches(using):
+        return None
+    return snapshot
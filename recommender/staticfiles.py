@@ -0,0 +1,138 @@
+"""
+Static asset pipeline run by collectstatic
+
+BundledManifestStorage extends Django's ManifestStaticFilesStorage:
+
+1. concatenates and minifies the bundles listed in settings.STATIC_BUNDLES
+   (rjsmin / rcssmin are used when installed, otherwise a whitespace and
+   comment stripper that keeps line breaks, so JS semicolon insertion is
+   unaffected),
+2. lets the manifest storage content-hash every file for far-future caching,
+3. writes .gz (and .br when the `brotli` package is installed) next to each
+   compressible file, for PrecompressedStaticMiddleware or a web server to
+   serve by Accept-Encoding.
+
+Templates reference bundles through {% bundle %} (recommender.templatetags.assets).
+"""
+import gzip
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+try:
+    import rjsmin
+except ImportError:  # optional dependency
+    rjsmin = None
+
+try:
+    import rcssmin
+except ImportError:  # optional dependency
+    rcssmin = None
+
+COMPRESSIBLE_EXTENSIONS = ('.js', '.css', '.svg', '.json', '.txt', '.html', '.map')
+# Files smaller than this gain nothing from compression
+MIN_COMPRESS_SIZE = 256
+
+CSS_COMMENT_RE = re.compile(r'/\*.*?\*/', re.DOTALL)
+CSS_SPACE_RE = re.compile(r'\s+')
+CSS_PUNCTUATION_RE = re.compile(r'\s*([{};])\s*')
+JS_LINE_COMMENT_RE = re.compile(r'^\s*//.*$')
+
+
+def get_bundles():
+    """settings.STATIC_BUNDLES: bundle path -> list of source paths, in load order"""
+    return getattr(settings, 'STATIC_BUNDLES', {})
+
+
+def minify_css(source):
+    if rcssmin is not None:
+        return rcssmin.cssmin(source)
+    source = CSS_COMMENT_RE.sub('', source)
+    source = CSS_SPACE_RE.sub(' ', source)
+    return CSS_PUNCTUATION_RE.sub(r'\1', source).strip()
+
+
+def minify_js(source):
+    if rjsmin is not None:
+        return rjsmin.jsmin(source)
+    lines = []
+    for line in source.splitlines():
+        if JS_LINE_COMMENT_RE.match(line):
+            continue
+        line = line.strip()
+        if line:
+            lines.append(line)
+    return '\n'.join(lines)
+
+
+def build_bundle(name, sources, read):
+    """
+    Concatenate and minify `sources` into the text of bundle `name`
+
+    Args:
+        read: callable returning the text of a source path
+    """
+    if name.endswith('.css'):
+        return '\n'.join(minify_css(read(source)) for source in sources) + '\n'
+    # A ';' between files keeps one file's last statement from running into the next
+    return '\n;\n'.join(minify_js(read(source)) for source in sources) + '\n'
+
+
+def compress_variants(data):
+    """Yield (suffix, bytes) for every precompressed variant worth storing"""
+    if len(data) < MIN_COMPRESS_SIZE:
+        return
+    gz = gzip.compress(data, compresslevel=9, mtime=0)
+    if len(gz) < len(data):
+        yield '.gz', gz
+    if brotli is not None:
+        br = brotli.compress(data, quality=11)
+        if len(br) < len(data):
+            yield '.br', br
+
+
+class BundledManifestStorage(ManifestStaticFilesStorage):
+    # Missing manifest entries (e.g. before collectstatic) raise ValueError
+    # and the {% bundle %} tag falls back to the individual source files
+    manifest_strict = True
+
+    def _read_text(self, name):
+        with self.open(name) as f:
+            return f.read().decode('utf-8')
+
+    def _write(self, name, data):
+        if self.exists(name):
+            self.delete(name)
+        self._save(name, ContentFile(data))
+
+    def post_process(self, paths, dry_run=False, **options):
+        if dry_run:
+            return
+
+        paths = dict(paths)
+        for name, sources in get_bundles().items():
+            self._write(name, build_bundle(name, sources, self._read_text).encode('utf-8'))
+            paths[name] = (self, name)
+            yield name, name, True
+
+        written = set()
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            yield name, hashed_name, processed
+            if not isinstance(processed, Exception):
+                written.add(name)
+                if hashed_name:
+                    written.add(hashed_name)
+
+        for name in sorted(written):
+            if name.endswith(COMPRESSIBLE_EXTENSIONS) and self.exists(name):
+                with self.open(name) as f:
+                    data = f.read()
+                for suffix, compressed in compress_variants(data):
+                    self._write(name + suffix, compressed)
@@ -0,0 +1,42 @@
+from django import template
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.utils.html import format_html_join
+
+from recommender.staticfiles import get_bundles
+
+register = template.Library()
+
+
+def _url(path):
+    """Hashed URL when collectstatic has run, the plain static URL otherwise"""
+    try:
+        return staticfiles_storage.url(path)
+    except ValueError:
+        return settings.STATIC_URL + path
+
+
+def _bundle_urls(name):
+    sources = get_bundles().get(name)
+    if sources is None:
+        return [_url(name)]
+    if not settings.DEBUG:
+        try:
+            return [staticfiles_storage.url(name)]
+        except ValueError:
+            pass  # collectstatic hasn't built the bundle; serve the sources
+    return [_url(source) for source in sources]
+
+
+@register.simple_tag
+def bundle(name):
+    """
+    <script>/<link> tags for a bundle from settings.STATIC_BUNDLES
+
+    Renders the single hashed bundle after collectstatic, or one tag per
+    source file in DEBUG (and whenever the bundle hasn't been built).
+    """
+    urls = _bundle_urls(name)
+    if name.endswith('.css'):
+        return format_html_join('\n', '<link href="{}" rel="stylesheet">', ((url,) for url in urls))
+    return format_html_join('\n', '<script src="{}"></script>', ((url,) for url in urls))
@@ -0,0 +1,11 @@
+from django import template
+
+from recommender import posters
+
+register = template.Library()
+
+
+@register.simple_tag
+def poster_src(movie, size='card'):
+    """Local URL of `movie`'s poster at `size` (recommender.posters.poster_src)"""
+    return posters.poster_src(movie, size)
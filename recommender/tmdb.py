@@ -0,0 +1,186 @@
+"""
+TMDb movie details client for catalog enrichment (manage.py enrich_tmdb)
+
+Requests run on a thread pool, each thread reusing its own keep-alive
+session, and all of them draw from one token bucket so the pool never
+exceeds settings.TMDB_RATE requests per second. 429 and 5xx responses and
+connection errors are retried with exponential backoff (429 honours
+Retry-After).
+
+Raw responses are cached on disk by TMDb id (404s as an empty marker file),
+so a re-run only fetches movies it hasn't seen. settings.TMDB_API_URL can
+point the client at a local stub server in tests.
+"""
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+
+import requests
+from django.conf import settings
+
+POSTER_BASE_URL = 'https://image.tmdb.org/t/p/w500'
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TMDbError(Exception):
+    pass
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursts up to `capacity`"""
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1, rate))
+        self.tokens = self.capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, waiting for it if the bucket is empty"""
+        with self._lock:
+            now = self.clock()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # Reserve the token even when empty; the debt queues later callers behind this one
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+        if wait:
+            self.sleep(wait)
+
+
+class ResponseCache:
+    """Raw TMDb responses on disk: <dir>/<id % 1000>/<id>.json, or <id>.missing for 404s"""
+
+    def __init__(self, directory):
+        self.directory = str(directory)
+
+    def _path(self, tmdb_id, suffix):
+        return os.path.join(self.directory, f'{tmdb_id % 1000:03d}', f'{tmdb_id}{suffix}')
+
+    def get(self, tmdb_id):
+        """
+        Returns:
+            (True, data) on a hit - data is None for a cached 404 -
+            or (False, None) on a miss
+        """
+        try:
+            with open(self._path(tmdb_id, '.json'), 'rb') as f:
+                return True, json.loads(f.read())
+        except FileNotFoundError:
+            pass
+        if os.path.exists(self._path(tmdb_id, '.missing')):
+            return True, None
+        return False, None
+
+    def set(self, tmdb_id, body):
+        """Store a raw response body (None for a 404)"""
+        path = self._path(tmdb_id, '.json' if body is not None else '.missing')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(body or b'')
+        os.replace(tmp, path)
+
+
+class TMDbClient:
+    def __init__(self, api_key=None, base_url=None, rate=None, cache_dir=None, timeout=10,
+                 retries=4, backoff=0.5, sleep=time.sleep):
+        self.api_key = settings.TMDB_API_KEY if api_key is None else api_key
+        self.base_url = (base_url or settings.TMDB_API_URL).rstrip('/')
+        self.bucket = TokenBucket(rate or settings.TMDB_RATE, sleep=sleep)
+        self.cache = ResponseCache(cache_dir or settings.TMDB_CACHE_DIR)
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.sleep = sleep
+        self.requests_made = 0
+        self._local = threading.local()
+        self._count_lock = threading.Lock()
+
+    def _session(self):
+        """One keep-alive session per worker thread"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def _retry_delay(self, attempt, response=None):
+        if response is not None and response.headers.get('Retry-After', '').isdigit():
+            return int(response.headers['Retry-After'])
+        return self.backoff * (2 ** attempt) * (0.5 + random.random() / 2)
+
+    def _request(self, tmdb_id):
+        """GET /movie/<id>: the raw body, None for 404; raises TMDbError when retries run out"""
+        url = f'{self.base_url}/movie/{tmdb_id}'
+        params = {'api_key': self.api_key, 'language': 'en-US'}
+        for attempt in range(self.retries + 1):
+            self.bucket.acquire()
+            with self._count_lock:
+                self.requests_made += 1
+            response = None
+            try:
+                response = self._session().get(url, params=params, timeout=self.timeout)
+            except requests.RequestException as e:
+                error = str(e)
+            else:
+                if response.status_code == 200:
+                    return response.content
+                if response.status_code == 404:
+                    return None
+                if response.status_code not in RETRY_STATUSES:
+                    raise TMDbError(f"TMDb {tmdb_id}: HTTP {response.status_code}")
+                error = f"HTTP {response.status_code}"
+            if attempt < self.retries:
+                self.sleep(self._retry_delay(attempt, response))
+        raise TMDbError(f"TMDb {tmdb_id}: giving up after {self.retries + 1} attempts ({error})")
+
+    def movie(self, tmdb_id):
+        """Movie details as a dict (None if TMDb doesn't know the id), cached on disk"""
+        hit, data = self.cache.get(tmdb_id)
+        if hit:
+            return data
+        body = self._request(tmdb_id)
+        self.cache.set(tmdb_id, body)
+        return json.loads(body) if body is not None else None
+
+    def movies(self, tmdb_ids, workers=8):
+        """
+        Fetch many movies concurrently
+
+        Yields:
+            (tmdb_id, details dict or None, TMDbError or None), in completion order
+        """
+        def fetch(tmdb_id):
+            try:
+                return tmdb_id, self.movie(tmdb_id), None
+            except TMDbError as e:
+                return tmdb_id, None, e
+
+        with ThreadPoolExecutor(workers, thread_name_prefix='tmdb') as pool:
+            # Bounded submission so a full catalog run doesn't queue every id up front
+            pending = set()
+            for tmdb_id in tmdb_ids:
+                pending.add(pool.submit(fetch, tmdb_id))
+                if len(pending) >= workers * 4:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+            for future in as_completed(pending):
+                yield future.result()
+
+
+def movie_fields(details):
+    """The Movie fields TMDb details provide: {'overview': ..., 'poster_url': ...} (empty values left out)"""
+    fields = {}
+    if details.get('overview'):
+        fields['overview'] = details['overview']
+    if details.get('poster_path'):
+        fields['poster_url'] = f"{POSTER_BASE_URL}{details['poster_path']}"
+    return fields
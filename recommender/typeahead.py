@@ -0,0 +1,220 @@
+"""
+In-process prefix index for search autocomplete
+
+Every normalized word of a movie's title and genres is indexed under each of
+its prefixes. Posting lists are kept sorted by popularity (rating_count,
+moved along with the aggregate updates in signals.py), so a query only
+walks the shortest posting list until it has enough matches and then returns
+JSON fragments that were serialized once at build time.
+"""
+import json
+import logging
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+
+from asgiref.sync import sync_to_async
+from django.db import DatabaseError
+
+from .models import Movie
+from .posters import poster_src
+from .search import TOKEN_RE
+
+logger = logging.getLogger(__name__)
+
+MIN_PREFIX = 2
+MAX_PREFIX = 15
+OVERVIEW_PREVIEW_LENGTH = 100
+
+
+def normalize(text):
+    """Lowercase and strip diacritics so 'Amélie' and 'amelie' match"""
+    decomposed = unicodedata.normalize('NFKD', (text or '').lower())
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(normalize(text))
+
+
+def movie_payload(movie):
+    """Compact JSON for one autocomplete result (same fields as search_api)"""
+    overview = movie.overview or ''
+    if len(overview) > OVERVIEW_PREVIEW_LENGTH:
+        overview = overview[:OVERVIEW_PREVIEW_LENGTH] + '...'
+    return json.dumps({
+        'id': movie.id,
+        'title': movie.title,
+        'genre': movie.genre,
+        'release_year': movie.release_year,
+        'poster_src': poster_src(movie, 'thumb'),
+        'overview': overview,
+    }, separators=(',', ':'))
+
+
+class TypeaheadIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._postings = {}   # prefix -> sorted list of (-popularity, movie_id)
+        self._entries = {}    # movie_id -> (sort_key, tokens, payload)
+        self.built = False
+
+    def build(self, movies=None):
+        """Index the whole catalog, ranked by Movie.rating_count"""
+        if movies is None:
+            movies = Movie.objects.only(
+                'id', 'title', 'genre', 'release_year', 'poster_url', 'poster_digest', 'overview', 'rating_count'
+            ).iterator(chunk_size=2000)
+
+        postings = {}
+        entries = {}
+        for movie in movies:
+            sort_key, tokens, payload = self._entry_for(movie, movie.rating_count)
+            entries[movie.id] = (sort_key, tokens, payload)
+            for prefix in self._prefixes(tokens):
+                postings.setdefault(prefix, []).append(sort_key)
+
+        for keys in postings.values():
+            keys.sort()
+
+        with self._lock:
+            self._postings = postings
+            self._entries = entries
+            self.built = True
+
+    def _entry_for(self, movie, popularity):
+        tokens = tuple(sorted(set(tokenize(movie.title) + tokenize(movie.genre))))
+        return (-(popularity or 0), movie.id), tokens, movie_payload(movie)
+
+    @staticmethod
+    def _prefixes(tokens):
+        prefixes = set()
+        for token in tokens:
+            for length in range(MIN_PREFIX, min(len(token), MAX_PREFIX) + 1):
+                prefixes.add(token[:length])
+        return prefixes
+
+    def update(self, movie):
+        """Re-index one movie"""
+        with self._lock:
+            self.remove(movie.id)
+            sort_key, tokens, payload = self._entry_for(movie, movie.rating_count)
+            self._entries[movie.id] = (sort_key, tokens, payload)
+            for prefix in self._prefixes(tokens):
+                insort(self._postings.setdefault(prefix, []), sort_key)
+
+    def rerank(self, movie_id, count_delta):
+        """Move a movie by a change in its rating_count (aggregates are updated with F(), not post_save)"""
+        with self._lock:
+            entry = self._entries.get(movie_id)
+            if entry is None or not count_delta:
+                return
+            old_key, tokens, payload = entry
+            new_key = (old_key[0] - count_delta, movie_id)
+            self._entries[movie_id] = (new_key, tokens, payload)
+            for prefix in self._prefixes(tokens):
+                keys = self._postings[prefix]
+                i = bisect_left(keys, old_key)
+                if i < len(keys) and keys[i] == old_key:
+                    del keys[i]
+                insort(keys, new_key)
+
+    def remove(self, movie_id):
+        with self._lock:
+            old = self._entries.pop(movie_id, None)
+            if old is None:
+                return
+            sort_key, tokens, _ = old
+            for prefix in self._prefixes(tokens):
+                keys = self._postings.get(prefix)
+                if not keys:
+                    continue
+                i = bisect_left(keys, sort_key)
+                if i < len(keys) and keys[i] == sort_key:
+                    del keys[i]
+                if not keys:
+                    del self._postings[prefix]
+
+    def search(self, query, limit=10):
+        """
+        Most popular movies whose title/genre words start with every query word
+
+        Returns:
+            List of JSON-encoded movie payloads
+        """
+        return [payload for _, payload in self.search_entries(query, limit)]
+
+    def search_entries(self, query, limit=10):
+        """Same as search(), as (movie_id, payload) pairs"""
+        terms = [t for t in tokenize(query) if len(t) >= MIN_PREFIX]
+        if not terms:
+            return []
+
+        with self._lock:
+            lists = [self._postings.get(term[:MAX_PREFIX], ()) for term in terms]
+            if not all(lists):
+                return []
+            # Walk the rarest term; verify the others against the entry's words
+            lists_and_terms = sorted(zip(lists, terms), key=lambda pair: len(pair[0]))
+            keys, first_term = lists_and_terms[0]
+            others = [term for _, term in lists_and_terms[1:]]
+            if len(first_term) > MAX_PREFIX:
+                others.append(first_term)
+
+            results = []
+            for _, movie_id in keys:
+                _, tokens, payload = self._entries[movie_id]
+                if all(any(token.startswith(term) for token in tokens) for term in others):
+                    results.append((movie_id, payload))
+                    if len(results) >= limit:
+                        break
+            return results
+
+
+_index = TypeaheadIndex()
+_build_lock = threading.Lock()
+
+
+def get_typeahead_index():
+    """Process-wide index, built from the catalog on first use"""
+    if not _index.built:
+        with _build_lock:
+            if not _index.built:
+                _index.build()
+    return _index
+
+
+async def aget_typeahead_index():
+    """get_typeahead_index() for async views; only the first build leaves the event loop"""
+    if _index.built:
+        return _index
+    return await sync_to_async(get_typeahead_index)()
+
+
+def reset_typeahead_index():
+    """Drop the index so the next lookup rebuilds it"""
+    global _index
+    _index = TypeaheadIndex()
+
+
+def warm_typeahead_index():
+    """Build the index at worker startup; skipped quietly if the DB isn't ready"""
+    try:
+        get_typeahead_index()
+    except DatabaseError as e:
+        logger.warning("Typeahead index not built at startup: %s", e)
+
+
+def movie_changed(movie):
+    if _index.built:
+        _index.update(movie)
+
+
+def movie_rerated(movie_id, count_delta):
+    if _index.built:
+        _index.rerank(movie_id, count_delta)
+
+
+def movie_removed(movie_id):
+    if _index.built:
+        _index.remove(movie_id)
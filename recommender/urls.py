@@ -17,5 +17,9 @@ urlpatterns = [
     path('watchlist/add/<int:movie_id>/', views.add_to_watchlist, name='add_to_watchlist'),
     # API endpoints for enhanced features
     path('api/search/', views.search_api, name='search_api'),
+    path('api/ratings/', views.rate_movies, name='rate_movies'),
     path('load-more/<str:category>/', views.load_more, name='load_more'),
+    # Locally cached, resized posters
+    path('posters/<str:digest>/<str:size>/', views.poster_file, name='poster_file'),
+    path('posters/movie/<int:movie_id>/<str:size>/', views.movie_poster, name='movie_poster'),
 ]
@@ -0,0 +1,101 @@
+"""
+Per-user state (own rating, watchlist flag) for a page of movies
+
+List views only ever show one page of movies, so instead of loading everything
+a user has rated, the state is fetched for exactly the ids on the page: one
+query for ratings and one for the watchlist, however many rows are shown.
+"""
+from .models import Rating, Watchlist
+
+
+def _state_queries(user, movie_ids):
+    ratings = Rating.objects.filter(
+        user=user, movie_id__in=movie_ids
+    ).values_list('movie_id', 'rating')
+    # order_by() drops Watchlist's default ordering, which would sort the rows for nothing
+    saved = Watchlist.objects.filter(
+        user=user, movie_id__in=movie_ids
+    ).order_by().values_list('movie_id', flat=True)
+    return ratings, saved
+
+
+def _merge_state(ratings, saved):
+    state = {}
+    for movie_id, rating in ratings:
+        state[movie_id] = {'rating': rating, 'in_watchlist': False}
+    for movie_id in saved:
+        state.setdefault(movie_id, {'rating': None})['in_watchlist'] = True
+    return state
+
+
+def get_user_movie_state(user, movie_ids):
+    """
+    Rating and watchlist state of `user` for the given movies
+
+    Args:
+        user: request.user (anonymous users get an empty dict, no queries)
+        movie_ids: Iterable of Movie ids on the current page
+
+    Returns:
+        dict mapping movie_id -> {'rating': float or None, 'in_watchlist': bool}
+        for movies the user has rated or saved; other ids are omitted
+    """
+    movie_ids = set(movie_ids)
+    if not movie_ids or not user.is_authenticated:
+        return {}
+    ratings, saved = _state_queries(user, movie_ids)
+    return _merge_state(list(ratings), list(saved))
+
+
+async def aget_user_movie_state(user, movie_ids):
+    """get_user_movie_state() for async views (`user` must already be loaded)"""
+    movie_ids = set(movie_ids)
+    if not movie_ids or not user.is_authenticated:
+        return {}
+    ratings, saved = _state_queries(user, movie_ids)
+    return _merge_state([row async for row in ratings], [row async for row in saved])
+
+
+def _apply_state(state, movie_lists):
+    for movies in movie_lists:
+        for movie in movies:
+            movie_state = state.get(movie.id, {})
+            movie.user_rating = movie_state.get('rating')
+            movie.in_watchlist = movie_state.get('in_watchlist', False)
+    return movie_lists[0] if len(movie_lists) == 1 else movie_lists
+
+
+def hydrate_movies(user, *movie_lists):
+    """
+    Set `user_rating` and `in_watchlist` on every Movie in `movie_lists`
+
+    All lists are hydrated together, so a page with several rows still costs
+    two queries. Querysets are evaluated; the hydrated lists are returned in
+    the same order as passed.
+    """
+    movie_lists = [list(movies) for movies in movie_lists]
+    state = get_user_movie_state(
+        user, (movie.id for movies in movie_lists for movie in movies)
+    )
+    return _apply_state(state, movie_lists)
+
+
+async def ahydrate_movies(user, *movie_lists):
+    """hydrate_movies() for async views; pass lists, not querysets"""
+    state = await aget_user_movie_state(
+        user, (movie.id for movies in movie_lists for movie in movies)
+    )
+    return _apply_state(state, list(movie_lists))
+
+
+def _state_json(state):
+    return {str(movie_id): movie_state for movie_id, movie_state in state.items()}
+
+
+def user_state_json(user, movie_ids):
+    """`user_state` for JSON responses, keyed by movie id as a string"""
+    return _state_json(get_user_movie_state(user, movie_ids))
+
+
+async def auser_state_json(user, movie_ids):
+    return _state_json(await aget_user_movie_state(user, movie_ids))
@@ -0,0 +1,51 @@
+"""
+Versioned on-disk stores of .npy files (tag genome, training snapshot)
+
+A build writes its files into a new version directory and then switches
+the CURRENT file to it, so readers never see half-written files. Readers
+memory-map the version CURRENT names and reopen when current_stamp()
+changes.
+"""
+import os
+import shutil
+import tempfile
+import time
+
+CURRENT_FILE = 'CURRENT'
+
+
+def new_version(directory):
+    """Create an empty version directory under `directory` and return its path"""
+    os.makedirs(directory, exist_ok=True)
+    return tempfile.mkdtemp(prefix=time.strftime('v%Y%m%d%H%M%S-'), dir=directory)
+
+
+def publish_version(directory, version):
+    """Make `version` current, then drop older versions (processes still mapping them keep their open files)"""
+    fd, tmp = tempfile.mkstemp(dir=directory)
+    with os.fdopen(fd, 'w') as f:
+        f.write(os.path.basename(version))
+    os.replace(tmp, os.path.join(directory, CURRENT_FILE))
+    for entry in os.listdir(directory):
+        path = os.path.join(directory, entry)
+        if os.path.isdir(path) and path != version:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def current_stamp(directory):
+    """Identity of the CURRENT file, changing whenever a version is published; None if there is none"""
+    current = os.path.join(directory, CURRENT_FILE)
+    try:
+        stat = os.stat(current)
+    except FileNotFoundError:
+        return None
+    return (current, stat.st_mtime_ns, stat.st_ino)
+
+
+def current_version(directory):
+    """Path of the current version directory, or None"""
+    try:
+        with open(os.path.join(directory, CURRENT_FILE)) as f:
+            return os.path.join(directory, f.read().strip())
+    except FileNotFoundError:
+        return None
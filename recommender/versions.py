@@ -0,0 +1,153 @@
+"""
+Content versions for conditional GET (ETag / Last-Modified)
+
+Each kind of data a page depends on has a version stamp in the shared cache,
+bumped by the signals that change it:
+
+    catalog     movies, genres and the similarity table
+    aggregates  rating counts / averages (popular and top rated orderings)
+    movie:<id>  one movie's rating aggregates
+    user:<id>   one user's ratings and watchlist
+
+Every rating moves the aggregates, so single ratings only touch_version()
+AGGREGATES: the stamp moves at most once per AGGREGATES_VERSION_INTERVAL
+seconds and listings may lag by up to that long. The rated movie's own
+movie:<id> stamp is bumped exactly.
+
+`conditional_view` derives the ETag from these stamps and the request URL, so
+a matching If-None-Match is answered with 304 before the view body runs. It
+reads only the session and the cache, never the ORM.
+"""
+import hashlib
+import math
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+CATALOG = 'catalog'
+AGGREGATES = 'aggregates'
+
+
+def _key(name):
+    return f"content_version_{name}"
+
+
+def user_scope(user_id):
+    return f"user:{user_id}"
+
+
+def movie_scope(movie_id):
+    return f"movie:{movie_id}"
+
+
+def bump_version(*names):
+    """Mark `names` as changed now"""
+    now = time.time()
+    cache.set_many({_key(name): now for name in names}, None)
+
+
+def touch_version(name, interval=None):
+    """
+    Coarse bump_version() for versions that change with every write
+
+    The stamp is the end of the current `interval` window and the cache is
+    only written when the stored stamp is older, so a stream of ratings
+    costs one write per window. A stamp still in the future marks an open
+    window; conditional_view revalidates once it has closed.
+    """
+    interval = interval or getattr(settings, 'AGGREGATES_VERSION_INTERVAL', 60)
+    window_end = math.ceil(time.time() / interval) * interval
+    key = _key(name)
+    if (cache.get(key) or 0) < window_end:
+        cache.set(key, window_end, None)
+
+
+def get_versions(names):
+    """
+    Version stamps (unix time) for `names`
+
+    Missing stamps (evicted or never set) are initialised to now, which only
+    ever makes clients refetch, never serves stale content.
+    """
+    keys = [_key(name) for name in names]
+    found = cache.get_many(keys)
+    missing = {key: time.time() for key in keys if key not in found}
+    for key, value in missing.items():
+        if not cache.add(key, value, None):
+            missing[key] = cache.get(key, value)
+    found.update(missing)
+    return [found[key] for key in keys]
+
+
+def _session_user_id(request):
+    """Authenticated user id straight from the session (no User query)"""
+    session = getattr(request, 'session', None)
+    return session.get(SESSION_KEY) if session is not None else None
+
+
+def conditional_view(*names, per_user=True, require_user=False, scopes=None):
+    """
+    Decorator adding ETag/Last-Modified and 304 handling to a GET view
+
+    Works like django.views.decorators.http.condition, for sync and async
+    views alike.
+
+    Args:
+        names: Versions the response depends on (CATALOG, AGGREGATES)
+        per_user: Also depend on the logged-in user's own version
+        require_user: Only emit validators for logged-in users (for views
+            that redirect anonymous users, so a redirect is never revalidated)
+        scopes: Function of the view's URL kwargs returning more version
+            names, e.g. lambda movie_id: [movie_scope(movie_id)]
+    """
+    def validators(request, kwargs):
+        user_id = _session_user_id(request)
+        if require_user and user_id is None:
+            return None, None
+        versions = list(names)
+        if scopes is not None:
+            versions.extend(scopes(**kwargs))
+        if per_user and user_id is not None:
+            versions.append(user_scope(user_id))
+        stamps = get_versions(versions)
+        now = time.time()
+        # The CSRF cookie is part of the key so cached forms never carry a stale token.
+        # A touch_version() stamp in the future is an open window: the ETag changes when it closes
+        csrf = request.COOKIES.get(settings.CSRF_COOKIE_NAME, '')
+        raw = '|'.join([request.get_full_path(), str(user_id), csrf] + [repr((s, s <= now)) for s in stamps])
+        return quote_etag(hashlib.md5(raw.encode()).hexdigest()), int(min(max(stamps), now))
+
+    def finish(request, response, etag, last_modified):
+        if request.method in ('GET', 'HEAD'):
+            if last_modified and not response.has_header('Last-Modified'):
+                response.headers['Last-Modified'] = http_date(last_modified)
+            if etag:
+                response.headers.setdefault('ETag', etag)
+        return response
+
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def inner(request, *args, **kwargs):
+                etag, last_modified = await sync_to_async(validators)(request, kwargs)
+                response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+                if response is None:
+                    response = await view(request, *args, **kwargs)
+                return finish(request, response, etag, last_modified)
+        else:
+            @wraps(view)
+            def inner(request, *args, **kwargs):
+                etag, last_modified = validators(request, kwargs)
+                response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+                if response is None:
+                    response = view(request, *args, **kwargs)
+                return finish(request, response, etag, last_modified)
+        return inner
+
+    return decorator
@@ -1,67 +1,83 @@
+import json
+import logging
+
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth import login
 from django.db import IntegrityError
 from django.contrib import messages
-from django.http import JsonResponse
-from django.core.paginator import Paginator
-from django.db.models import Avg, Count, Q
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseRedirect, JsonResponse
 from django.core.cache import cache
-from django.views.decorators.cache import cache_page
+from django.views.decorators.http import require_POST
 
-from .models import Movie, Rating, Watchlist
+from .models import Genre, Movie, MovieSimilarity, Rating, Tag, Watchlist
 from .forms import RatingForm
-from .recommender_engine import HybridRecommender
+from .recommender_engine import SIMILARITY_EMPTY_KEY, HybridRecommender
+from .ratings import MAX_BATCH_SIZE, clean_ratings, save_ratings
+from . import posters
+from .genome import get_genome_store
+from .pagination import KeysetPaginator, cached_count, paginate_ranked_ids
+from .query_budget import query_budget
+from .ranked_lists import get_recommended_ids
+from .search import search_movie_ids
+from .typeahead import aget_typeahead_index
+from .user_state import ahydrate_movies, auser_state_json, hydrate_movies
+from .async_utils import aget_user, async_login_required, run_in_executor
+from .versions import AGGREGATES, CATALOG, conditional_view, movie_scope
+
+logger = logging.getLogger(__name__)
+
+
+def _engine_recommendations(user_id, n):
+    """Blocking engine call; async views run it through run_in_executor"""
+    recommender = HybridRecommender()
+    return recommender.get_recommendations(user_id=user_id, n=n)
 
 
-def home(request):
+# Budgets count every query of a request, session and user included; see query_budget
+@query_budget(8)
+async def home(request):
     """Trang chủ kiểu Netflix với các hàng phim và carousel"""
-    # Lấy phim được đánh giá cao nhất (theo điểm trung bình)
-    top_rated_movies = Movie.objects.annotate(
-        avg_rating=Avg('rating__rating')
-    ).filter(avg_rating__isnull=False).order_by('-avg_rating')[:20]
-    
-    # Lấy phim phổ biến (theo số lượng đánh giá) và thêm điểm trung bình
-    popular_movies = Movie.objects.annotate(
-        rating_count=Count('rating'),
-        avg_rating=Avg('rating__rating')
-    ).filter(rating_count__gt=0).order_by('-rating_count')[:20]
-    
-    # Lấy phim đề xuất cho người dùng đã đăng nhập
+    user = await aget_user(request)
+    
+    # Lấy phim được đánh giá cao nhất (theo điểm trung bình, đọc theo index)
+    top_rated_movies = [movie async for movie in Movie.objects.filter(
+        avg_rating__isnull=False
+    ).order_by('-avg_rating', '-id')[:20]]
+    
+    # Lấy phim phổ biến (theo số lượng đánh giá, đọc theo index)
+    popular_movies = [movie async for movie in Movie.objects.filter(
+        rating_count__gt=0
+    ).order_by('-rating_count', '-id')[:20]]
+    
+    # Lấy phim đề xuất cho người dùng đã đăng nhập (engine chạy trong thread pool giới hạn)
     recommended_movies = []
-    if request.user.is_authenticated:
+    if user.is_authenticated:
         try:
-            recommender = HybridRecommender()
-            recommended_movie_ids = recommender.get_recommendations(
-                user_id=request.user.id, 
-                n=20
-            )
-            recommended_movies = Movie.objects.filter(id__in=recommended_movie_ids).annotate(
-                avg_rating=Avg('rating__rating')
-            )
+            recommended_movie_ids = await run_in_executor(_engine_recommendations, user.id, 20)
+            recommended_movies = [
+                movie async for movie in Movie.objects.filter(id__in=recommended_movie_ids)
+            ]
         except Exception as e:
             # Fallback: sử dụng phim phổ biến nếu đề xuất thất bại
             recommended_movies = popular_movies[:10]
     
-    # Lấy thể loại duy nhất cho phần duyệt
-    all_genres = Movie.objects.values_list('genre', flat=True).distinct()
-    unique_genres = set()
-    for genre_str in all_genres:
-        if genre_str:
-            genres = [g.strip() for g in genre_str.split('|')]
-            unique_genres.update(genres)
+    # Trạng thái của người dùng (đã đánh giá / trong watchlist) cho mọi hàng, 2 truy vấn
+    top_rated_movies, popular_movies, recommended_movies = await ahydrate_movies(
+        user, top_rated_movies, popular_movies, recommended_movies
+    )
     
+    genre_names = await sync_to_async(Genre.cached_names)()
     context = {
         'top_rated_movies': top_rated_movies,
         'popular_movies': popular_movies,
         'recommended_movies': recommended_movies,
-        'genres': sorted(unique_genres)[:12],  # Giới hạn 12 thể loại để hiển thị
+        'genres': genre_names[:12],  # Giới hạn 12 thể loại để hiển thị
     }
     
-    return render(request, 'recommender/home.html', context)
-
-
+    return await sync_to_async(render)(request, 'recommender/home.html', context)
 
 
 @login_required
@@ -107,6 +123,39 @@ def rate_movie(request, movie_id):
     return redirect('recommender:recommendations')
 
 
+@login_required
+@require_POST
+def rate_movies(request):
+    """
+    Save a batch of ratings posted as JSON (onboarding, buffered rating widget)
+    
+    Body: {"ratings": [{"movie_id": 1, "rating": 4.5}, ...]}
+    Valid entries are saved even if others fail; failures are listed in "errors".
+    """
+    try:
+        items = json.loads(request.body)['ratings']
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'success': False, 'error': 'Expected {"ratings": [...]}'}, status=400)
+    
+    if not isinstance(items, list):
+        return JsonResponse({'success': False, 'error': 'ratings must be a list'}, status=400)
+    if len(items) > MAX_BATCH_SIZE:
+        return JsonResponse({
+            'success': False,
+            'error': f'At most {MAX_BATCH_SIZE} ratings per request'
+        }, status=400)
+    
+    ratings, errors = clean_ratings(items)
+    saved = save_ratings(request.user, ratings)
+    
+    return JsonResponse({
+        'success': saved > 0 or not errors,
+        'saved': saved,
+        'errors': errors,
+    }, status=200 if saved > 0 or not errors else 400)
+
+
+@query_budget(9)  # 8, plus the genre check when searching within a genre
 def search_movie(request):
     """Search movies by title and genre"""
     query = request.GET.get('q', '')
@@ -114,44 +163,42 @@ def search_movie(request):
     
     movies = Movie.objects.all()
     
+    if genre_filter:
+        # Indexed join through the movie-genre table
+        movies = movies.filter(genres__name=genre_filter)
+    
+    cursor = request.GET.get('cursor')
     if query:
-        movies = movies.filter(title__icontains=query)
+        # Ranked full-text match; page through the id list, then load only one page
+        movie_ids = search_movie_ids(query)
+        total_count = len(movie_ids)
+        if genre_filter:
+            allowed_ids = set(movies.filter(id__in=movie_ids).values_list('id', flat=True))
+            movie_ids = [movie_id for movie_id in movie_ids if movie_id in allowed_ids]
+            total_count = len(movie_ids)
+        page_obj = paginate_ranked_ids(movie_ids, 20, cursor)
+        movies_by_id = Movie.objects.prefetch_related('genres').in_bulk(page_obj.object_list)
+        page_obj.object_list = [movies_by_id[movie_id] for movie_id in page_obj.object_list if movie_id in movies_by_id]
+    else:
+        page_obj = KeysetPaginator(movies.prefetch_related('genres'), ('title', 'id'), 20).page(cursor)
+        total_count = cached_count(movies, f"search_count_{genre_filter}")
     
-    if genre_filter:
-        movies = movies.filter(genre__icontains=genre_filter)
-    
-    # Get unique genres for filter dropdown
-    all_genres = Movie.objects.values_list('genre', flat=True).distinct()
-    unique_genres = set()
-    for genre_str in all_genres:
-        if genre_str:
-            genres = [g.strip() for g in genre_str.split('|')]
-            unique_genres.update(genres)
-    
-    # Pagination
-    paginator = Paginator(movies, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    
-    # Get user ratings if logged in
-    user_ratings = {}
-    if request.user.is_authenticated:
-        user_ratings = {
-            rating.movie_id: rating.rating 
-            for rating in Rating.objects.filter(user=request.user)
-        }
+    # User's rating / watchlist state for this page only
+    page_obj.object_list = hydrate_movies(request.user, page_obj.object_list)
     
     context = {
         'page_obj': page_obj,
+        'total_count': total_count,
         'query': query,
         'genre_filter': genre_filter,
-        'genres': sorted(unique_genres),
-        'user_ratings': user_ratings,
+        'genres': Genre.cached_names(),
     }
     
     return render(request, 'recommender/search.html', context)
 
 
+@query_budget(6)  # 5, plus the tags when the tag genome is built
+@conditional_view(CATALOG, AGGREGATES, require_user=True, scopes=lambda movie_id: [movie_scope(movie_id)])
 @login_required
 def movie_detail(request, movie_id):
     """Movie detail page with rating form"""
@@ -164,23 +211,31 @@ def movie_detail(request, movie_id):
     except Rating.DoesNotExist:
         pass
     
-    # Get similar movies (content-based)
-    try:
-        recommender = HybridRecommender()
-        movie_idx = recommender.movies_df[recommender.movies_df['id'] == movie.id].index[0]
-        similar_indices = recommender.content_similarity[movie_idx].argsort()[-6:-1][::-1]
-        similar_movies = []
-        for idx in similar_indices:
-            similar_movie_id = recommender.movies_df.iloc[idx]['id']
-            similar_movie = Movie.objects.get(id=similar_movie_id)
-            similar_movies.append(similar_movie)
-    except Exception as e:
+    # Get similar movies (content-based), precomputed in MovieSimilarity
+    similar_movies = [
+        similarity.neighbor for similarity in MovieSimilarity.objects.filter(
+            movie=movie
+        ).select_related('neighbor').order_by('rank')[:5]
+    ]
+    if not similar_movies:
+        # Checked at most every 5 minutes; store_movie_similarities clears the flag
+        if cache.get_or_set(SIMILARITY_EMPTY_KEY, lambda: not MovieSimilarity.objects.exists(), 300):
+            logger.warning("MovieSimilarity is empty; run manage.py build_movie_similarities")
         similar_movies = Movie.objects.exclude(id=movie.id)[:5]
     
+    # Most relevant tag genome tags, when the genome store has been built
+    genome_tags = []
+    genome = get_genome_store()
+    if genome is not None:
+        top_tags = genome.top_tags(movie.id, n=8)
+        tags = Tag.objects.in_bulk([tag_id for tag_id, _ in top_tags])
+        genome_tags = [(tags[tag_id], relevance) for tag_id, relevance in top_tags if tag_id in tags]
+    
     context = {
         'movie': movie,
         'user_rating': user_rating,
         'similar_movies': similar_movies,
+        'genome_tags': genome_tags,
         'form': RatingForm(initial={'rating': user_rating.rating if user_rating else 3.0})
     }
     
@@ -204,18 +259,29 @@ def register(request):
     return render(request, 'registration/register.html', {'form': form})
 
 
+@query_budget(6)
 @login_required
 def profile_view(request):
     """User profile page with watchlist and rating history"""
-    # Get user's watchlist
-    watchlist_movies = Watchlist.objects.filter(user=request.user).select_related('movie')
+    page_size = 24
+    
+    # Get user's watchlist (newest first, one page at a time)
+    watchlist = Watchlist.objects.filter(user=request.user)
+    watchlist_page = KeysetPaginator(
+        watchlist.select_related('movie'), ('-added_at', '-id'), page_size
+    ).page(request.GET.get('watchlist_cursor'))
     
     # Get user's rating history
-    rated_movies = Rating.objects.filter(user=request.user).select_related('movie').order_by('-timestamp')
+    ratings = Rating.objects.filter(user=request.user)
+    ratings_page = KeysetPaginator(
+        ratings.select_related('movie'), ('-timestamp', '-id'), page_size
+    ).page(request.GET.get('ratings_cursor'))
     
     context = {
-        'watchlist_movies': watchlist_movies,
-        'rated_movies': rated_movies,
+        'watchlist_movies': watchlist_page,
+        'rated_movies': ratings_page,
+        'watchlist_count': watchlist.count(),
+        'rated_count': ratings.count(),
     }
     
     return render(request, 'recommender/profile.html', context)
@@ -256,24 +322,46 @@ def add_to_watchlist(request, movie_id):
     return JsonResponse({'success': False, 'error': 'Invalid request method'})
 
 
-def search_api(request):
+async def _with_user_state(user, response_data):
+    """Add the user's state for the movies in a JSON payload (kept out of shared caches)"""
+    if not user.is_authenticated:
+        return response_data
+    movie_ids = [movie['id'] for movie in response_data['movies']]
+    return {**response_data, 'user_state': await auser_state_json(user, movie_ids)}
+
+
+@query_budget(6)
+@conditional_view(CATALOG, AGGREGATES)
+async def search_api(request):
     """API endpoint for search autocomplete"""
     query = request.GET.get('q', '').strip()
     
     if len(query) < 2:
         return JsonResponse({'movies': []})
     
-    # Cache search results for performance
+    user = await aget_user(request)
+    
+    # In-memory prefix index over titles and genres, ranked by popularity
+    index = await aget_typeahead_index()
+    entries = index.search_entries(query, limit=10)
+    if entries:
+        body = '{"movies":[' + ','.join(payload for _, payload in entries) + ']'
+        if user.is_authenticated:
+            user_state = await auser_state_json(user, [movie_id for movie_id, _ in entries])
+            body += ',"user_state":' + json.dumps(user_state, separators=(',', ':'))
+        return HttpResponse(body + '}', content_type='application/json')
+    
+    # Fall back to full-text search (director/overview matches); cache for performance
     cache_key = f"search_{query}"
-    cached_results = cache.get(cache_key)
+    cached_results = await cache.aget(cache_key)
     
     if cached_results:
-        return JsonResponse({'movies': cached_results})
+        return JsonResponse(await _with_user_state(user, {'movies': cached_results}))
     
-    # Search movies by title and genre
-    movies = Movie.objects.filter(
-        Q(title__icontains=query) | Q(genre__icontains=query)
-    )[:10]  # Limit to 10 results for autocomplete
+    # Ranked full-text search on title, director, overview and genre
+    movie_ids = await sync_to_async(search_movie_ids)(query, limit=10)  # Limit to 10 results for autocomplete
+    movies_by_id = await Movie.objects.ain_bulk(movie_ids)
+    movies = [movies_by_id[movie_id] for movie_id in movie_ids if movie_id in movies_by_id]
     
     results = []
     for movie in movies:
@@ -282,56 +370,47 @@ def search_api(request):
             'title': movie.title,
             'genre': movie.genre,
             'release_year': movie.release_year,
-            'poster_url': movie.poster_url or '',
+            'poster_src': posters.poster_src(movie, 'thumb'),
             'overview': movie.overview[:100] + '...' if len(movie.overview) > 100 else movie.overview
         })
     
     # Cache for 5 minutes
-    cache.set(cache_key, results, 300)
+    await cache.aset(cache_key, results, 300)
     
-    return JsonResponse({'movies': results})
+    return JsonResponse(await _with_user_state(user, {'movies': results}))
 
 
-def load_more(request, category):
-    """API endpoint for infinite scroll loading"""
-    page = int(request.GET.get('page', 1))
+@query_budget(5)
+@conditional_view(CATALOG, AGGREGATES)
+async def load_more(request, category):
+    """API endpoint for infinite scroll loading (cursor-based)"""
+    cursor = request.GET.get('cursor', '')
     page_size = 20
+    user = await aget_user(request)
     
-    # Cache key based on category and page
-    cache_key = f"load_more_{category}_{page}"
-    cached_results = cache.get(cache_key)
+    # Cache key based on category and cursor (recommendations use their own per-user list)
+    cache_key = f"load_more_{category}_{cursor}"
+    recommended = category == 'recommended' and user.is_authenticated
+    cached_results = None if recommended else await cache.aget(cache_key)
     
     if cached_results:
-        return JsonResponse(cached_results)
+        return JsonResponse(await _with_user_state(user, cached_results))
     
     # Determine which movies to load based on category
     if category == 'popular':
-        movies = Movie.objects.annotate(
-            rating_count=Count('rating')
-        ).filter(rating_count__gt=0).order_by('-rating_count')
+        movies = Movie.objects.filter(rating_count__gt=0)
+        page_obj = await KeysetPaginator(movies, ('-rating_count', '-id'), page_size).apage(cursor)
     elif category == 'top_rated':
-        movies = Movie.objects.annotate(
-            avg_rating=Avg('rating__rating')
-        ).filter(avg_rating__isnull=False).order_by('-avg_rating')
-    elif category == 'recommended' and request.user.is_authenticated:
-        try:
-            recommender = HybridRecommender()
-            recommended_movie_ids = recommender.get_recommendations(
-                user_id=request.user.id, 
-                n=100  # Get more for pagination
-            )
-            movies = Movie.objects.filter(id__in=recommended_movie_ids)
-        except Exception as e:
-            movies = Movie.objects.all()[:100]
+        movies = Movie.objects.filter(avg_rating__isnull=False)
+        page_obj = await KeysetPaginator(movies, ('-avg_rating', '-id'), page_size).apage(cursor)
+    elif recommended:
+        # Ranked list computed once per user and TTL; slice it and load only this page
+        ranked_ids = await run_in_executor(get_recommended_ids, user.id)
+        page_obj = paginate_ranked_ids(ranked_ids, page_size, cursor)
+        movies_by_id = await Movie.objects.ain_bulk(page_obj.object_list)
+        page_obj.object_list = [movies_by_id[movie_id] for movie_id in page_obj.object_list if movie_id in movies_by_id]
     else:
-        movies = Movie.objects.all()
-    
-    # Paginate results
-    paginator = Paginator(movies, page_size)
-    try:
-        page_obj = paginator.page(page)
-    except:
-        return JsonResponse({'movies': [], 'has_next': False})
+        page_obj = await KeysetPaginator(Movie.objects.all(), ('id',), page_size).apage(cursor)
     
     # Prepare movie data
     movie_data = []
@@ -341,49 +420,53 @@ def load_more(request, category):
             'title': movie.title,
             'genre': movie.genre,
             'release_year': movie.release_year,
-            'poster_url': movie.poster_url or '',
+            'poster_src': posters.poster_src(movie),
             'overview': movie.overview[:150] + '...' if len(movie.overview) > 150 else movie.overview,
             'director': movie.director
         })
     
     response_data = {
         'movies': movie_data,
-        'has_next': page_obj.has_next(),
-        'next_page': page + 1 if page_obj.has_next() else None
+        'has_next': page_obj.has_next,
+        'next_cursor': page_obj.next_cursor
     }
     
-    # Cache for 10 minutes
-    cache.set(cache_key, response_data, 600)
+    # Cache for 10 minutes (shared between users, so without user_state)
+    if not recommended:
+        await cache.aset(cache_key, response_data, 600)
     
-    return JsonResponse(response_data)
+    return JsonResponse(await _with_user_state(user, response_data))
 
 
 
 
-@login_required
-def recommendations(request):
+@query_budget(6)
+@async_login_required
+async def recommendations(request):
     """Get movie recommendations for the logged-in user"""
+    user = await aget_user(request)
+    
+    # Get user's watchlist movies as Movie objects with ratings
+    watchlist_movies = [movie async for movie in Movie.objects.filter(watchlist__user=user)]
+    
     try:
-        recommender = HybridRecommender()
-        recommended_movie_ids = recommender.get_recommendations(
-            user_id=request.user.id, 
-            n=20
-        )
+        recommended_movie_ids = await run_in_executor(_engine_recommendations, user.id, 20)
         
         # Get movie objects for hybrid recommendations with ratings
-        hybrid_recommendations = Movie.objects.filter(id__in=recommended_movie_ids).annotate(
-            avg_rating=Avg('rating__rating')
-        )
+        hybrid_recommendations = [
+            movie async for movie in Movie.objects.filter(id__in=recommended_movie_ids)
+        ]
         
-        # Get user's watchlist movies as Movie objects with ratings
-        watchlist_movies = Movie.objects.filter(watchlist__user=request.user).annotate(
-            avg_rating=Avg('rating__rating')
+        # User's own rating / watchlist flag for both lists in two queries
+        hybrid_recommendations, watchlist_movies = await ahydrate_movies(
+            user, hybrid_recommendations, watchlist_movies
         )
         
         # For the new section: recommendations for watchlist addition
         # Use hybrid_recommendations but exclude movies already in watchlist
-        watchlist_movie_ids = watchlist_movies.values_list('id', flat=True)
-        recommendations_for_watchlist = hybrid_recommendations.exclude(id__in=watchlist_movie_ids)
+        recommendations_for_watchlist = [
+            movie for movie in hybrid_recommendations if not movie.in_watchlist
+        ]
         
         context = {
             'hybrid_recommendations': hybrid_recommendations,
@@ -391,22 +474,55 @@ def recommendations(request):
             'recommendations_for_watchlist': recommendations_for_watchlist,
         }
         
-        return render(request, 'recommender/recommendations.html', context)
-        
     except Exception as e:
         messages.error(request, f"Error generating recommendations: {str(e)}")
         
         # Fallback: show popular movies with ratings
-        popular_movies = Movie.objects.all()[:20].annotate(
-            avg_rating=Avg('rating__rating')
-        )
-        watchlist_movies = Movie.objects.filter(watchlist__user=request.user).annotate(
-            avg_rating=Avg('rating__rating')
+        popular_movies = [
+            movie async for movie in Movie.objects.order_by('-rating_count', '-id')[:20]
+        ]
+        popular_movies, watchlist_movies = await ahydrate_movies(
+            user, popular_movies, watchlist_movies
         )
         
         context = {
             'hybrid_recommendations': popular_movies,
             'watchlist_movies': watchlist_movies,
         }
-        
-        return render(request, 'recommender/recommendations.html', context)
+    
+    return await sync_to_async(render)(request, 'recommender/recommendations.html', context)
+
+
+def poster_file(request, digest, size):
+    """Serve a cached poster variant; content-addressed, so cacheable forever"""
+    if not posters.DIGEST_RE.match(digest) or size not in posters.POSTER_SIZES:
+        raise Http404("Unknown poster")
+    
+    ext = posters.pick_format(request.headers.get('Accept'))
+    try:
+        f = open(posters.variant_path(digest, size, ext), 'rb')
+    except FileNotFoundError:
+        raise Http404("Poster not cached")
+    
+    response = FileResponse(f, content_type=posters.FORMATS[ext][1])
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    response.headers['Vary'] = 'Accept'
+    return response
+
+
+def movie_poster(request, movie_id, size):
+    """
+    Redirect to a movie's cached poster, or to its remote poster_url until
+    manage.py cache_posters has fetched it (never fetched during a request)
+    """
+    if size not in posters.POSTER_SIZES:
+        raise Http404("Unknown poster size")
+    movie = get_object_or_404(Movie.objects.only('id', 'poster_url', 'poster_digest'), id=movie_id)
+    if not movie.poster_url:
+        raise Http404("Movie has no poster")
+    
+    if not movie.poster_digest:
+        return HttpResponseRedirect(movie.poster_url)
+    response = redirect('recommender:poster_file', digest=movie.poster_digest, size=size)
+    response.headers['Cache-Control'] = 'public, max-age=86400'
+    return response
@@ -185,6 +185,7 @@ def populate_ratings():
     # Bulk create ratings
     try:
         Rating.objects.bulk_create(ratings_to_create, ignore_conflicts=True)
+        Movie.objects.refresh_rating_aggregates()
         print(f"Successfully created {len(ratings_to_create)} sample ratings")
     except Exception as e:
         print(f"Error bulk creating ratings: {e}")
@@ -69,8 +69,8 @@ class SearchAutocomplete {
         item.className = 'autocomplete-item';
         item.setAttribute('data-index', index);
         
-        const poster = movie.poster_url ? 
-            `<img src="${movie.poster_url}" alt="${movie.title}" class="autocomplete-poster" 
+        const poster = movie.poster_src ? 
+            `<img src="${movie.poster_src}" alt="${movie.title}" class="autocomplete-poster" 
                   onerror="this.src='https://via.placeholder.com/50x75/333333/ffffff?text=No+Image'">` :
             `<div class="autocomplete-poster placeholder">
                 <i class="bi bi-film"></i>
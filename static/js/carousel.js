@@ -155,8 +155,8 @@ const CarouselUtils = {
         return `
             <div class="movie-card">
                 <div class="card bg-dark border-0 movie-poster-card">
-                    ${movie.poster_url ? 
-                        `<img src="${movie.poster_url}" class="card-img-top" alt="${movie.title}" 
+                    ${movie.poster_src ? 
+                        `<img src="${movie.poster_src}" class="card-img-top" alt="${movie.title}" 
                               onerror="this.src='https://via.placeholder.com/300x450/333333/ffffff?text=No+Image'">` :
                         `<div class="card-img-top bg-secondary d-flex align-items-center justify-content-center" 
                               style="height: 300px;">
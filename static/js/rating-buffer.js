@@ -0,0 +1,137 @@
+// Rating buffer shared by every page (loaded from base.html)
+
+function ratingCSRFToken() {
+    const csrfToken = document.querySelector('[name=csrfmiddlewaretoken]');
+    if (csrfToken) return csrfToken.value;
+    const match = document.cookie.match(/(?:^|; )csrftoken=([^;]*)/);
+    return match ? decodeURIComponent(match[1]) : '';
+}
+
+// Buffered ratings: ratings given in quick succession (e.g. working through a
+// list of movies) are sent to /api/ratings/ as one batch instead of one
+// request per movie, after a pause, at maxBatch, or when the page is left
+const RatingBuffer = {
+    pending: new Map(),
+    timer: null,
+    delay: 1500,
+    maxBatch: 200,
+
+    add(movieId, rating) {
+        this.pending.set(Number(movieId), Number(rating));
+        if (this.pending.size >= this.maxBatch) {
+            return this.flush();
+        }
+        clearTimeout(this.timer);
+        this.timer = setTimeout(() => this.flush(), this.delay);
+        return Promise.resolve(null);
+    },
+
+    // Resolves to true when every buffered rating was saved. Ratings the server
+    // refuses (or can't take because the session expired) are reported with a
+    // 'rating:rejected' event (detail: movieId, rating, message); only network
+    // failures put the batch back for the next flush
+    flush(keepalive = false) {
+        clearTimeout(this.timer);
+        if (this.pending.size === 0) {
+            return Promise.resolve(true);
+        }
+        const ratings = Array.from(this.pending, ([movieId, rating]) => ({ movie_id: movieId, rating: rating }));
+        this.pending.clear();
+        return fetch('/api/ratings/', {
+            method: 'POST',
+            keepalive: keepalive,
+            headers: {
+                'Content-Type': 'application/json',
+                'X-CSRFToken': ratingCSRFToken(),
+                'X-Requested-With': 'XMLHttpRequest'
+            },
+            body: JSON.stringify({ ratings: ratings })
+        })
+        .then(response => {
+            // login_required answers with a redirect to the login page
+            if (response.redirected || response.status === 401 || response.status === 403) {
+                this.reject(ratings, 'Your session has expired, please log in again');
+                return false;
+            }
+            const isJSON = (response.headers.get('Content-Type') || '').includes('application/json');
+            if (!isJSON) {
+                this.reject(ratings, `Server error (${response.status})`);
+                return false;
+            }
+            return response.json().then(data => {
+                // errors: str(movie_id) -> list of messages
+                const errors = data.errors || {};
+                if (!response.ok && Object.keys(errors).length === 0) {
+                    this.reject(ratings, data.error || `Server error (${response.status})`);
+                    return false;
+                }
+                const rejected = ratings.filter(r => String(r.movie_id) in errors);
+                rejected.forEach(r => this.reject([r], errors[String(r.movie_id)].join(' ')));
+                if (rejected.length) {
+                    console.error('Ratings rejected:', errors);
+                }
+                return rejected.length === 0;
+            });
+        }, error => {
+            // Network failure: put the batch back so the next flush retries it
+            ratings.forEach(r => {
+                if (!this.pending.has(r.movie_id)) this.pending.set(r.movie_id, r.rating);
+            });
+            console.error('Rating batch failed:', error);
+            return false;
+        });
+    },
+
+    reject(ratings, message) {
+        ratings.forEach(r => document.dispatchEvent(new CustomEvent('rating:rejected', {
+            detail: { movieId: r.movie_id, rating: r.rating, message: message }
+        })));
+    }
+};
+window.RatingBuffer = RatingBuffer;
+
+// Send whatever is still buffered when the page is left
+window.addEventListener('pagehide', () => RatingBuffer.flush(true));
+
+// A rejected rating undoes what the page showed when it was queued: the
+// confirmation alert marked data-rating-for="<movie id>" turns into an error
+// and the stars of that movie's rating form are cleared
+document.addEventListener('rating:rejected', event => {
+    const { movieId, rating, message } = event.detail;
+    const text = `Rating of ${rating} stars was not saved: ${message}`;
+    const confirmations = document.querySelectorAll(`[data-rating-for="${movieId}"]`);
+    if (confirmations.length) {
+        confirmations.forEach(alert => {
+            alert.classList.replace('alert-success', 'alert-danger');
+            alert.firstChild.textContent = text;
+        });
+    } else {
+        const alert = document.createElement('div');
+        alert.className = 'alert alert-danger alert-dismissible fade show';
+        alert.textContent = text;
+        alert.insertAdjacentHTML('beforeend', '<button type="button" class="btn-close" data-bs-dismiss="alert"></button>');
+        const main = document.querySelector('main') || document.body;
+        main.insertBefore(alert, main.firstChild);
+    }
+    document.querySelectorAll('form[data-buffered-rating]').forEach(form => {
+        const formMovieId = form.dataset.movieId || (form.elements.movie_id && form.elements.movie_id.value);
+        if (String(formMovieId) !== String(movieId)) return;
+        form.querySelectorAll('.star-btn.btn-warning').forEach(star => {
+            star.classList.remove('btn-warning');
+            star.classList.add('btn-outline-warning');
+        });
+    });
+});
+
+// Rating forms marked data-buffered-rating (the star modals) queue their rating
+// here instead of posting to /movie/<id>/rate/. The page reacts to the
+// 'rating:queued' event (detail: movieId, rating), e.g. by updating the button
+document.addEventListener('submit', event => {
+    const form = event.target.closest('form[data-buffered-rating]');
+    if (!form) return;
+    event.preventDefault();
+    const movieId = form.dataset.movieId || form.elements.movie_id.value;
+    const rating = form.elements.rating.value;
+    RatingBuffer.add(movieId, rating);
+    form.dispatchEvent(new CustomEvent('rating:queued', { bubbles: true, detail: { movieId: movieId, rating: rating } }));
+});
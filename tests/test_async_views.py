@@ -0,0 +1,59 @@
+import threading
+from unittest import mock
+
+from asgiref.sync import iscoroutinefunction
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from recommender import views
+from recommender.models import Movie
+
+
+class AsyncViewsTestCase(TestCase):
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.movies = [
+            Movie.objects.create(
+                title=f"Movie {i}",
+                genre="Drama",
+                director="Director",
+                release_year=2000,
+                overview="Overview",
+                tmdb_id=i
+            )
+            for i in range(3)
+        ]
+    
+    def test_read_views_are_async(self):
+        """Test that the read-heavy endpoints are native coroutines"""
+        for view in (views.home, views.recommendations, views.search_api, views.load_more):
+            self.assertTrue(iscoroutinefunction(view), view.__name__)
+    
+    def test_engine_runs_in_bounded_pool(self):
+        """Test that the recommender is called off the request thread"""
+        threads = []
+        
+        def recommend(user_id, n):
+            threads.append(threading.current_thread().name)
+            return [self.movies[2].id, self.movies[0].id]
+        
+        self.client.login(username='testuser', password='testpass123')
+        with mock.patch('recommender.views._engine_recommendations', side_effect=recommend):
+            response = self.client.get(reverse('recommender:recommendations'))
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(threads[0].startswith('recommender'))
+        self.assertEqual(
+            {movie.id for movie in response.context['hybrid_recommendations']},
+            {self.movies[2].id, self.movies[0].id}
+        )
+    
+    def test_recommendations_require_login(self):
+        """Test that anonymous users are redirected to the login page"""
+        response = self.client.get(reverse('recommender:recommendations'))
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(reverse('recommender:login'), response['Location'])
@@ -0,0 +1,86 @@
+import json
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from recommender.models import Movie, Rating
+from recommender.signals import ratings_changed
+
+
+class BulkRatingTestCase(TestCase):
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.movies = [
+            Movie.objects.create(
+                title=f"Movie {i}",
+                genre="Drama",
+                director="Director",
+                release_year=2000,
+                overview="Overview",
+                tmdb_id=i
+            )
+            for i in range(3)
+        ]
+        Rating.objects.create(user=self.user, movie=self.movies[0], rating=2.0)
+        self.client.login(username='testuser', password='testpass123')
+        
+        self.events = []
+        handler = lambda sender, **kwargs: self.events.append(kwargs)
+        ratings_changed.connect(handler)
+        self.addCleanup(ratings_changed.disconnect, handler)
+    
+    def _post(self, ratings):
+        return self.client.post(
+            reverse('recommender:rate_movies'),
+            data=json.dumps({'ratings': ratings}),
+            content_type='application/json'
+        )
+    
+    def test_batch_upserts_and_updates_aggregates(self):
+        """Test that a batch creates and updates ratings and keeps aggregates exact"""
+        response = self._post([
+            {'movie_id': self.movies[0].id, 'rating': 4.0},
+            {'movie_id': self.movies[1].id, 'rating': 3.5},
+            {'movie_id': self.movies[1].id, 'rating': 5.0},  # later entry wins
+        ])
+        
+        self.assertEqual(response.json()['saved'], 2)
+        self.assertEqual(Rating.objects.get(user=self.user, movie=self.movies[0]).rating, 4.0)
+        self.assertEqual(Rating.objects.get(user=self.user, movie=self.movies[1]).rating, 5.0)
+        
+        for movie in self.movies[:2]:
+            movie.refresh_from_db()
+        self.assertEqual((self.movies[0].rating_count, self.movies[0].avg_rating), (1, 4.0))
+        self.assertEqual((self.movies[1].rating_count, self.movies[1].avg_rating), (1, 5.0))
+        self.assertEqual(len(self.events), 1)
+    
+    def test_invalid_entries_are_reported(self):
+        """Test that out-of-range ratings and unknown movies are rejected"""
+        response = self._post([
+            {'movie_id': self.movies[2].id, 'rating': 9},
+            {'movie_id': 999999, 'rating': 3.0},
+        ])
+        
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.json()['errors']), {str(self.movies[2].id), '999999'})
+        self.assertFalse(Rating.objects.filter(movie=self.movies[2]).exists())
+        self.assertEqual(self.events, [])
+    
+    def test_rating_modals_use_the_buffer(self):
+        """Test that the star modals are marked for RatingBuffer, which is part of the app bundle"""
+        for url in (reverse('recommender:search'), reverse('recommender:profile'),
+                    reverse('recommender:movie_detail', args=[self.movies[0].id])):
+            self.assertContains(self.client.get(url), 'data-buffered-rating')
+        
+        self.assertIn('js/rating-buffer.js', settings.STATIC_BUNDLES['js/app.js'])
+        with open(finders.find('js/rating-buffer.js')) as f:
+            source = f.read()
+        self.assertIn("form[data-buffered-rating]", source)
+        # rate_movies reports errors keyed by movie id, which the buffer turns into rejections
+        self.assertIn("'rating:rejected'", source)
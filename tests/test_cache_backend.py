@@ -0,0 +1,93 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import SimpleTestCase
+from recommender.cache_backends import SQLiteCache
+
+
+def _increment(path, times):
+    cache = SQLiteCache(path, {})
+    for _ in range(times):
+        cache.incr('counter')
+
+
+class SQLiteCacheTestCase(SimpleTestCase):
+    def setUp(self):
+        """Create a cache on a throwaway file"""
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, 'cache.sqlite3')
+        self.cache = self._cache()
+    
+    def _cache(self, **options):
+        options.setdefault('ACCESS_RESOLUTION', 0)
+        return SQLiteCache(self.path, {'OPTIONS': options})
+    
+    def test_basic_operations(self):
+        """Test get/set/add/delete and expiry"""
+        self.cache.set('movie', {'id': 1, 'title': 'Heat'})
+        self.assertEqual(self.cache.get('movie'), {'id': 1, 'title': 'Heat'})
+        self.assertFalse(self.cache.add('movie', 'other'))
+        self.assertTrue(self.cache.add('new', b'\x00\x01'))
+        self.assertEqual(self.cache.get_many(['movie', 'new', 'missing']), {
+            'movie': {'id': 1, 'title': 'Heat'}, 'new': b'\x00\x01'
+        })
+        
+        self.cache.set('short', 1, timeout=0.05)
+        time.sleep(0.1)
+        self.assertIsNone(self.cache.get('short'))
+        self.assertTrue(self.cache.add('short', 2))
+        
+        self.assertTrue(self.cache.delete('movie'))
+        self.assertFalse(self.cache.has_key('movie'))
+    
+    def test_shared_between_instances(self):
+        """Test that a second backend on the same file sees the same entries"""
+        self.cache.set('shared', 42)
+        self.assertEqual(self._cache().get('shared'), 42)
+    
+    def test_evicts_least_recently_used(self):
+        """Test that MAX_ENTRIES evicts the entry read longest ago"""
+        cache = self._cache(MAX_ENTRIES=3, CULL_FREQUENCY=3)
+        for key in ('a', 'b', 'c'):
+            cache.set(key, key)
+            time.sleep(0.01)
+        cache.get('a')
+        cache.set('d', 'd')
+        
+        self.assertEqual(sorted(cache.get_many(['a', 'b', 'c', 'd'])), ['a', 'c', 'd'])
+    
+    def test_size_bound(self):
+        """Test that MAX_SIZE caps the stored bytes"""
+        cache = self._cache(MAX_SIZE=10000)
+        for i in range(20):
+            cache.set(f'blob{i}', b'x' * 1000)
+        
+        stored = cache.get_many([f'blob{i}' for i in range(20)])
+        self.assertLessEqual(len(stored) * 1000, 10000)
+        self.assertIn('blob19', stored)
+    
+    def test_incr_is_atomic_across_processes(self):
+        """Test that concurrent incr() from several processes loses no updates"""
+        self.cache.set('counter', 0)
+        context = multiprocessing.get_context('fork')
+        workers = [context.Process(target=_increment, args=(self.path, 50)) for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        
+        self.assertEqual(self.cache.get('counter'), 200)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+
+class TestCacheTestCase(SimpleTestCase):
+    def test_suite_runs_on_an_in_memory_cache(self):
+        """Test that the tests' cache.clear() calls can't reach the development cache file"""
+        self.assertIsInstance(caches['default'], LocMemCache)
@@ -0,0 +1,118 @@
+import itertools
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from recommender.models import Movie, Rating, Watchlist
+from recommender.typeahead import reset_typeahead_index
+from recommender.versions import AGGREGATES, get_versions, touch_version
+
+
+class ConditionalGetTestCase(TestCase):
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        reset_typeahead_index()
+        
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.other = User.objects.create_user(username='other', password='testpass123')
+        self.movies = [
+            Movie.objects.create(
+                title=f"Alien {i}",
+                genre="Sci-Fi",
+                director="Director",
+                release_year=1979 + i,
+                overview="Overview",
+                tmdb_id=i
+            )
+            for i in range(3)
+        ]
+        self.client.login(username='testuser', password='testpass123')
+    
+    def test_unchanged_pages_return_304_without_queries(self):
+        """Test that a matching ETag short-circuits before any database query"""
+        urls = [
+            (reverse('recommender:load_more', args=['popular']), None),
+            (reverse('recommender:search_api'), {'q': 'alien'}),
+            (reverse('recommender:movie_detail', args=[self.movies[0].id]), None),
+        ]
+        for url, params in urls:
+            # The first page with a form sets the CSRF cookie, which is part of the ETag
+            self.client.get(url, params or {})
+            first = self.client.get(url, params or {})
+            self.assertIn('ETag', first)
+            with self.assertNumQueries(0):
+                second = self.client.get(url, params or {}, HTTP_IF_NONE_MATCH=first['ETag'])
+            self.assertEqual(second.status_code, 304)
+    
+    def test_changes_invalidate_etag(self):
+        """Test that catalog, aggregate and own-state changes produce a new ETag"""
+        url = reverse('recommender:load_more', args=['popular'])
+        
+        def etag():
+            return self.client.get(url)['ETag']
+        
+        start = etag()
+        self.assertEqual(etag(), start)
+        
+        # Another user's rating changes the aggregates everyone sees
+        Rating.objects.create(user=self.other, movie=self.movies[1], rating=4.0)
+        after_rating = etag()
+        self.assertNotEqual(after_rating, start)
+        
+        # Own watchlist only changes this user's version
+        self.client.logout()
+        self.client.login(username='other', password='testpass123')
+        other_etag = etag()
+        self.client.logout()
+        self.client.login(username='testuser', password='testpass123')
+        Watchlist.objects.create(user=self.user, movie=self.movies[0])
+        self.assertNotEqual(etag(), after_rating)
+        self.client.logout()
+        self.client.login(username='other', password='testpass123')
+        self.assertEqual(etag(), other_etag)
+        
+        self.movies[2].title = "Aliens"
+        self.movies[2].save()
+        self.assertNotEqual(etag(), other_etag)
+    
+    def test_rating_versions_movie_exactly_and_listings_coarsely(self):
+        """Test that a rating changes its movie's page, and touches the listing stamp once per window"""
+        def etag(movie):
+            return self.client.get(reverse('recommender:movie_detail', args=[movie.id]))['ETag']
+        
+        # All within one window, which an earlier rating has already opened
+        clock = mock.patch('recommender.versions.time.time', side_effect=itertools.count(1000.0, 0.001))
+        clock.start()
+        self.addCleanup(clock.stop)
+        touch_version(AGGREGATES)
+        
+        etag(self.movies[0])  # Sets the CSRF cookie
+        rated, untouched = etag(self.movies[0]), etag(self.movies[1])
+        with mock.patch('recommender.versions.cache.set', wraps=cache.set) as cache_set:
+            Rating.objects.create(user=self.other, movie=self.movies[0], rating=4.0)
+            Rating.objects.create(user=self.other, movie=self.movies[2], rating=2.0)
+        self.assertNotEqual(etag(self.movies[0]), rated)
+        self.assertEqual(etag(self.movies[1]), untouched)
+        aggregate_writes = [c for c in cache_set.call_args_list if c.args[0] == 'content_version_aggregates']
+        self.assertEqual(aggregate_writes, [])
+    
+    def test_open_window_revalidates_when_it_closes(self):
+        """Test that a listing ETag taken inside an open window changes once the window has passed"""
+        url = reverse('recommender:load_more', args=['popular'])
+        with mock.patch('recommender.versions.time.time', return_value=1000.0):
+            touch_version(AGGREGATES, interval=60)
+            self.assertEqual(get_versions([AGGREGATES]), [1020])
+            during = self.client.get(url)['ETag']
+            self.assertEqual(self.client.get(url)['ETag'], during)
+        with mock.patch('recommender.versions.time.time', return_value=1030.0):
+            self.assertNotEqual(self.client.get(url)['ETag'], during)
+    
+    def test_anonymous_detail_redirect_has_no_etag(self):
+        """Test that the login redirect is never revalidated"""
+        self.client.logout()
+        response = self.client.get(reverse('recommender:movie_detail', args=[self.movies[0].id]))
+        self.assertEqual(response.status_code, 302)
+        self.assertNotIn('ETag', response)
@@ -0,0 +1,108 @@
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from recommender.genome import get_genome_store, reset_genome_store
+from recommender.importing import import_genome, import_tags_csv
+from recommender.models import Movie, Tag, TagApplication
+
+
+class GenomeTestCase(TestCase):
+    def setUp(self):
+        """Set up test data"""
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        settings_override = override_settings(GENOME_DIR=os.path.join(self.directory, 'genome'))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(reset_genome_store)
+        
+        self.movies = {}
+        for movielens_id in (1, 2, 3):
+            self.movies[movielens_id] = Movie.objects.create(
+                title=f"Movie {movielens_id}",
+                genre="Drama",
+                director="Unknown",
+                release_year=2000,
+                overview="Overview",
+                tmdb_id=movielens_id,
+                movielens_id=movielens_id
+            )
+        Tag.objects.create(name='funny')  # also applied by users, gets its genome id
+        
+        self.tags_path = self.write('genome-tags.csv', 'tagId,tag\n1,007\n2,funny\n3,dark\n')
+        scores = {1: (0.1, 0.9, 0.5), 2: (0.8, 0.2, 0.3), 99: (1.0, 1.0, 1.0)}  # 99 isn't in the catalog
+        self.scores_path = self.write('genome-scores.csv', 'movieId,tagId,relevance\n' + ''.join(
+            f'{movie_id},{tag_id},{relevance}\n'
+            for movie_id, values in scores.items()
+            for tag_id, relevance in enumerate(values, start=1)
+        ))
+    
+    def write(self, name, text):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        return path
+    
+    def import_genome(self):
+        return import_genome(self.tags_path, self.scores_path, workers=1, out=lambda line: None)
+    
+    def test_top_tags_and_top_movies(self):
+        """Test the per-movie and per-tag queries of the store"""
+        self.assertEqual(self.import_genome(), (2, 3))
+        store = get_genome_store()
+        funny = Tag.objects.get(name='funny')
+        self.assertEqual(funny.genome_id, 2)
+        
+        top_tags = store.top_tags(self.movies[1].id, n=2)
+        self.assertEqual([tag_id for tag_id, _ in top_tags], [funny.id, Tag.objects.get(name='dark').id])
+        self.assertAlmostEqual(top_tags[0][1], 0.9, places=3)
+        
+        top_movies = store.top_movies(funny.id, n=5)
+        self.assertEqual([movie_id for movie_id, _ in top_movies], [self.movies[1].id, self.movies[2].id])
+        self.assertEqual(store.top_tags(self.movies[3].id), [])
+        self.assertAlmostEqual(store.relevance_of(self.movies[2].id, Tag.objects.get(name='007').id), 0.8, places=3)
+    
+    def test_rebuild_switches_version(self):
+        """Test that a rebuilt store replaces the one already loaded"""
+        self.import_genome()
+        first = get_genome_store()
+        self.scores_path = self.write('genome-scores.csv', 'movieId,tagId,relevance\n3,3,0.7\n')
+        
+        self.import_genome()
+        
+        store = get_genome_store()
+        self.assertIsNot(store, first)
+        self.assertTrue(store.has_movie(self.movies[3].id))
+        self.assertFalse(store.has_movie(self.movies[1].id))
+        self.assertEqual(len(os.listdir(os.path.join(self.directory, 'genome'))), 2)  # CURRENT + 1 version
+    
+    def test_movie_detail_shows_genome_tags(self):
+        self.import_genome()
+        user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_login(user)
+        
+        response = self.client.get(reverse('recommender:movie_detail', args=[self.movies[1].id]))
+        
+        self.assertContains(response, '>funny</span>')
+    
+    def test_import_tags_csv(self):
+        """Test that user tags are imported once, for catalog movies only"""
+        path = self.write('tags.csv', (
+            'userId,movieId,tag,timestamp\n'
+            '15,1,funny,1138537770\n'
+            '15,1,funny,1138537771\n'
+            '15,2," Mind-bending ",1193435061\n'
+            '20,99,unknown movie,1193435061\n'
+        ))
+        
+        count = import_tags_csv(path, workers=1, out=lambda line: None)
+        
+        self.assertEqual(count, 3)
+        self.assertEqual(TagApplication.objects.count(), 2)
+        self.assertEqual(Tag.objects.filter(name='funny').count(), 1)
+        self.assertTrue(TagApplication.objects.filter(movie=self.movies[2], tag__name='Mind-bending').exists())
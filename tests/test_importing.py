@@ -0,0 +1,328 @@
+import os
+import tempfile
+from datetime import datetime, timezone
+
+from django.contrib.auth.models import User
+from unittest import mock
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+
+from recommender.import_parsing import (
+    MOVIES_DTYPE, RATINGS_DTYPE, chunk_ranges, iter_parsed_chunks, parse_movies, parse_ratings,
+)
+from recommender.importing import (
+    apply_movie_links, batched, import_ratings_csv, link_movie_genres, read_movies_csv, record_import,
+    resolve_import_users, unchanged_since_import,
+)
+from recommender import importing
+from recommender.bulk_load import sqlite_bulk_load
+from recommender.models import ImportCheckpoint, Movie, Rating
+
+
+class ResolveImportUsersTestCase(TestCase):
+    def test_creates_missing_users_in_bulk(self):
+        """Test that users are resolved in batches and reused when they exist"""
+        existing = User.objects.create_user(username='user_7', password='secret')
+        
+        # 2 lookups + (insert + read back) for each of the 2 batches of missing users
+        with self.assertNumQueries(6):
+            user_pks = resolve_import_users([7, 1, 2, 1, 3, 7], batch_size=2)
+        
+        self.assertEqual(set(user_pks), {1, 2, 3, 7})
+        self.assertEqual(user_pks[7], existing.pk)
+        self.assertEqual(User.objects.get(pk=user_pks[2]).username, 'user_2')
+        self.assertEqual(User.objects.filter(username__startswith='user_').count(), 4)
+    
+    def test_imported_users_cannot_log_in(self):
+        """Test that imported users get an unusable password"""
+        user_pks = resolve_import_users([42])
+        
+        user = User.objects.get(pk=user_pks[42])
+        self.assertFalse(user.has_usable_password())
+        self.assertEqual(resolve_import_users([42]), user_pks)
+
+
+def write_temp_csv(test_case, text):
+    fd, path = tempfile.mkstemp(suffix='.csv')
+    test_case.addCleanup(os.remove, path)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(text)
+    return path
+
+
+class ImportParsingTestCase(SimpleTestCase):
+    def test_movie_titles_and_genres_are_parsed_vectorized(self):
+        path = write_temp_csv(self, (
+            'movieId,title,genres\n'
+            '1,Toy Story (1995),Adventure|Animation\n'
+            '2,"American President, The (1995)",Comedy|Drama|Romance\n'
+            '3,Babylon 5,Sci-Fi\n'
+            '4,Mona (Mona ja aika) (1983)),\n'
+        ))
+        
+        rows = [row for _, chunk in iter_parsed_chunks(path, parse_movies, dtype=MOVIES_DTYPE, workers=1) for row in chunk]
+        
+        self.assertEqual(rows, [
+            (1, 'Toy Story (1995)', 1995, 'Adventure|Animation', ['Adventure', 'Animation']),
+            (2, 'American President, The (1995)', 1995, 'Comedy|Drama|Romance', ['Comedy', 'Drama', 'Romance']),
+            (3, 'Babylon 5', 0, 'Sci-Fi', ['Sci-Fi']),
+            (4, 'Mona (Mona ja aika) (1983))', 1983, 'Unknown', ['']),
+        ])
+    
+    def test_worker_processes_keep_file_order(self):
+        """Test that chunks parsed in a process pool come back in file order"""
+        lines = [f'{user},{user % 7 + 1},3.5,{1000000000 + user}\n' for user in range(1, 2001)]
+        path = write_temp_csv(self, 'userId,movieId,rating,timestamp\n' + ''.join(lines))
+        _, ranges = chunk_ranges(path, chunk_bytes=1000)
+        self.assertGreater(len(ranges), 10)
+        
+        def parse_all(workers):
+            return [
+                row
+                for _, chunk in iter_parsed_chunks(
+                    path, parse_ratings, dtype=RATINGS_DTYPE, workers=workers, window=3, chunk_bytes=1000
+                )
+                for row in chunk
+            ]
+        
+        rows = parse_all(workers=2)
+        self.assertEqual(rows, parse_all(workers=1))
+        self.assertEqual([row[0] for row in rows], list(range(1, 2001)))
+        self.assertEqual(rows[0][3], datetime.fromtimestamp(1000000001, tz=timezone.utc))
+
+
+class ImportRatingsCSVTestCase(TestCase):
+    def setUp(self):
+        """Set up test data"""
+        for movielens_id in (1, 2):
+            Movie.objects.create(
+                title=f"Movie {movielens_id}",
+                genre="Drama",
+                director="Unknown",
+                release_year=2000,
+                overview="Overview",
+                tmdb_id=movielens_id,
+                movielens_id=movielens_id
+            )
+        
+        self.path = write_temp_csv(self, (
+            "userId,movieId,rating,timestamp\n"
+            "1,1,4.0,1112486027\n"
+            "1,2,3.5,1112484676\n"
+            "1,99,5.0,1112484819\n"  # movie not in the catalog
+            "2,1,2.0,974820691\n"
+            "3,2,4.5,1094785740\n"
+        ))
+    
+    def test_streams_batches_and_keeps_csv_timestamps(self):
+        """Test that every known rating is written with its CSV timestamp"""
+        lines = []
+        
+        count = import_ratings_csv(self.path, batch_size=2, out=lines.append)
+        
+        self.assertEqual(count, 4)
+        self.assertEqual(Rating.objects.count(), 4)
+        self.assertEqual(User.objects.filter(username__startswith='user_').count(), 3)
+        rating = Rating.objects.get(user__username='user_2')
+        self.assertEqual(rating.timestamp, datetime.fromtimestamp(974820691, tz=timezone.utc))
+        self.assertEqual(Movie.objects.get(tmdb_id=1).rating_count, 2)
+        self.assertIn("ratings: 4 rows (100.0% of file)", lines[-1])
+    
+    def test_limit(self):
+        """Test that the limit counts ratings of known movies only"""
+        count = import_ratings_csv(self.path, batch_size=2, limit=3, out=lambda line: None)
+        
+        self.assertEqual(count, 3)
+        self.assertFalse(User.objects.filter(username='user_3').exists())
+    
+    def test_batched(self):
+        self.assertEqual(list(batched(range(5), 2)), [[0, 1], [2, 3], [4]])
+    
+    def test_bulk_load_rebuilds_indexes(self):
+        """Test that bulk-load mode drops the rating indexes, inserts raw rows and rebuilds them"""
+        with open(self.path, 'a') as f:
+            f.write("2,1,3.0,974820700\n")  # repeats (2, 1): the later row wins, as with the upsert
+        
+        def rating_indexes():
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'recommender_rating' AND sql IS NOT NULL")
+                return {row[0] for row in cursor.fetchall()}
+        
+        indexes = rating_indexes()
+        lines = []
+        with sqlite_bulk_load([Rating], out=lines.append) as bulk:
+            with mock.patch.object(bulk, 'variable_limit', return_value=9):
+                self.assertEqual(bulk.rows_per_insert(4), 2)
+                count = import_ratings_csv(self.path, bulk=bulk, out=lines.append)
+            self.assertEqual(rating_indexes(), set())
+        
+        self.assertEqual(count, 5)
+        self.assertEqual(rating_indexes(), indexes)
+        self.assertEqual(Rating.objects.count(), 4)
+        rating = Rating.objects.get(user__username='user_2')
+        self.assertEqual((rating.rating, rating.timestamp), (3.0, datetime.fromtimestamp(974820700, tz=timezone.utc)))
+        self.assertEqual(Movie.objects.get(tmdb_id=1).avg_rating, 3.5)
+        self.assertIn("bulk load: removed 1 duplicate rows from recommender_rating", '\n'.join(lines))
+
+
+class ReadMoviesCSVTestCase(TestCase):
+    def test_movies_and_genres_link_up(self):
+        """Test that the parsed movies and genre map link up"""
+        path = write_temp_csv(self, (
+            'movieId,title,genres\n'
+            '1,Toy Story (1995),Adventure|Animation\n'
+            '2,Heat (1995),(no genres listed)\n'
+        ))
+        
+        movies, genres_by_movielens_id = read_movies_csv(path, workers=1)
+        Movie.objects.bulk_create(movies)
+        
+        self.assertEqual(link_movie_genres(genres_by_movielens_id, field='movielens_id'), 2)
+        toy_story = Movie.objects.get(movielens_id=1)
+        self.assertEqual(toy_story.tmdb_id, -1)
+        self.assertEqual(sorted(toy_story.genres.values_list('name', flat=True)), ['Adventure', 'Animation'])
+
+
+class ApplyMovieLinksTestCase(TestCase):
+    def setUp(self):
+        """Set up test data"""
+        for movielens_id in range(1, 7):
+            Movie.objects.create(
+                title=f"Movie {movielens_id}",
+                genre="Drama",
+                director="Unknown",
+                release_year=2000,
+                overview="Overview",
+                tmdb_id=movielens_id,
+                movielens_id=movielens_id
+            )
+    
+    def tmdb_ids(self):
+        return dict(Movie.objects.values_list('movielens_id', 'tmdb_id'))
+    
+    def test_swaps_and_conflicts(self):
+        """Test the two-phase remap and the conflicts summary"""
+        conflicts_path = write_temp_csv(self, '')
+        links = {
+            1: 2, 2: 1,  # swap, only possible through temporary ids
+            3: 4,  # held by movie 4, which has no link and keeps it
+            5: 100, 6: 100,  # same TMDb id twice: the first movie wins
+        }
+        
+        # Read the catalog + savepoint + 2 bulk UPDATEs + release
+        with self.assertNumQueries(5):
+            updated, conflicts = apply_movie_links(links, conflicts_path=conflicts_path)
+        
+        self.assertEqual((updated, conflicts), (3, 2))
+        self.assertEqual(self.tmdb_ids(), {1: 2, 2: 1, 3: 3, 4: 4, 5: 100, 6: 6})
+        with open(conflicts_path, encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        self.assertEqual(lines[1:], [
+            '3,Movie 3,3,4,4,Movie 4',
+            '6,Movie 6,6,100,5,Movie 5',
+        ])
+    
+    def test_blocked_movie_keeps_id_wanted_by_another(self):
+        """Test that a conflict which frees nothing cascades to the movie wanting its id"""
+        # 6 wants 5's old id, but 5 is blocked by 4 and keeps it
+        updated, conflicts = apply_movie_links({5: 4, 6: 5})
+        
+        self.assertEqual((updated, conflicts), (0, 2))
+        self.assertEqual(self.tmdb_ids(), {i: i for i in range(1, 7)})
+
+
+class CheckpointedRatingsImportTestCase(TestCase):
+    def setUp(self):
+        """Set up test data"""
+        for movielens_id in range(1, 6):
+            Movie.objects.create(
+                title=f"Movie {movielens_id}",
+                genre="Drama",
+                director="Unknown",
+                release_year=2000,
+                overview="Overview",
+                tmdb_id=movielens_id,
+                movielens_id=movielens_id
+            )
+        lines = [f'{user},{movie},3.0,{1000000000 + user * 10 + movie}\n' for user in range(1, 21) for movie in range(1, 6)]
+        self.path = write_temp_csv(self, 'userId,movieId,rating,timestamp\n' + ''.join(lines))
+    
+    def run_import(self):
+        return import_ratings_csv(
+            self.path, batch_size=10, workers=1, checkpoint='ratings', chunk_bytes=300, out=lambda line: None
+        )
+    
+    def test_resumes_after_a_crash(self):
+        """Test that a failed import restarts at the last committed chunk"""
+        write_batch = importing.write_rating_batch
+        calls = []
+        
+        def failing_write(batch, user_pks, bulk=None):
+            calls.append(len(batch))
+            if len(calls) == 5:
+                raise RuntimeError("disk full")
+            write_batch(batch, user_pks, bulk)
+        
+        with mock.patch.object(importing, 'write_rating_batch', failing_write):
+            with self.assertRaises(RuntimeError):
+                self.run_import()
+        
+        state = ImportCheckpoint.objects.get(name='ratings')
+        self.assertFalse(state.completed)
+        self.assertGreater(state.offset, 0)
+        committed = state.rows
+        
+        resumed = self.run_import()
+        
+        self.assertEqual(committed + resumed, 100)
+        self.assertEqual(Rating.objects.count(), 100)
+        self.assertTrue(ImportCheckpoint.objects.get(name='ratings').completed)
+        self.assertEqual(Movie.objects.get(movielens_id=1).rating_count, 20)
+    
+    def test_later_runs_apply_only_new_rows(self):
+        """Test unchanged, appended and replaced files after a completed import"""
+        self.assertEqual(self.run_import(), 100)
+        self.assertEqual(self.run_import(), 0)
+        
+        with open(self.path, 'a') as f:
+            f.write('21,1,5.0,1000000999\n')
+        self.assertEqual(self.run_import(), 1)
+        self.assertEqual(Movie.objects.get(movielens_id=1).rating_count, 21)
+        
+        # A new dump: one changed rating (newer timestamp), one untouched
+        with open(self.path, 'w') as f:
+            f.write('userId,movieId,rating,timestamp\n')
+            f.write('1,2,3.0,1000000012\n')
+            f.write('1,1,1.0,1000002000\n')
+        self.assertEqual(self.run_import(), 1)
+        self.assertEqual(Rating.objects.get(user__username='user_1', movie__movielens_id=1).rating, 1.0)
+        self.assertEqual(Rating.objects.count(), 101)
+
+
+class UnchangedSourcesTestCase(TestCase):
+    def setUp(self):
+        """Set up test data"""
+        Movie.objects.create(
+            title="Movie 1", genre="Drama", director="Unknown", release_year=2000, overview="Overview",
+            tmdb_id=1, movielens_id=1
+        )
+        self.path = write_temp_csv(self, 'userId,movieId,tag,timestamp\n1,1,dark,1000000000\n')
+    
+    def test_skips_only_files_and_catalog_seen_before(self):
+        """Test that a whole-file import is redone when its file or the catalog changes"""
+        self.assertFalse(unchanged_since_import('tags', [self.path]))
+        record_import('tags', [self.path], rows=1)
+        self.assertTrue(unchanged_since_import('tags', [self.path]))
+        
+        # Tags of a movie that wasn't in the catalog were skipped
+        Movie.objects.create(
+            title="Movie 2", genre="Drama", director="Unknown", release_year=2000, overview="Overview",
+            tmdb_id=2, movielens_id=2
+        )
+        self.assertFalse(unchanged_since_import('tags', [self.path]))
+        record_import('tags', [self.path])
+        
+        with open(self.path, 'a') as f:
+            f.write('1,2,light,1000000001\n')
+        self.assertFalse(unchanged_since_import('tags', [self.path]))
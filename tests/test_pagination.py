@@ -0,0 +1,102 @@
+from datetime import datetime, timezone
+
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from recommender.models import Movie, Rating
+from recommender.pagination import KeysetPaginator, paginate_ranked_ids
+
+
+class KeysetPaginationTestCase(TestCase):
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        
+        self.users = [
+            User.objects.create_user(username=f'user{i}', password='testpass123')
+            for i in range(3)
+        ]
+        self.movies = [
+            Movie.objects.create(
+                title=f"Movie {i:02d}",
+                genre="Drama",
+                director="Director",
+                release_year=2000 + i,
+                overview="Overview",
+                tmdb_id=i
+            )
+            for i in range(25)
+        ]
+        # Rating counts 0..2 to create many ties on the sort key
+        for i, movie in enumerate(self.movies):
+            for user in self.users[:i % 3]:
+                Rating.objects.create(user=user, movie=movie, rating=3.0 + i % 3)
+    
+    def test_paginator_walks_forward_and_back(self):
+        """Test that cursors visit every row once and can step back"""
+        paginator = KeysetPaginator(Movie.objects.all(), ('-release_year', 'id'), 10)
+        
+        first = paginator.page()
+        second = paginator.page(first.next_cursor)
+        third = paginator.page(second.next_cursor)
+        seen = [m.id for page in (first, second, third) for m in page]
+        expected = [m.id for m in sorted(self.movies, key=lambda m: -m.release_year)]
+        self.assertEqual(seen, expected)
+        self.assertFalse(first.has_previous)
+        self.assertFalse(third.has_next)
+        
+        back = paginator.page(third.previous_cursor)
+        self.assertEqual([m.id for m in back], [m.id for m in second])
+        
+        # Garbage cursors start from the beginning
+        self.assertEqual([m.id for m in paginator.page('not-a-cursor')], [m.id for m in first])
+    
+    def test_cursor_keeps_microseconds(self):
+        """Test that rows in the same millisecond on both sides of a page boundary are all visited"""
+        user = self.users[0]
+        Rating.objects.filter(user=user).delete()
+        first = Rating.objects.create(user=user, movie=self.movies[0], rating=4.0,
+                                      timestamp=datetime(2024, 1, 1, 12, 0, 0, 100100, tzinfo=timezone.utc))
+        second = Rating.objects.create(user=user, movie=self.movies[1], rating=4.0,
+                                       timestamp=datetime(2024, 1, 1, 12, 0, 0, 100400, tzinfo=timezone.utc))
+        paginator = KeysetPaginator(Rating.objects.filter(user=user), ('-timestamp', '-id'), 1)
+        
+        page = paginator.page()
+        self.assertEqual([r.id for r in page], [second.id])
+        self.assertEqual([r.id for r in paginator.page(page.next_cursor)], [first.id])
+    
+    def test_ranked_id_pagination(self):
+        """Test slicing a precomputed ranked list by cursor"""
+        first = paginate_ranked_ids(list(range(45)), 20)
+        last = paginate_ranked_ids(list(range(45)), 20, paginate_ranked_ids(list(range(45)), 20, first.next_cursor).next_cursor)
+        self.assertEqual(first.object_list, list(range(20)))
+        self.assertEqual(last.object_list, list(range(40, 45)))
+        self.assertFalse(last.has_next)
+    
+    def test_load_more_follows_cursors(self):
+        """Test that load_more pages popular movies by (rating_count, id) without COUNT(*)"""
+        url = reverse('recommender:load_more', args=['popular'])
+        
+        with self.assertNumQueries(1):
+            data = self.client.get(url).json()
+        ids = [m['id'] for m in data['movies']]
+        while data['has_next']:
+            data = self.client.get(url, {'cursor': data['next_cursor']}).json()
+            ids.extend(m['id'] for m in data['movies'])
+        
+        rated = [m for i, m in enumerate(self.movies) if i % 3]
+        expected = [m.id for m in sorted(rated, key=lambda m: (-(self.movies.index(m) % 3), -m.id))]
+        self.assertEqual(ids, expected)
+    
+    def test_search_page_uses_cursor_links(self):
+        """Test that the search page links to the next page with a cursor"""
+        response = self.client.get(reverse('recommender:search'), {'genre': 'Drama'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total_count'], 25)
+        page = response.context['page_obj']
+        self.assertEqual(len(page), 20)
+        self.assertContains(response, f'cursor={page.next_cursor}')
+        
+        response = self.client.get(reverse('recommender:search'), {'genre': 'Drama', 'cursor': page.next_cursor})
+        self.assertEqual([m.title for m in response.context['page_obj']], [f"Movie {i}" for i in range(20, 25)])
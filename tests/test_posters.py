@@ -0,0 +1,162 @@
+import io
+import shutil
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from PIL import Image
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from recommender import posters
+from recommender.models import Movie
+from recommender.typeahead import reset_typeahead_index
+
+
+def _poster_bytes():
+    buffer = io.BytesIO()
+    Image.new('RGB', (500, 750), (200, 30, 30)).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+class StubPosterHandler(BaseHTTPRequestHandler):
+    requests_seen = []
+    body = _poster_bytes()
+    
+    def do_GET(self):
+        StubPosterHandler.requests_seen.append(self.path)
+        if self.path != '/t/p/w500/poster.png':
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/png')
+        self.send_header('Content-Length', str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+    
+    def log_message(self, *args):
+        pass
+
+
+class PosterCacheTestCase(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubPosterHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f'http://127.0.0.1:{cls.server.server_address[1]}'
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+    
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        StubPosterHandler.requests_seen = []
+        self.poster_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.poster_dir)
+        settings_override = override_settings(POSTER_CACHE_DIR=self.poster_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        
+        self.movie = Movie.objects.create(
+            title="Poster Movie",
+            genre="Drama",
+            director="Director",
+            release_year=2000,
+            overview="Overview",
+            poster_url=f'{self.base_url}/t/p/w500/poster.png',
+            tmdb_id=1
+        )
+    
+    def _poster_src(self, movie, size='card'):
+        return Template("{% load posters %}{% poster_src movie size %}").render(
+            Context({'movie': movie, 'size': size})
+        )
+    
+    def _cache_posters(self):
+        stderr = io.StringIO()
+        call_command('cache_posters', stdout=io.StringIO(), stderr=stderr)
+        return stderr.getvalue()
+    
+    def test_poster_fetched_once_and_served_locally(self):
+        """Test that requests use the remote poster until cache_posters has stored it"""
+        src = self._poster_src(self.movie)
+        self.assertEqual(src, reverse('recommender:movie_poster', args=[self.movie.id, 'card']))
+        
+        # Not fetched during a request
+        response = self.client.get(src)
+        self.assertEqual(response['Location'], self.movie.poster_url)
+        self.assertEqual(StubPosterHandler.requests_seen, [])
+        
+        self._cache_posters()
+        redirect = self.client.get(src)
+        self.assertEqual(redirect.status_code, 302)
+        self.movie.refresh_from_db()
+        self.assertEqual(len(self.movie.poster_digest), 64)
+        self.assertEqual(redirect['Location'], self._poster_src(self.movie))
+        
+        response = self.client.get(redirect['Location'], HTTP_ACCEPT='image/avif,image/webp,*/*')
+        self.assertEqual(response['Content-Type'], 'image/webp')
+        self.assertIn('immutable', response['Cache-Control'])
+        image = Image.open(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(image.size, (185, 278))
+        
+        jpeg = self.client.get(redirect['Location'], HTTP_ACCEPT='image/*')
+        self.assertEqual(jpeg['Content-Type'], 'image/jpeg')
+        
+        self.client.get(reverse('recommender:movie_poster', args=[self.movie.id, 'detail']))
+        self._cache_posters()
+        self.assertEqual(StubPosterHandler.requests_seen, ['/t/p/w500/poster.png'])
+    
+    def test_unreachable_poster_falls_back_to_remote_url(self):
+        """Test that a failed fetch leaves the movie on its original poster"""
+        self.movie.poster_url = f'{self.base_url}/missing.png'
+        self.movie.save()
+        
+        self.assertIn('404', self._cache_posters())
+        response = self.client.get(reverse('recommender:movie_poster', args=[self.movie.id, 'card']))
+        
+        self.assertEqual(response['Location'], self.movie.poster_url)
+        self.movie.refresh_from_db()
+        self.assertEqual(self.movie.poster_digest, '')
+
+    def test_failed_fetch_is_not_retried_until_it_expires(self):
+        """Test that a failed fetch is remembered and retried only after POSTER_RETRY_AFTER"""
+        self.movie.poster_url = f'{self.base_url}/missing.png'
+        self.movie.save()
+
+        self._cache_posters()
+        self._cache_posters()
+        self.assertEqual(StubPosterHandler.requests_seen, ['/missing.png'])
+
+        cache.delete(f'poster_failed_{self.movie.id}')
+        self._cache_posters()
+        self.assertEqual(StubPosterHandler.requests_seen, ['/missing.png', '/missing.png'])
+    
+    def test_oversized_image_is_a_poster_error(self):
+        """Test that Pillow's decompression bomb check fails the fetch instead of crashing"""
+        with mock.patch.object(Image, 'MAX_IMAGE_PIXELS', 1000):
+            with self.assertRaises(posters.PosterError):
+                posters.store_poster(_poster_bytes())
+
+    def test_json_endpoints_link_the_local_poster(self):
+        """Test that load_more and search_api hand out the local poster URL, not TMDb's"""
+        User.objects.create_user(username='testuser', password='testpass123')
+        self.client.login(username='testuser', password='testpass123')
+        reset_typeahead_index()
+        self.addCleanup(reset_typeahead_index)
+
+        movies = self.client.get(reverse('recommender:load_more', args=['all'])).json()['movies']
+        self.assertEqual(movies[0]['poster_src'], self._poster_src(self.movie))
+        self.assertNotIn('poster_url', movies[0])
+
+        movies = self.client.get(reverse('recommender:search_api') + '?q=poster').json()['movies']
+        self.assertEqual(movies[0]['poster_src'], self._poster_src(self.movie, 'thumb'))
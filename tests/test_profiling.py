@@ -0,0 +1,91 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from io import StringIO
+
+import numpy as np
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+
+from recommender.models import Movie, Rating
+from recommender.profiling import RatingProfile, profile_database, suggest_settings
+
+
+class RatingProfileTestCase(SimpleTestCase):
+    def test_duplicates_across_chunks(self):
+        """Test that a (user, movie) pair repeated across a chunk boundary is counted once per extra row"""
+        profile = RatingProfile()
+        profile.add(np.array([1, 1, 2]), np.array([10, 11, 10]), np.array([4.0, 3.5, 5.0]), np.array([100, 200, 300]))
+        profile.add(np.array([2, 2, 3]), np.array([10, 12, 10]), np.array([1.0, 4.0, 4.0]), np.array([50, 400, 150]))
+        
+        report = profile.report()
+        
+        self.assertEqual(report['duplicate_pairs'], 1)
+        self.assertEqual((report['ratings'], report['users'], report['rated_movies']), (6, 3, 3))
+        self.assertEqual(report['ratings_per_user']['max'], 3)
+        self.assertEqual(report['ratings_per_movie']['max'], 4)
+        self.assertEqual(report['rating_histogram'], {'1.0': 1, '3.5': 1, '4.0': 3, '5.0': 1})
+        self.assertEqual(report['first_rating'], '1970-01-01T00:00:50+00:00')
+        self.assertAlmostEqual(report['sparsity'], 1 - 6 / 9, places=5)
+    
+    def test_unordered_users_leave_duplicates_unknown(self):
+        profile = RatingProfile()
+        profile.add(np.array([2, 1]), np.array([10, 10]), np.array([4.0, 4.0]), np.array([1, 2]))
+        
+        self.assertIsNone(profile.report()['duplicate_pairs'])
+    
+    def test_dense_similarity_suggestion(self):
+        """Test that the dense similarity matrix is only suggested when it fits the memory budget"""
+        report = {
+            'ratings': 1000, 'rated_movies': 900, 'max_user_id': 50, 'max_movie_id': 2000,
+            'rating_histogram': {'0.5': 10, '5.0': 990}, 'duplicate_pairs': 0, 'catalog': {'movies': 1000},
+        }
+        
+        small = suggest_settings(report, memory=10 ** 9)
+        large = suggest_settings({**report, 'catalog': {'movies': 30000}}, memory=10 ** 9)
+        
+        self.assertTrue(small['dense_content_similarity_fits'])
+        self.assertFalse(large['dense_content_similarity_fits'])
+        self.assertEqual(large['similarity_block_size'], 10 ** 9 // 4 // (30000 * 8))
+        self.assertEqual(small['rating_scale'], [0.5, 5.0])
+
+
+class ProfileDatasetCommandTestCase(TestCase):
+    def test_csv_and_database_reports(self):
+        """Test the JSON report for a MovieLens directory and for the imported tables"""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        files = {
+            'ratings.csv': 'userId,movieId,rating,timestamp\n1,1,4.0,1112486027\n1,2,3.5,1112484676\n2,3,5.0,974820691\n',
+            'movies.csv': 'movieId,title,genres\n1,A (1995),Drama\n2,B (1996),Comedy\n',
+            'links.csv': 'movieId,imdbId,tmdbId\n1,0114709,862\n2,0113497,\n',
+        }
+        for name, text in files.items():
+            with open(os.path.join(directory, name), 'w') as f:
+                f.write(text)
+        
+        out = StringIO()
+        call_command('profile_dataset', csv=directory, workers=1, stdout=out)
+        report = json.loads(out.getvalue())
+        
+        self.assertEqual(report['ratings'], 3)
+        self.assertEqual(report['catalog']['movies_without_tmdb_id'], 1)
+        self.assertEqual(report['catalog']['rated_movies_not_in_catalog'], 1)
+        self.assertEqual(report['last_rating'], '2005-04-02T23:53:47+00:00')
+        self.assertIn('dense_content_similarity_fits', report['suggested_settings'])
+        
+        user = User.objects.create_user(username='viewer')
+        for tmdb_id in (1, -2):
+            movie = Movie.objects.create(
+                title=f"Movie {tmdb_id}", genre="Drama", director="Unknown", release_year=2000, overview="", tmdb_id=tmdb_id
+            )
+            Rating.objects.create(user=user, movie=movie, rating=4.0, timestamp=datetime(2015, 1, 1, tzinfo=timezone.utc))
+        
+        report = profile_database(chunk_rows=1)
+        
+        self.assertEqual((report['ratings'], report['users'], report['duplicate_pairs']), (2, 1, 0))
+        self.assertEqual(report['last_rating'], '2015-01-01T00:00:00+00:00')
+        self.assertEqual(report['catalog']['rated_movies_without_tmdb_id'], 1)
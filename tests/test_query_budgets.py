@@ -0,0 +1,161 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+from django.urls import resolve, reverse
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.utils import timezone
+from recommender import views
+from recommender.models import Genre, Movie, MovieSimilarity, Rating, Watchlist
+from recommender.query_budget import QueryRecorder, plan_problems
+from recommender.typeahead import get_typeahead_index, reset_typeahead_index
+
+# Tables that grow with users and ratings; a query must never scan them in full
+HOT_TABLES = {
+    'recommender_movie',
+    'recommender_rating',
+    'recommender_watchlist',
+    'recommender_moviesimilarity',
+    'recommender_movie_genres',
+}
+
+
+class QueryBudgetTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        """Enough rows that every list page is full, so per-row queries would show"""
+        genres = [Genre.objects.create(name=name) for name in ('Action', 'Comedy', 'Drama')]
+        cls.movies = Movie.objects.bulk_create([
+            Movie(
+                title=f"Matrix {i:02d}",
+                genre=genres[i % 3].name,
+                director="Director",
+                release_year=1990 + i % 30,
+                overview="Overview " * 30,
+                tmdb_id=i,
+            )
+            for i in range(60)
+        ])
+        Movie.genres.through.objects.bulk_create([
+            Movie.genres.through(movie=movie, genre=genres[i % 3]) for i, movie in enumerate(cls.movies)
+        ])
+        cls.user = User.objects.create_user(username='testuser', password='testpass123')
+        other = User.objects.create_user(username='other', password='testpass123')
+        now = timezone.now()
+        Rating.objects.bulk_create([
+            Rating(user=user, movie=movie, rating=1 + i % 5, timestamp=now - timedelta(hours=i))
+            for user in (cls.user, other)
+            for i, movie in enumerate(cls.movies[:40])
+        ])
+        Movie.objects.refresh_rating_aggregates()
+        Watchlist.objects.bulk_create([Watchlist(user=cls.user, movie=movie) for movie in cls.movies[30:60]])
+        MovieSimilarity.objects.bulk_create([
+            MovieSimilarity(movie=movie, neighbor=cls.movies[(i + rank) % 60], score=1 / rank, rank=rank)
+            for i, movie in enumerate(cls.movies)
+            for rank in range(1, 6)
+        ])
+        # Plans as on an imported database, which has planner statistics
+        if connection.vendor in ('sqlite', 'postgresql'):
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+
+    def setUp(self):
+        cache.clear()
+        # Built at worker startup (warm_typeahead_index), not by a request
+        reset_typeahead_index()
+        get_typeahead_index()
+        self.client.login(username='testuser', password='testpass123')
+        # The engine runs in a pool thread on its own connection; the budget covers the view's own queries
+        recommended_ids = [movie.id for movie in self.movies[40:60]]
+        patcher = mock.patch.object(views, '_engine_recommendations', return_value=recommended_ids)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def pages(self):
+        movie = self.movies[0]
+        return [
+            reverse('recommender:home'),
+            reverse('recommender:recommendations'),
+            reverse('recommender:search'),
+            reverse('recommender:search') + '?genre=Comedy',
+            reverse('recommender:search') + '?q=matrix',
+            reverse('recommender:search') + '?q=matrix&genre=Comedy',
+            reverse('recommender:movie_detail', args=[movie.id]),
+            reverse('recommender:profile'),
+            reverse('recommender:search_api') + '?q=mat',
+            reverse('recommender:search_api') + '?q=overview',
+            reverse('recommender:load_more', args=['popular']),
+            reverse('recommender:load_more', args=['top_rated']),
+            reverse('recommender:load_more', args=['all']),
+        ]
+
+    def record(self, url):
+        cache.clear()
+        with QueryRecorder() as recorder:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return recorder
+
+    def test_views_stay_within_budget(self):
+        """Test that every page runs at most the queries its view declares"""
+        for url in self.pages():
+            budget = getattr(resolve(url.split('?')[0]).func, 'query_budget', None)
+            with self.subTest(url=url):
+                self.assertIsNotNone(budget, f"{url} has no @query_budget")
+                recorder = self.record(url)
+                self.assertLessEqual(
+                    len(recorder.queries), budget,
+                    f"{url} ran over its budget of {budget} queries:\n{recorder.report()}"
+                )
+
+    def test_second_page_stays_within_budget(self):
+        """Test that following a cursor costs no more than the first page"""
+        first = self.client.get(reverse('recommender:load_more', args=['popular'])).json()
+        url = reverse('recommender:load_more', args=['popular']) + f"?cursor={first['next_cursor']}"
+        self.assertLessEqual(len(self.record(url).queries), views.load_more.query_budget)
+
+        first = self.client.get(reverse('recommender:profile'))
+        cursor = first.context['rated_movies'].next_cursor
+        url = reverse('recommender:profile') + f"?ratings_cursor={cursor}"
+        self.assertLessEqual(len(self.record(url).queries), views.profile_view.query_budget)
+
+    def test_hot_queries_use_indexes(self):
+        """Test that no page query scans a hot table or sorts it without an index"""
+        if connection.vendor != 'sqlite':
+            self.skipTest("plan checks read SQLite's EXPLAIN QUERY PLAN")
+        for url in self.pages():
+            recorder = self.record(url)
+            for query in recorder.queries:
+                if not query.sql.startswith('SELECT'):
+                    continue
+                plan = recorder.explain(query)
+                with self.subTest(url=url, sql=query.sql):
+                    self.assertEqual(plan_problems(query.sql, plan, HOT_TABLES), [], '\n'.join(plan))
+
+
+class PlanProblemsTestCase(SimpleTestCase):
+    def test_flags_scans_and_sorts_of_hot_tables(self):
+        """Test that only unbounded scans and sorts of the given tables are reported"""
+        tables = {'recommender_rating'}
+        history = 'SELECT * FROM "recommender_rating" WHERE "recommender_rating"."user_id" = %s ' \
+                  'ORDER BY "recommender_rating"."timestamp" DESC LIMIT 25'
+        self.assertEqual(plan_problems(history, [
+            'SEARCH recommender_rating USING INDEX recommender_rating_user_id (user_id=?)',
+            'USE TEMP B-TREE FOR ORDER BY',
+        ], tables), ["ORDER BY not served by an index"])
+        self.assertEqual(plan_problems(history, [
+            'SEARCH recommender_rating USING INDEX rating_user_recent_idx (user_id=?)',
+        ], tables), [])
+
+        subquery = 'SELECT * FROM "recommender_movie" WHERE "recommender_movie"."id" IN ' \
+                   '(SELECT U0."movie_id" FROM "recommender_rating" U0 WHERE U0."rating" > %s)'
+        self.assertEqual(plan_problems(subquery, ['SCAN U0'], tables), ["full scan of recommender_rating"])
+        # A page read in index order stops at the LIMIT
+        first_page = 'SELECT * FROM "recommender_rating" ORDER BY "recommender_rating"."id" LIMIT 21'
+        self.assertEqual(plan_problems(first_page, ['SCAN recommender_rating'], tables), [])
+        self.assertEqual(
+            plan_problems('SELECT COUNT(*) FROM "recommender_rating"', ['Seq Scan on recommender_rating  (cost=0.00..1.00)'], tables),
+            ["full scan of recommender_rating"]
+        )
@@ -0,0 +1,59 @@
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from recommender.models import Movie, Rating
+
+
+class RecommendedScrollTestCase(TestCase):
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.movies = [
+            Movie.objects.create(
+                title=f"Movie {i}",
+                genre="Drama",
+                director="Director",
+                release_year=2000,
+                overview="Overview",
+                tmdb_id=i
+            )
+            for i in range(30)
+        ]
+        # Engine ranking deliberately not in id order
+        self.ranking = [movie.id for movie in reversed(self.movies)]
+        
+        patcher = mock.patch('recommender.ranked_lists.HybridRecommender')
+        self.engine = patcher.start()
+        self.engine.return_value.get_recommendations.return_value = self.ranking
+        self.addCleanup(patcher.stop)
+        
+        self.client.login(username='testuser', password='testpass123')
+    
+    def test_pages_slice_one_ranked_list(self):
+        """Test that the engine runs once and pages come back in rank order"""
+        url = reverse('recommender:load_more', args=['recommended'])
+        
+        first = self.client.get(url).json()
+        second = self.client.get(url, {'cursor': first['next_cursor']}).json()
+        
+        self.assertEqual(self.engine.call_count, 1)
+        self.assertEqual(
+            [m['id'] for m in first['movies'] + second['movies']],
+            self.ranking
+        )
+        self.assertFalse(second['has_next'])
+    
+    def test_new_rating_drops_cached_list(self):
+        """Test that rating a movie forces a fresh ranking on the next request"""
+        url = reverse('recommender:load_more', args=['recommended'])
+        self.client.get(url)
+        
+        Rating.objects.create(user=self.user, movie=self.movies[0], rating=5.0)
+        self.client.get(url)
+        
+        self.assertEqual(self.engine.call_count, 2)
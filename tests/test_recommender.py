@@ -1,7 +1,8 @@
 from django.test import TestCase
 from django.contrib.auth.models import User
 from django.urls import reverse
-from recommender.models import Movie, Rating
+from django.core.cache import cache
+from recommender.models import Genre, Movie, Rating
 from recommender.forms import RatingForm
 from recommender.recommender_engine import HybridRecommender
 from django.db import connection
@@ -215,3 +216,129 @@ class SearchFunctionalityTestCase(TestCase):
         self.assertNotContains(response, 'Action Adventure')
         self.assertNotContains(response, 'Drama Story')
         self.assertNotContains(response, 'Comedy Show')
+
+
+class GenreModelTestCase(TestCase):
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        
+        self.movie = Movie.objects.create(
+            title="Genre Movie",
+            genre="Action|Sci-Fi|Thriller",
+            director="Genre Director",
+            release_year=2019,
+            overview="A movie with several genres",
+            tmdb_id=1
+        )
+        self.untagged_movie = Movie.objects.create(
+            title="Untagged Movie",
+            genre="(no genres listed)",
+            director="Unknown",
+            release_year=2018,
+            overview="A movie without genres",
+            tmdb_id=2
+        )
+    
+    def test_genres_are_normalized_on_save(self):
+        """Test that every genre in the pipe-delimited string gets a Genre link"""
+        self.assertEqual(
+            sorted(self.movie.genres.values_list('name', flat=True)),
+            ['Action', 'Sci-Fi', 'Thriller']
+        )
+        self.assertFalse(self.untagged_movie.genres.exists())
+        
+        self.movie.genre = "Drama"
+        self.movie.save()
+        self.assertEqual(list(self.movie.genres.values_list('name', flat=True)), ['Drama'])
+    
+    def test_cached_genre_names(self):
+        """Test that genre facets come from the cached Genre list"""
+        self.assertEqual(Genre.cached_names(), ['Action', 'Sci-Fi', 'Thriller'])
+        
+        # Served from cache without touching the database
+        with self.assertNumQueries(0):
+            Genre.cached_names()
+        
+        # A new genre invalidates the cached list
+        Movie.objects.create(
+            title="Western Movie",
+            genre="Western",
+            director="Western Director",
+            release_year=1960,
+            overview="A western",
+            tmdb_id=3
+        )
+        self.assertIn('Western', Genre.cached_names())
+    
+    def test_search_filters_on_any_genre(self):
+        """Test that the genre filter matches secondary genres through the join"""
+        response = self.client.get(reverse('recommender:search'), {'genre': 'Thriller'})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Genre Movie')
+        self.assertNotContains(response, 'Untagged Movie')
+
+
+class RatingAggregatesTestCase(TestCase):
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.other_user = User.objects.create_user(username='otheruser', password='testpass123')
+        self.movie = Movie.objects.create(
+            title="Aggregate Movie",
+            genre="Drama",
+            director="Test Director",
+            release_year=2020,
+            overview="A test movie",
+            tmdb_id=1
+        )
+    
+    def assertAggregates(self, count, total, average):
+        self.movie.refresh_from_db()
+        self.assertEqual(self.movie.rating_count, count)
+        self.assertAlmostEqual(self.movie.rating_sum, total)
+        if average is None:
+            self.assertIsNone(self.movie.avg_rating)
+        else:
+            self.assertAlmostEqual(self.movie.avg_rating, average)
+    
+    def test_aggregates_follow_rating_changes(self):
+        """Test that create, update and delete keep Movie aggregates in sync"""
+        self.assertAggregates(0, 0, None)
+        
+        Rating.objects.create(user=self.user, movie=self.movie, rating=4.0)
+        rating, _ = Rating.objects.update_or_create(
+            user=self.other_user, movie=self.movie, defaults={'rating': 2.0}
+        )
+        self.assertAggregates(2, 6.0, 3.0)
+        
+        Rating.objects.update_or_create(user=self.other_user, movie=self.movie, defaults={'rating': 5.0})
+        self.assertAggregates(2, 9.0, 4.5)
+        self.assertEqual(self.movie.get_rating_display(), "4.5/5.0")
+        
+        Rating.objects.filter(user=self.user).delete()
+        self.assertAggregates(1, 5.0, 5.0)
+        
+        self.other_user.delete()
+        self.assertAggregates(0, 0, None)
+    
+    def test_refresh_after_bulk_load(self):
+        """Test that bulk-created ratings are folded in by refresh_rating_aggregates"""
+        Rating.objects.bulk_create([
+            Rating(user=self.user, movie=self.movie, rating=3.0),
+            Rating(user=self.other_user, movie=self.movie, rating=4.0),
+        ])
+        self.assertAggregates(0, 0, None)
+        
+        Movie.objects.refresh_rating_aggregates()
+        self.assertAggregates(2, 7.0, 3.5)
+    
+    def test_home_reads_denormalized_columns(self):
+        """Test that home rows need no aggregate queries per movie"""
+        Rating.objects.create(user=self.user, movie=self.movie, rating=4.0)
+        response = self.client.get(reverse('recommender:home'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['popular_movies']), [self.movie])
+        self.assertContains(response, '4.0/5.0')
@@ -0,0 +1,73 @@
+from django.test import TestCase
+from django.urls import reverse
+from django.core.cache import cache
+from recommender.models import Movie
+from recommender.search import get_search_backend, search_movie_ids
+from recommender.typeahead import reset_typeahead_index
+
+
+class FullTextSearchTestCase(TestCase):
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        reset_typeahead_index()
+        
+        self.matrix = Movie.objects.create(
+            title="The Matrix",
+            genre="Action|Sci-Fi",
+            director="Lana Wachowski",
+            release_year=1999,
+            overview="A hacker learns the true nature of his reality",
+            tmdb_id=1
+        )
+        self.inception = Movie.objects.create(
+            title="Inception",
+            genre="Action|Sci-Fi",
+            director="Christopher Nolan",
+            release_year=2010,
+            overview="A thief enters dreams, a matrix of shared minds",
+            tmdb_id=2
+        )
+        self.godfather = Movie.objects.create(
+            title="The Godfather",
+            genre="Crime|Drama",
+            director="Francis Ford Coppola",
+            release_year=1972,
+            overview="The aging patriarch of a crime dynasty",
+            tmdb_id=3
+        )
+    
+    def test_prefix_queries_are_ranked(self):
+        """Test prefix matching across fields with title matches ranked first"""
+        self.assertEqual(search_movie_ids('matr'), [self.matrix.id, self.inception.id])
+        self.assertEqual(search_movie_ids('nolan'), [self.inception.id])
+        self.assertEqual(search_movie_ids('crime dyn'), [self.godfather.id])
+        self.assertEqual(search_movie_ids('   '), [])
+        self.assertEqual(search_movie_ids('"*'), [])
+    
+    def test_index_follows_movie_changes(self):
+        """Test that inserts, updates and deletes are reflected in the index"""
+        self.godfather.title = "Il Padrino"
+        self.godfather.save()
+        self.assertEqual(search_movie_ids('padrino'), [self.godfather.id])
+        self.assertEqual(search_movie_ids('godfather'), [])
+        
+        self.matrix.delete()
+        self.assertEqual(search_movie_ids('matrix'), [self.inception.id])
+        
+        # Rebuilding from scratch gives the same answers
+        get_search_backend().rebuild()
+        self.assertEqual(search_movie_ids('padrino'), [self.godfather.id])
+    
+    def test_views_use_full_text_search(self):
+        """Test that search page and autocomplete API return ranked matches"""
+        response = self.client.get(reverse('recommender:search_api'), {'q': 'wachow'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([m['id'] for m in response.json()['movies']], [self.matrix.id])
+        
+        response = self.client.get(reverse('recommender:search'), {'q': 'matrix', 'genre': 'Sci-Fi'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [movie.id for movie in response.context['page_obj']],
+            [self.matrix.id, self.inception.id]
+        )
@@ -0,0 +1,101 @@
+import pickle
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth.models import User
+from recommender.models import Movie, MovieSimilarity
+from recommender.recommender_engine import SIMILARITY_EMPTY_KEY, HybridRecommender
+
+
+class MovieSimilarityTestCase(TestCase):
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.movies = [
+            Movie.objects.create(
+                title=f"Movie {i}",
+                genre="Drama",
+                director="Director",
+                release_year=2000,
+                overview="Overview",
+                tmdb_id=i
+            )
+            for i in range(4)
+        ]
+        self.client.login(username='testuser', password='testpass123')
+    
+    def _engine(self, similarity):
+        """Engine with a fixed similarity matrix, without loading any data"""
+        with mock.patch.object(HybridRecommender, '__init__', return_value=None):
+            recommender = HybridRecommender()
+        recommender.movies_df = pd.DataFrame({'id': [movie.id for movie in self.movies]})
+        recommender.content_similarity = np.array(similarity)
+        return recommender
+    
+    def test_store_top_neighbours_in_rank_order(self):
+        """Test that each movie stores its k best neighbours, excluding itself"""
+        recommender = self._engine([
+            [1.0, 0.2, 0.9, 0.5],
+            [0.2, 1.0, 0.1, 0.3],
+            [0.9, 0.1, 1.0, 0.4],
+            [0.5, 0.3, 0.4, 1.0],
+        ])
+        
+        written = recommender.store_movie_similarities(k=2, block_size=3)
+        
+        self.assertEqual(written, 8)
+        neighbours = list(
+            MovieSimilarity.objects.filter(movie=self.movies[0]).values_list('neighbor_id', flat=True)
+        )
+        self.assertEqual(neighbours, [self.movies[2].id, self.movies[3].id])
+    
+    def test_detail_page_reads_similarity_table(self):
+        """Test that the detail page lists stored neighbours without the engine"""
+        MovieSimilarity.objects.create(movie=self.movies[0], neighbor=self.movies[3], score=0.9, rank=1)
+        MovieSimilarity.objects.create(movie=self.movies[0], neighbor=self.movies[1], score=0.5, rank=2)
+        
+        with mock.patch('recommender.recommender_engine.HybridRecommender.__init__') as engine_init:
+            response = self.client.get(reverse('recommender:movie_detail', args=[self.movies[0].id]))
+        
+        engine_init.assert_not_called()
+        self.assertEqual(list(response.context['similar_movies']), [self.movies[3], self.movies[1]])
+
+    
+    def test_empty_table_is_logged(self):
+        """Test that the detail page warns when build_movie_similarities hasn't run"""
+        cache.clear()
+        with self.assertLogs('recommender.views', 'WARNING') as logs:
+            response = self.client.get(reverse('recommender:movie_detail', args=[self.movies[0].id]))
+        
+        self.assertIn('build_movie_similarities', logs.output[0])
+        self.assertEqual(len(response.context['similar_movies']), 3)
+        
+        # Building the table clears the cached check
+        self._engine(np.eye(4)).store_movie_similarities(k=2)
+        self.assertIsNone(cache.get(SIMILARITY_EMPTY_KEY))
+    
+    def test_building_the_content_model_leaves_the_table_alone(self):
+        """Test that the engine only writes MovieSimilarity when asked, and rebuilds a stale cached model"""
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        with open(Path(cache_dir) / 'content_model.pkl', 'wb') as f:
+            pickle.dump({'vectorizer': None, 'matrix': None, 'similarity': np.eye(2)}, f)
+        recommender = self._engine(np.eye(4))
+        recommender.cache_dir = Path(cache_dir)
+        recommender.movies_df = pd.DataFrame({
+            'id': [movie.id for movie in self.movies],
+            'genre': ['Drama', 'Drama', 'Comedy', 'Comedy'],
+            'overview': ['dark heist', 'dark heist crew', 'funny family', 'funny family trip'],
+        })
+        
+        recommender._build_content_model()
+        
+        self.assertEqual(recommender.content_similarity.shape, (4, 4))
+        self.assertFalse(MovieSimilarity.objects.exists())
@@ -0,0 +1,147 @@
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from unittest import mock
+
+import numpy as np
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from recommender import snapshot
+from recommender.models import Movie, Rating, Watchlist
+from recommender.recommender_engine import HybridRecommender
+from recommender.snapshot import discard_snapshot, export_snapshot, load_snapshot
+
+
+class SnapshotTestCase(TestCase):
+    def setUp(self):
+        """Set up test data"""
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        settings_override = override_settings(SNAPSHOT_DIR=self.directory)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        
+        self.user = User.objects.create_user(username='viewer', password='secret')
+        self.movies = [
+            Movie.objects.create(
+                title=title, genre=genre, director="Unknown", release_year=2000, overview=overview, tmdb_id=tmdb_id
+            )
+            for tmdb_id, (title, genre, overview) in enumerate([
+                ("Amélie (2001)", "Comedy|Romance", "Une jeune serveuse…"),
+                ("Heat (1995)", "Crime", ""),
+                ("Toy Story (1995)", "Animation", "Toys"),
+            ], start=1)
+        ]
+        self.rated_at = datetime(2015, 3, 31, 12, 30, 15, tzinfo=timezone.utc)
+        for movie, value in zip(self.movies, (4.5, 3.0, 5.0)):
+            Rating.objects.create(user=self.user, movie=movie, rating=value, timestamp=self.rated_at)
+        Watchlist.objects.create(user=self.user, movie=self.movies[1])
+    
+    def test_export_and_load_round_trip(self):
+        """Test that the snapshot reads back the tables as they were when exported"""
+        counts = export_snapshot(chunk_rows=2)
+        self.assertEqual(counts, {'movies': 3, 'ratings': 3, 'watchlist': 1})
+        
+        # Later writes don't show up in the exported version
+        Rating.objects.filter(movie=self.movies[0]).update(rating=1.0)
+        
+        data = load_snapshot()
+        movies = data.movies
+        self.assertEqual(movies['title'].tolist(), ["Amélie (2001)", "Heat (1995)", "Toy Story (1995)"])
+        self.assertEqual(movies['overview'].tolist(), ["Une jeune serveuse…", "", "Toys"])
+        self.assertEqual(movies['id'].tolist(), [movie.id for movie in self.movies])
+        
+        ratings = data.ratings
+        self.assertEqual(ratings['rating'].tolist(), [4.5, 3.0, 5.0])
+        self.assertEqual(ratings['user_id'].unique().tolist(), [self.user.id])
+        self.assertEqual(ratings['timestamp'].iloc[0], np.datetime64('2015-03-31T12:30:15'))
+        self.assertEqual(data.watchlist['movie_id'].tolist(), [self.movies[1].id])
+    
+    def test_new_export_replaces_current_version(self):
+        """Test that readers switch to the newest export and old versions are removed"""
+        export_snapshot()
+        first = load_snapshot().version
+        Rating.objects.create(user=User.objects.create_user(username='other'), movie=self.movies[0], rating=2.0)
+        
+        export_snapshot()
+        
+        current = load_snapshot()
+        self.assertNotEqual(current.version, first)
+        self.assertEqual(len(current.ratings), 4)
+        self.assertEqual(sorted(os.listdir(self.directory)), sorted(['CURRENT', os.path.basename(current.version)]))
+    
+    def test_snapshot_of_another_database_is_ignored(self):
+        """Test that a snapshot is only used with the database it came from"""
+        self.assertIsNone(load_snapshot())
+        export_snapshot()
+        
+        with mock.patch.object(snapshot, '_database_name', return_value='other.sqlite3'):
+            self.assertIsNone(load_snapshot())
+
+    def test_reseeded_tables_invalidate_the_snapshot(self):
+        """Test that a snapshot is rejected once its tables were cleared and refilled"""
+        export_snapshot()
+        exported_ids = sorted(Rating.objects.values_list('id', flat=True))
+        Rating.objects.all().delete()
+        # A cleared table with its id sequence reset hands out the old ids again
+        other = User.objects.create_user(username='other')
+        for rating_id, movie in zip(exported_ids, self.movies):
+            Rating.objects.create(id=rating_id, user=other, movie=movie, rating=1.0)
+        
+        self.assertIsNone(load_snapshot())
+        
+        Rating.objects.all().delete()
+        self.assertIsNone(load_snapshot())
+    
+    def test_deleted_rows_keep_the_snapshot(self):
+        """Test that deleting exported rows (the last one included) doesn't reject the snapshot"""
+        Watchlist.objects.create(user=self.user, movie=self.movies[2])
+        export_snapshot()
+        
+        Watchlist.objects.filter(movie=self.movies[2]).delete()
+        Rating.objects.filter(movie=self.movies[2]).delete()
+        
+        self.assertIsNotNone(load_snapshot())
+        
+        discard_snapshot()
+        self.assertIsNone(load_snapshot())
+    
+    def test_rows_added_after_export_are_read_live(self):
+        """Test that ratings and watchlist entries newer than the snapshot are appended to it"""
+        export_snapshot()
+        data = load_snapshot()
+        self.assertTrue(data.new_rows('ratings').empty)
+        
+        newcomer = User.objects.create_user(username='newcomer')
+        Rating.objects.create(user=newcomer, movie=self.movies[2], rating=4.0, timestamp=self.rated_at)
+        Watchlist.objects.create(user=newcomer, movie=self.movies[0])
+        
+        ratings = data.with_new_rows('ratings')
+        self.assertEqual(len(ratings), 4)
+        self.assertEqual(ratings['user_id'].iloc[-1], newcomer.id)
+        self.assertEqual(ratings['timestamp'].iloc[-1], np.datetime64('2015-03-31T12:30:15'))
+        self.assertEqual(ratings.dtypes.tolist(), data.ratings.dtypes.tolist())
+        self.assertEqual(data.with_new_rows('watchlist')['movie_id'].tolist(), [self.movies[1].id, self.movies[0].id])
+    
+    def test_rating_after_export_changes_recommendations(self):
+        """Test that the engine sees a rating made after export_snapshot()"""
+        newcomer = User.objects.create_user(username='newcomer')
+        export_snapshot()
+        
+        def recommend():
+            with mock.patch.object(HybridRecommender, '__init__', return_value=None):
+                recommender = HybridRecommender()
+            recommender._load_data()
+            recommender.svd_model = None
+            # Amélie is most like Toy Story
+            recommender.content_similarity = np.array([[1.0, 0.0, 0.9], [0.0, 1.0, 0.1], [0.9, 0.1, 1.0]])
+            return recommender.get_recommendations(newcomer.id, n=3)
+        
+        # No ratings yet: the most popular movies
+        self.assertEqual(recommend(), [self.movies[2].id, self.movies[0].id, self.movies[1].id])
+        
+        Rating.objects.create(user=newcomer, movie=self.movies[0], rating=5.0)
+        
+        self.assertEqual(recommend(), [self.movies[2].id, self.movies[1].id])
@@ -0,0 +1,60 @@
+import gzip
+import shutil
+import tempfile
+
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from recommender.middleware import PrecompressedStaticMiddleware
+
+
+class StaticPipelineTestCase(SimpleTestCase):
+    def setUp(self):
+        """Collect static files into a throwaway STATIC_ROOT"""
+        self.static_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.static_root)
+        settings_override = override_settings(STATIC_ROOT=self.static_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        call_command('collectstatic', interactive=False, verbosity=0)
+    
+    def _render(self):
+        return Template("{% load assets %}{% bundle 'js/app.js' %}").render(Context())
+    
+    def test_bundle_is_hashed_and_precompressed(self):
+        """Test that the bundle tag points at one hashed, gzipped file"""
+        html = self._render()
+        
+        self.assertEqual(html.count('<script'), 1)
+        url = html.split('"')[1]
+        self.assertRegex(url, r'^/static/js/app\.[0-9a-f]{12}\.js$')
+        
+        path = self.static_root + url[len('/static'):]
+        with open(path, 'rb') as f, gzip.open(path + '.gz') as gz:
+            bundle = f.read()
+            self.assertEqual(gz.read(), bundle)
+        self.assertIn(b'const RatingBuffer', bundle)
+        self.assertIn(b'class SearchAutocomplete', bundle)
+    
+    @override_settings(DEBUG=True)
+    def test_debug_loads_source_files(self):
+        """Test that DEBUG renders one tag per source file"""
+        self.assertEqual(self._render().count('<script'), 4)
+    
+    @override_settings(SERVE_PRECOMPRESSED_STATIC=True)
+    def test_middleware_serves_variant_by_accept_encoding(self):
+        """Test that gzip clients get the .gz file with long-lived caching"""
+        url = self._render().split('"')[1]
+        middleware = PrecompressedStaticMiddleware(lambda request: None)
+        factory = RequestFactory()
+        
+        response = middleware(factory.get(url, HTTP_ACCEPT_ENCODING='gzip, deflate'))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/javascript')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('Accept-Encoding', response['Vary'])
+        
+        plain = middleware(factory.get(url, HTTP_ACCEPT_ENCODING='gzip;q=0'))
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        
+        self.assertIsNone(middleware(factory.get('/static/../manage.py')))
@@ -0,0 +1,132 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from recommender.models import Movie
+from recommender.tmdb import TMDbClient, TMDbError, TokenBucket
+
+
+class StubTMDbHandler(BaseHTTPRequestHandler):
+    """/movie/1 ok, /movie/2 rate limited once, /movie/3 unknown, /movie/4 always failing"""
+    requests_seen = []
+    lock = threading.Lock()
+
+    def do_GET(self):
+        tmdb_id = int(self.path.split('?')[0].rsplit('/', 1)[-1])
+        with self.lock:
+            StubTMDbHandler.requests_seen.append(tmdb_id)
+            attempts = StubTMDbHandler.requests_seen.count(tmdb_id)
+        if tmdb_id == 2 and attempts == 1:
+            self.send_response(429)
+            self.send_header('Retry-After', '0')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+        elif tmdb_id in (1, 2):
+            body = json.dumps({'id': tmdb_id, 'overview': f'Overview {tmdb_id}', 'poster_path': f'/p{tmdb_id}.jpg'}).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self.send_response(404 if tmdb_id == 3 else 500)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class TMDbEnrichmentTestCase(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubTMDbHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f'http://127.0.0.1:{cls.server.server_address[1]}/3'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        """Set up test data"""
+        StubTMDbHandler.requests_seen = []
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir)
+        settings_override = override_settings(TMDB_API_URL=self.base_url, TMDB_CACHE_DIR=self.cache_dir, TMDB_RATE=1000)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        no_backoff = mock.patch.object(TMDbClient, '_retry_delay', return_value=0)
+        no_backoff.start()
+        self.addCleanup(no_backoff.stop)
+
+        for tmdb_id in (1, 2, 3, 4, -5):
+            Movie.objects.create(
+                title=f"Movie {tmdb_id}", genre="Drama", director="Director", release_year=2000,
+                overview="", poster_url=None, poster_digest='a' * 64, tmdb_id=tmdb_id,
+            )
+
+    def _enrich(self):
+        out, err = StringIO(), StringIO()
+        call_command('enrich_tmdb', workers=4, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_enrich_updates_movies_and_caches_responses(self):
+        """Test that details are written back and a second run is served from the disk cache"""
+        out, err = self._enrich()
+
+        movie = Movie.objects.get(tmdb_id=2)
+        self.assertEqual(movie.overview, 'Overview 2')
+        self.assertEqual(movie.poster_url, 'https://image.tmdb.org/t/p/w500/p2.jpg')
+        self.assertEqual(movie.poster_digest, '')
+        self.assertEqual(Movie.objects.get(tmdb_id=3).overview, '')
+        self.assertIn('Updated 2 of 4 movies', out)
+        self.assertIn('1 not on TMDb, 1 failed', out)
+        self.assertIn('TMDb 4: giving up', err)
+        # 429 retried once, the 500 given up on after 5 attempts, placeholder id never asked for
+        self.assertEqual(sorted(StubTMDbHandler.requests_seen), [1, 2, 2, 3, 4, 4, 4, 4, 4])
+        self.assertTrue(os.path.exists(os.path.join(self.cache_dir, '001', '1.json')))
+        self.assertTrue(os.path.exists(os.path.join(self.cache_dir, '003', '3.missing')))
+
+        StubTMDbHandler.requests_seen = []
+        out, _ = self._enrich()
+        self.assertIn('Updated 0 of 4 movies', out)
+        # Only the id that never succeeded is fetched again
+        self.assertEqual(set(StubTMDbHandler.requests_seen), {4})
+
+    def test_client_raises_after_retries(self):
+        """Test that the client reports persistent server errors"""
+        client = TMDbClient(retries=1)
+        with self.assertRaises(TMDbError):
+            client.movie(4)
+        self.assertEqual(client.requests_made, 2)
+        self.assertIsNone(client.movie(3))
+
+
+class TokenBucketTestCase(SimpleTestCase):
+    def test_bucket_limits_rate_after_burst(self):
+        """Test that requests beyond the burst wait for tokens to refill"""
+        now = [0.0]
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            now[0] += seconds
+
+        bucket = TokenBucket(rate=10, capacity=5, clock=lambda: now[0], sleep=sleep)
+        for _ in range(15):
+            bucket.acquire()
+
+        self.assertEqual(len(sleeps), 10)
+        self.assertAlmostEqual(now[0], 1.0)
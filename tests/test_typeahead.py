@@ -0,0 +1,102 @@
+import json
+
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from recommender.models import Movie, Rating
+from recommender.ratings import save_ratings
+from recommender.typeahead import get_typeahead_index, reset_typeahead_index
+
+
+class TypeaheadIndexTestCase(TestCase):
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        reset_typeahead_index()
+        
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.other_user = User.objects.create_user(username='otheruser', password='testpass123')
+        
+        self.star_wars = Movie.objects.create(
+            title="Star Wars (1977)",
+            genre="Action|Sci-Fi",
+            director="George Lucas",
+            release_year=1977,
+            overview="A farm boy joins the rebellion",
+            tmdb_id=1
+        )
+        self.star_trek = Movie.objects.create(
+            title="Star Trek (2009)",
+            genre="Action|Sci-Fi",
+            director="J.J. Abrams",
+            release_year=2009,
+            overview="A young crew on the Enterprise",
+            tmdb_id=2
+        )
+        self.amelie = Movie.objects.create(
+            title="Amélie (2001)",
+            genre="Comedy|Romance",
+            director="Jean-Pierre Jeunet",
+            release_year=2001,
+            overview="x" * 150,
+            tmdb_id=3
+        )
+        
+        # Star Trek is more popular than Star Wars
+        Rating.objects.create(user=self.user, movie=self.star_trek, rating=4.0)
+        Rating.objects.create(user=self.other_user, movie=self.star_trek, rating=5.0)
+        Rating.objects.create(user=self.user, movie=self.star_wars, rating=4.0)
+    
+    def search_ids(self, query):
+        return [json.loads(payload)['id'] for payload in get_typeahead_index().search(query)]
+    
+    def test_prefix_matches_ranked_by_popularity(self):
+        """Test prefix matching on titles and genres with popularity ordering"""
+        self.assertEqual(self.search_ids('sta'), [self.star_trek.id, self.star_wars.id])
+        self.assertEqual(self.search_ids('star wa'), [self.star_wars.id])
+        self.assertEqual(self.search_ids('romance'), [self.amelie.id])
+        self.assertEqual(self.search_ids('amelie'), [self.amelie.id])
+        self.assertEqual(self.search_ids('s'), [])
+        self.assertEqual(self.search_ids('starship'), [])
+    
+    def test_index_updates_on_movie_save_and_delete(self):
+        """Test that saved and deleted movies are reflected without a rebuild"""
+        get_typeahead_index()
+        
+        self.star_wars.title = "Space Wars (1977)"
+        self.star_wars.save()
+        self.assertEqual(self.search_ids('star'), [self.star_trek.id])
+        self.assertEqual(self.search_ids('space'), [self.star_wars.id])
+        
+        self.star_trek.delete()
+        self.assertEqual(self.search_ids('star'), [])
+    
+    def test_new_ratings_rerank_without_a_rebuild(self):
+        """Test that ratings saved one by one or in bulk move a movie up"""
+        get_typeahead_index()
+        third_user = User.objects.create_user(username='thirduser', password='testpass123')
+        
+        # Two ratings each; ties go to the lower id
+        Rating.objects.create(user=self.other_user, movie=self.star_wars, rating=3.0)
+        self.assertEqual(self.search_ids('sta'), [self.star_wars.id, self.star_trek.id])
+        
+        save_ratings(third_user, {self.star_trek.id: 4.0})
+        self.assertEqual(self.search_ids('sta'), [self.star_trek.id, self.star_wars.id])
+        self.assertEqual(self.search_ids('star wa'), [self.star_wars.id])
+    
+    def test_search_api_uses_index_without_queries(self):
+        """Test that autocomplete is answered from memory with the usual payload"""
+        get_typeahead_index()
+        
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('recommender:search_api'), {'q': 'ame'})
+        self.assertEqual(response.status_code, 200)
+        movies = response.json()['movies']
+        self.assertEqual(len(movies), 1)
+        self.assertEqual(movies[0]['title'], "Amélie (2001)")
+        self.assertEqual(movies[0]['overview'], "x" * 100 + '...')
+        
+        # Words only found in director/overview fall back to full-text search
+        response = self.client.get(reverse('recommender:search_api'), {'q': 'lucas'})
+        self.assertEqual([m['id'] for m in response.json()['movies']], [self.star_wars.id])
@@ -0,0 +1,70 @@
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from recommender.models import Movie, Rating, Watchlist
+from recommender.typeahead import reset_typeahead_index
+from recommender.user_state import get_user_movie_state
+
+
+class UserMovieStateTestCase(TestCase):
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        reset_typeahead_index()
+        
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.other = User.objects.create_user(username='other', password='testpass123')
+        self.movies = [
+            Movie.objects.create(
+                title=f"Matrix {i}",
+                genre="Action",
+                director="Director",
+                release_year=2000 + i,
+                overview="Overview",
+                tmdb_id=i
+            )
+            for i in range(5)
+        ]
+        Rating.objects.create(user=self.user, movie=self.movies[0], rating=4.5)
+        Rating.objects.create(user=self.user, movie=self.movies[4], rating=2.0)
+        Rating.objects.create(user=self.other, movie=self.movies[1], rating=5.0)
+        Watchlist.objects.create(user=self.user, movie=self.movies[1])
+        Watchlist.objects.create(user=self.user, movie=self.movies[0])
+    
+    def test_state_limited_to_requested_ids(self):
+        """Test that only the page's movies are fetched, in two queries"""
+        ids = [movie.id for movie in self.movies[:3]]
+        
+        with self.assertNumQueries(2):
+            state = get_user_movie_state(self.user, ids)
+        
+        self.assertEqual(state, {
+            self.movies[0].id: {'rating': 4.5, 'in_watchlist': True},
+            self.movies[1].id: {'rating': None, 'in_watchlist': True},
+        })
+    
+    def test_json_endpoints_include_user_state(self):
+        """Test that load_more and search_api carry user_state for logged-in users only"""
+        url = reverse('recommender:load_more', args=['all'])
+        anonymous = self.client.get(url).json()
+        self.assertNotIn('user_state', anonymous)
+        
+        self.client.login(username='testuser', password='testpass123')
+        # Served from the shared cache, hydrated per user
+        data = self.client.get(url).json()
+        self.assertEqual(data['user_state'][str(self.movies[4].id)], {'rating': 2.0, 'in_watchlist': False})
+        
+        data = self.client.get(reverse('recommender:search_api'), {'q': 'matrix'}).json()
+        self.assertEqual(len(data['movies']), 5)
+        self.assertEqual(data['user_state'][str(self.movies[0].id)], {'rating': 4.5, 'in_watchlist': True})
+    
+    def test_search_page_marks_rated_movies(self):
+        """Test that search results carry the user's own rating"""
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.get(reverse('recommender:search'))
+        
+        ratings = {movie.id: movie.user_rating for movie in response.context['page_obj']}
+        self.assertEqual(ratings[self.movies[0].id], 4.5)
+        self.assertIsNone(ratings[self.movies[2].id])
+        self.assertContains(response, 'data-current-rating="4.5"')